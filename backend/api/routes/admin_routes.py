@@ -1,14 +1,15 @@
 """
 Admin API routes for monitoring and management.
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, select, and_
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db, User, VerificationSession, Account, AuditLog, VerificationStatus
+from database import get_async_db, User, VerificationSession, Account, AuditLog, VerificationStatus
+from services.stats_service import stats_service
 
 router = APIRouter()
 
@@ -48,39 +49,60 @@ class SystemStats(BaseModel):
 
 @router.get("/users", response_model=List[UserInfo])
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Query(None, ge=0, description="Keyset pagination: return users with id > after_id"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get list of users with pagination.
+    Get list of users with pagination, ordered by id.
     
+    Use after_id (the X-Next-After-Id header of the previous page) for deep
+    pages; skip/limit still works but gets slower as skip grows.
     For admin monitoring purposes.
     """
     try:
-        users = db.query(User).offset(skip).limit(limit).all()
+        # One page of users
+        page = select(User.id, User.name, User.email, User.phone, User.created_at).order_by(User.id)
+        if after_id is not None:
+            page = page.where(User.id > after_id)
+        else:
+            page = page.offset(skip)
+        page = page.limit(limit).subquery()
         
-        user_list = []
-        for user in users:
-            # Get latest verification session
-            latest_session = db.query(VerificationSession).filter(
-                VerificationSession.user_id == user.id
-            ).order_by(desc(VerificationSession.created_at)).first()
-            
-            # Get account if exists
-            account = db.query(Account).filter(Account.user_id == user.id).first()
-            
-            user_info = UserInfo(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                phone=user.phone,
-                created_at=user.created_at,
-                account_number=account.account_number if account else None,
-                verification_status=latest_session.status.value if latest_session else "not_started"
+        # Latest verification session per user on the page
+        ranked_sessions = select(
+            VerificationSession.user_id,
+            VerificationSession.status,
+            func.row_number().over(
+                partition_by=VerificationSession.user_id,
+                order_by=(desc(VerificationSession.created_at), desc(VerificationSession.id))
+            ).label("rn")
+        ).where(VerificationSession.user_id.in_(select(page.c.id))).subquery()
+        
+        rows = (await db.execute(
+            select(page, Account.account_number, ranked_sessions.c.status)
+            .outerjoin(Account, Account.user_id == page.c.id)
+            .outerjoin(ranked_sessions, and_(ranked_sessions.c.user_id == page.c.id, ranked_sessions.c.rn == 1))
+            .order_by(page.c.id)
+        )).all()
+        
+        user_list = [
+            UserInfo(
+                id=row.id,
+                name=row.name,
+                email=row.email,
+                phone=row.phone,
+                created_at=row.created_at,
+                account_number=row.account_number,
+                verification_status=row.status.value if row.status else "not_started"
             )
-            
-            user_list.append(user_info)
+            for row in rows
+        ]
+        
+        if len(user_list) == limit:
+            response.headers["X-Next-After-Id"] = str(user_list[-1].id)
         
         return user_list
     
@@ -97,7 +119,7 @@ async def get_audit_logs(
     limit: int = Query(100, ge=1, le=1000),
     user_id: Optional[int] = None,
     event_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get audit logs with optional filtering.
@@ -105,17 +127,17 @@ async def get_audit_logs(
     For compliance and security monitoring.
     """
     try:
-        query = db.query(AuditLog)
+        query = select(AuditLog)
         
         # Apply filters
         if user_id:
-            query = query.filter(AuditLog.user_id == user_id)
+            query = query.where(AuditLog.user_id == user_id)
         
         if event_type:
-            query = query.filter(AuditLog.event_type == event_type)
+            query = query.where(AuditLog.event_type == event_type)
         
         # Order by most recent
-        logs = query.order_by(desc(AuditLog.created_at)).offset(skip).limit(limit).all()
+        logs = (await db.scalars(query.order_by(desc(AuditLog.created_at)).offset(skip).limit(limit))).all()
         
         log_entries = [
             AuditLogEntry(
@@ -140,56 +162,17 @@ async def get_audit_logs(
 
 @router.get("/stats", response_model=SystemStats)
 async def get_system_stats(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get system statistics for dashboard.
     
     Provides overview of system usage and verification status.
+    Answered from the daily_stats rollups (see services/stats_service.py),
+    cached for STATS_CACHE_TTL_SECONDS.
     """
     try:
-        # Calculate date for "today"
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        # Total users
-        total_users = db.query(func.count(User.id)).scalar()
-        
-        # Total accounts
-        total_accounts = db.query(func.count(Account.id)).scalar()
-        
-        # Verification statistics
-        pending_verifications = db.query(func.count(VerificationSession.id)).filter(
-            VerificationSession.status.in_([VerificationStatus.PENDING, VerificationStatus.IN_PROGRESS])
-        ).scalar()
-        
-        completed_verifications = db.query(func.count(VerificationSession.id)).filter(
-            VerificationSession.status == VerificationStatus.COMPLETED
-        ).scalar()
-        
-        failed_verifications = db.query(func.count(VerificationSession.id)).filter(
-            VerificationSession.status == VerificationStatus.FAILED
-        ).scalar()
-        
-        # Today's registrations
-        today_registrations = db.query(func.count(User.id)).filter(
-            User.created_at >= today_start
-        ).scalar()
-        
-        # Today's completions
-        today_completions = db.query(func.count(VerificationSession.id)).filter(
-            VerificationSession.status == VerificationStatus.COMPLETED,
-            VerificationSession.completed_at >= today_start
-        ).scalar()
-        
-        return SystemStats(
-            total_users=total_users,
-            total_accounts=total_accounts,
-            pending_verifications=pending_verifications,
-            completed_verifications=completed_verifications,
-            failed_verifications=failed_verifications,
-            today_registrations=today_registrations,
-            today_completions=today_completions
-        )
+        return SystemStats(**await db.run_sync(stats_service.dashboard))
     
     except Exception as e:
         raise HTTPException(
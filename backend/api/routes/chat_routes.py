@@ -425,25 +425,40 @@
 
 
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, timedelta
+import asyncio
+import json
 import uuid
 import re
 import httpx 
-import shutil
 import os
 import logging
 from pathlib import Path
 
 # Service imports
-from services.ocr_service import tesseract_ocr_service
+from services.ocr_pipeline import ocr_pipeline
+from services.worker_pool import WorkerPoolError
+from services.upload_sink import upload_sink, StoredUpload, UploadError
+from services.job_queue import job_queue
+from services.kyc_jobs import CNIC_JOB
+from services.progress_bus import progress_bus
+from services.session_resolver import session_resolver
+from services.stats_service import stats_service, USERS_REGISTERED, ACCOUNTS_CREATED
+from services.chat_writer import chat_writer
+from services.conversation_memory import conversation_memory
+from services.chat_slot_store import chat_slot_store
 
 
 # Database imports
-from database import get_db, User, VerificationSession, VerificationStatus, AuditLog, ChatMessage, Account, CNICData, BiometricData
+from database.database import AsyncSessionLocal
+from database import get_async_db, User, VerificationSession, VerificationStatus, AuditLog, ChatMessage, Account, CNICData, BiometricData, JobStatus
 from security import jwt_handler, audit_logger
 from config import settings
 
@@ -476,42 +491,14 @@ class VerificationLinkResponse(BaseModel):
 
 # --- LLM Integration with Strict Instructions ---
 
-async def call_llm_api(prompt: str, history: List[dict] = None):
+async def call_llm_api(prompt: str, history: List[dict] = None, slots: Dict[str, str] = None):
     headers = {
         "Authorization": f"Bearer {settings.GROQ_API_KEY}",
         "Content-Type": "application/json"
     }
     
-    # System Prompt jo LLM ko control karega
-    system_prompt = f"""
-    You are the {settings.APP_NAME} Assistant. Your ONLY mission is to help users open a bank account by collecting:
-    1. Full Name
-    2. Email Address
-    3. Phone Number (starting with +92)
-    4. Account Type (Savings, Current, or Credit)
-
-    PROCESS EXPLANATION:
-    Tell the user that after providing these details, they will need to complete eKYC which includes:
-    - CNIC Capture (Front & Back)
-    - Real-time Face Verification
-    - Fingerprint Scanning
-
-    RULES:
-    - Be professional and helpful.
-    - If any info (Name, Email, Phone, Account Type) is missing, ask for it politely.
-    - Check the conversation history to see what info you already have. DO NOT ASK FOR INFO ALREADY GIVEN.
-    - ONCE YOU HAVE ALL FOUR (Name, Email, Phone, Account Type), you MUST end your response with this EXACT tag for our system to process:
-      [DATA_COLLECTED] Name: {{name}}, Email: {{email}}, Phone: {{phone}}, Account Type: {{account_type}}
-    """
-
-    messages = [{"role": "system", "content": system_prompt}]
-    
-    # Add history if available
-    if history:
-        messages.extend(history)
-    
-    # Add current user message
-    messages.append({"role": "user", "content": prompt})
+    # Cached system prompt + recent turns within the token budget (older turns summarised as slots)
+    messages = conversation_memory.build_messages(prompt, history, slots)
 
     payload = {
         "model": settings.GROQ_MODEL,
@@ -542,28 +529,64 @@ async def call_llm_api(prompt: str, history: List[dict] = None):
 
 # --- Smart Webhook Endpoint ---
 
+async def _persist_chat(db: AsyncSession, messages: List[dict], sid: Optional[str], wrote: bool):
+    """
+    Commit a webhook call's writes together with its chat messages.
+
+    Without group commit the messages join the request transaction and the
+    whole call is one commit. With group commit the request's other writes
+    (if any) are committed first and the messages go to the shared batch
+    writer, which commits them with concurrent requests' messages.
+
+    Args:
+        db: Request database session
+        messages: ChatMessage column values, in conversation order
+        sid: Chat session id (its cached user link is dropped if the commit fails)
+        wrote: Whether the request transaction holds other writes
+    """
+    try:
+        if chat_writer.enabled:
+            if wrote:
+                await db.commit()
+            await chat_writer.write(messages)
+        else:
+            db.add_all(ChatMessage(**message) for message in messages)
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        if sid:
+            session_resolver.invalidate(sid)
+        raise
+
+
 @router.post("/webhook")
-async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_llm(payload: ChatRequest, db: AsyncSession = Depends(get_async_db)):
     user_msg = payload.message
     uid = payload.user_id
     sid = payload.session_id
+    received_at = datetime.utcnow()
+    memory_key = chat_slot_store.conversation_key(uid, sid)
 
     # Detect reset commands
     reset_keywords = ['new chat', 'start over', 'restart', 'begin again', 'fresh start', 'reset']
     if any(keyword in user_msg.lower() for keyword in reset_keywords):
         # Clear chat history for this session
         if sid:
-            db.query(ChatMessage).filter(ChatMessage.session_id == sid).delete()
-            db.commit()
-            logger.info(f"Chat history cleared for session: {sid}")
+            await db.execute(delete(ChatMessage).where(ChatMessage.session_id == sid))
+            await db.run_sync(chat_slot_store.clear, {memory_key, chat_slot_store.conversation_key(None, sid)})
+            await db.run_sync(session_resolver.unlink, sid, commit=False)
         
         # Return fresh start message
         welcome_msg = "Of course! Let's start fresh.\n\nHello! Welcome to Avanza Solutions. I'm your digital assistant, and I can help you open a new bank account in just a few minutes.\n\nTo get started, please tell me your full name."
         
-        # Save the reset request and welcome message
-        db.add(ChatMessage(user_id=uid, session_id=sid, sender="user", message=user_msg))
-        db.add(ChatMessage(user_id=uid, session_id=sid, sender="bot", message=welcome_msg))
-        db.commit()
+        # Save the reset request and welcome message (same commit as the clear)
+        await _persist_chat(db, [
+            dict(user_id=uid, session_id=sid, sender="user", message=user_msg, timestamp=received_at),
+            dict(user_id=uid, session_id=sid, sender="bot", message=welcome_msg, timestamp=datetime.utcnow())
+        ], sid, wrote=bool(sid))
+        if sid:
+            await session_resolver.announce_change(sid)
+            logger.info(f"Chat history cleared for session: {sid}")
         
         return {
             "success": True,
@@ -571,24 +594,35 @@ async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
             "action": "reset_session"
         }
 
-    # 1. Fetch History (Last 15 messages)
+    # 1. Fetch History (most recent messages, oldest first)
     history_entries = []
-    if uid or sid:
+    stored_slots = {}
+    unfetched_slots = None
+    if memory_key:
         filter_query = (ChatMessage.user_id == uid) if uid else (ChatMessage.session_id == sid)
-        history_msgs = db.query(ChatMessage).filter(filter_query).order_by(ChatMessage.timestamp.asc()).limit(15).all()
-        for h in history_msgs:
+        history_msgs = (await db.scalars(
+            select(ChatMessage).where(filter_query)
+            .order_by(ChatMessage.timestamp.desc()).limit(settings.CHAT_MEMORY_FETCH_MESSAGES)
+        )).all()
+        for h in reversed(history_msgs):
             role = "user" if h.sender == "user" else "assistant"
             history_entries.append({"role": role, "content": h.message})
 
-    # 2. Save User Message
-    db.add(ChatMessage(user_id=uid, session_id=sid, sender="user", message=user_msg))
-    db.commit()
+        # Details collected so far (kept up to date as turns are saved, one row per conversation)
+        stored_slots = await db.run_sync(chat_slot_store.load, memory_key)
+        if len(history_msgs) == settings.CHAT_MEMORY_FETCH_MESSAGES:
+            # Older turns were not fetched; the stored slots stand in for them
+            unfetched_slots = stored_slots
 
-    # 3. Get Bot Reply with Context
-    bot_reply = await call_llm_api(user_msg, history=history_entries)
+    # Don't hold a pooled connection while waiting on the LLM
+    await db.close()
 
-    # 4. Check for Data Collection Tag [DATA_COLLECTED]
+    # 2. Get Bot Reply with Context (the user message is saved with the reply)
+    bot_reply = await call_llm_api(user_msg, history=history_entries, slots=unfetched_slots)
+
+    # 3. Check for Data Collection Tag [DATA_COLLECTED]
     verification_link = None
+    wrote = False
     
     if "[DATA_COLLECTED]" in bot_reply:
         try:
@@ -604,23 +638,23 @@ async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
                 phone = phone_match.group(1).strip()
                 account_type = account_match.group(1).strip()
 
-                # Auto-Register or Get User
-                user = db.query(User).filter((User.email == email) | (User.phone == phone)).first()
+                # Auto-Register or Get User (flushed, committed with the chat messages)
+                user = await db.scalar(select(User).where((User.email == email) | (User.phone == phone)))
                 if not user:
                     user = User(name=name, email=email, phone=phone)
                     db.add(user)
-                    db.commit()
-                    db.refresh(user)
+                    await db.run_sync(stats_service.increment, USERS_REGISTERED)
+                    await db.flush()
                 
                 # Check/Create Account
-                account = db.query(Account).filter(Account.user_id == user.id).first()
+                account = await db.scalar(select(Account).where(Account.user_id == user.id))
                 if not account:
                     # Generate random account number for demo
                     import random
                     acc_num = f"PK{random.randint(1000000000, 9999999999)}"
                     account = Account(user_id=user.id, account_number=acc_num, account_type=account_type)
                     db.add(account)
-                    db.commit()
+                    await db.run_sync(stats_service.increment, ACCOUNTS_CREATED)
                 
                 uid = user.id
                 
@@ -637,7 +671,9 @@ async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
                     expires_at=expires_at
                 )
                 db.add(session)
-                db.commit()
+                await db.run_sync(stats_service.record_transition, None, VerificationStatus.PENDING)
+                await db.flush()
+                wrote = True
 
                 verification_link = f"{settings.FRONTEND_URL}/verify/{token}"
                 
@@ -646,10 +682,33 @@ async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
             
         except Exception as e:
             logger.error(f"Extraction/Link Error: {e}")
-
-    # 5. Save Bot Reply
-    db.add(ChatMessage(user_id=uid, session_id=sid, sender="bot", message=bot_reply))
-    db.commit()
+            await db.rollback()
+            uid = payload.user_id
+            verification_link = None
+            wrote = False
+
+    # Fold this message into the conversation's slots (the last reply gives its question
+    # context); with nothing stored yet, e.g. a conversation older than the slot table,
+    # the fetched history seeds them
+    if memory_key:
+        turns = history_entries[-1:] if stored_slots else history_entries
+        slots = conversation_memory.extract_slots(turns + [{"role": "user", "content": user_msg}], stored_slots)
+        if slots != stored_slots:
+            await db.run_sync(chat_slot_store.save, memory_key, slots)
+            wrote = True
+
+    # Later verification steps resolve the user from the session id
+    if uid and sid:
+        wrote |= await db.run_sync(session_resolver.link, sid, uid, commit=False)
+
+    # 4. Save User Message and Bot Reply (single commit with the writes above)
+    await _persist_chat(db, [
+        dict(user_id=uid, session_id=sid, sender="user", message=user_msg, timestamp=received_at),
+        dict(user_id=uid, session_id=sid, sender="bot", message=bot_reply, timestamp=datetime.utcnow())
+    ], sid, wrote)
+    if verification_link and sid:
+        # The session now belongs to the registered user
+        await session_resolver.announce_change(sid)
 
     # ✅ UPDATED: Return verification_link separately
     response_data = {
@@ -664,25 +723,26 @@ async def chat_with_llm(payload: ChatRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/register", response_model=dict)
-async def register_user(user_data: UserRegistrationRequest, db: Session = Depends(get_db)):
+async def register_user(user_data: UserRegistrationRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        existing_user = db.query(User).filter((User.email == user_data.email) | (User.phone == user_data.phone)).first()
+        existing_user = await db.scalar(select(User).where((User.email == user_data.email) | (User.phone == user_data.phone)))
         if existing_user:
             return {"success": True, "message": "User already registered", "user_id": existing_user.id, "existing": True}
 
         new_user = User(name=user_data.name, email=user_data.email, phone=user_data.phone)
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.run_sync(stats_service.increment, USERS_REGISTERED)
+        await db.commit()
+        await db.refresh(new_user)
         audit_logger.log_user_registered(new_user.id, user_data.email, user_data.phone)
         return {"success": True, "user_id": new_user.id, "existing": False}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate-link", response_model=VerificationLinkResponse)
-async def generate_verification_link(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def generate_verification_link(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user: 
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -698,7 +758,8 @@ async def generate_verification_link(user_id: int, db: Session = Depends(get_db)
         expires_at=expires_at
     )
     db.add(session)
-    db.commit()
+    await db.run_sync(stats_service.record_transition, None, VerificationStatus.PENDING)
+    await db.commit()
     
     return VerificationLinkResponse(
         success=True, 
@@ -712,12 +773,9 @@ async def generate_verification_link(user_id: int, db: Session = Depends(get_db)
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-def save_upload_file(upload_file: UploadFile, filename: str) -> str:
-    """Save uploaded file to disk."""
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    return file_path
+async def save_upload_file(upload_file: UploadFile, filename: str, kind: str = "image") -> StoredUpload:
+    """Stream uploaded file to disk (size/type limits enforced, SHA-256 computed)."""
+    return await upload_sink.save(upload_file, filename, kind=kind)
 
 
 # --- CNIC Upload Endpoint (FIXED) ---
@@ -727,11 +785,13 @@ async def submit_cnic(
     session_id: str = Form(...),
     cnic_front: UploadFile = File(...), 
     cnic_back: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload CNIC front and back images.
-    Extracts data using OCR and saves to database.
+    OCR, face extraction, validation and storage run as a background job;
+    poll /api/chat/status/{session_id} for progress.
     """
     try:
         logger.info("=" * 60)
@@ -741,98 +801,68 @@ async def submit_cnic(
         logger.info(f"Back: {cnic_back.filename}")
         logger.info("=" * 60)
         
-        # Find user by session_id
-        # First try: VerificationSession
-        verification_session = db.query(VerificationSession).filter(
-            VerificationSession.session_id == session_id
-        ).first()
+        # Find user by session_id (chat session link or VerificationSession)
+        user_id = await db.run_sync(session_resolver.resolve, session_id, use_cache=False)
         
-        if verification_session:
-            user_id = verification_session.user_id
-            logger.info(f"Found user via VerificationSession: {user_id}")
-        else:
-            # Fallback: ChatMessage session
-            last_msg = db.query(ChatMessage).filter(
-                ChatMessage.session_id == session_id,
-                ChatMessage.user_id != None
-            ).order_by(ChatMessage.timestamp.desc()).first()
-            
-            if not last_msg:
-                logger.error("User session not found")
-                raise HTTPException(status_code=400, detail="User session not found")
-            
-            user_id = last_msg.user_id
-            logger.info(f"Found user via ChatMessage: {user_id}")
+        if user_id is None:
+            logger.error("User session not found")
+            raise HTTPException(status_code=400, detail="User session not found")
+        logger.info(f"Found user for session: {user_id}")
 
         # Save files
-        front_path = save_upload_file(cnic_front, f"{session_id}_cnic_front.jpg")
-        back_path = save_upload_file(cnic_back, f"{session_id}_cnic_back.jpg")
+        front_upload, front_normalized = await upload_sink.save_image(cnic_front, f"{session_id}_cnic_front.jpg", "cnic")
+        back_upload, back_normalized = await upload_sink.save_image(cnic_back, f"{session_id}_cnic_back.jpg", "cnic")
+        front_path, back_path = front_upload.path, back_upload.path
         
         logger.info(f"Files saved: {front_path}, {back_path}")
         
-        # Extract CNIC data using OCR
-        logger.info("Starting OCR extraction...")
-        cnic_extracted = {}
-        
-        try:
-            cnic_extracted = tesseract_ocr_service.extract_cnic_data(
-                front_path,
-                back_path
-            )
-            logger.info(f"OCR Results: {cnic_extracted}")
-        except Exception as ocr_err:
-            logger.error(f"OCR failed: {ocr_err}")
-            # Continue without OCR data
-            cnic_extracted = {
-                'cnic_number': None,
-                'name': None,
-                'father_name': None,
-                'dob': None,
-                'gender': None,
-                'address': None
-            }
-        
-        # Update/Create CNIC Data in database
-        cnic_data = db.query(CNICData).filter(CNICData.user_id == user_id).first()
-        
-        # Helper to get value or default
-        def get_val(val): return val if val else "Not Detected"
-
-        cnic_num = get_val(cnic_extracted.get('cnic_number'))
-        name_val = get_val(cnic_extracted.get('name'))
-        father_val = get_val(cnic_extracted.get('father_name'))
-        
-        if not cnic_data:
-            logger.info("Creating new CNICData record")
-            cnic_data = CNICData(
-                user_id=user_id,
-                encrypted_cnic_number=cnic_num,  # Storing plain text as requested by user
-                encrypted_name=name_val,  # Storing plain text
-                encrypted_father_name=father_val,  # Storing plain text
-                encrypted_front_image_path=front_path,  # Storing plain text
-                encrypted_back_image_path=back_path  # Storing plain text
+        # Queue OCR -> face extraction -> validation -> save. Resubmitting the same
+        # images for the same session (or the same Idempotency-Key) returns the same job.
+        job = await db.run_sync(
+            job_queue.enqueue,
+            CNIC_JOB,
+            payload={
+                "user_id": user_id,
+                "session_id": session_id,
+                "front_path": front_path,
+                "back_path": back_path,
+                "front_ocr_path": front_normalized.path,
+                "back_ocr_path": back_normalized.path,
+                "front_digest": front_normalized.sha256,
+                "back_digest": back_normalized.sha256,
+                "face_output_path": os.path.join(UPLOAD_DIR, f"{session_id}_cnic_face.jpg"),
+                "engines": [ocr_pipeline.TESSERACT]
+            },
+            session_id=session_id,
+            user_id=user_id,
+            idempotency_key=(
+                f"{CNIC_JOB}:{idempotency_key}" if idempotency_key
+                else f"{CNIC_JOB}:{session_id}:{front_upload.sha256}:{back_upload.sha256}"
             )
-            db.add(cnic_data)
-        else:
-            logger.info("Updating existing CNICData record")
-            cnic_data.encrypted_cnic_number = cnic_num
-            cnic_data.encrypted_name = name_val
-            cnic_data.encrypted_father_name = father_val
-            cnic_data.encrypted_front_image_path = front_path
-            cnic_data.encrypted_back_image_path = back_path
-        
-        db.commit()
-        logger.info("CNIC data saved successfully!")
+        )
+        logger.info(f"CNIC job {job.id} queued ({job.status.value})")
         
         return {
             "status": "success",
-            "message": "CNIC uploaded and being processed"
+            "message": "CNIC uploaded and being processed",
+            "job_id": job.id,
+            "job_status": job.status.value
         }
         
     except HTTPException as he:
         logger.error(f"HTTP Exception: {he.detail}")
-        db.rollback()
+        await db.rollback()
         raise he
+    
+    except WorkerPoolError as pool_err:
+        logger.warning(f"CNIC upload rejected by worker pool: {pool_err}")
+        await db.rollback()
+        raise
+    
+    except UploadError as upload_err:
+        logger.warning(f"CNIC upload rejected: {upload_err}")
+        await db.rollback()
+        raise
         
     except Exception as e:
         logger.error("=" * 60)
@@ -840,7 +870,7 @@ async def submit_cnic(
         logger.error(f"Error: {str(e)}")
         logger.error("=" * 60)
         logger.exception("Full traceback:")
-        db.rollback()
+        await db.rollback()
         
         raise HTTPException(
             status_code=500,
@@ -855,31 +885,26 @@ async def submit_face(
     session_id: str = Form(...),
     selfie: UploadFile = File(...),
     liveness_video: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload selfie and optional liveness video."""
     try:
         logger.info(f"Face upload for session: {session_id}")
         
         # Find user
-        last_msg = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id,
-            ChatMessage.user_id != None
-        ).order_by(ChatMessage.timestamp.desc()).first()
+        user_id = await db.run_sync(session_resolver.resolve, session_id, use_cache=False)
         
-        if not last_msg:
+        if user_id is None:
             raise HTTPException(status_code=400, detail="User session not found")
-        
-        user_id = last_msg.user_id
 
         # Save files
-        selfie_path = save_upload_file(selfie, f"{session_id}_selfie.jpg")
+        selfie_path = (await save_upload_file(selfie, f"{session_id}_selfie.jpg")).path
         video_path = None
         if liveness_video:
-            video_path = save_upload_file(liveness_video, f"{session_id}_liveness.webm")
+            video_path = (await save_upload_file(liveness_video, f"{session_id}_liveness.webm", kind="video")).path
 
         # Update/Create Biometric Data
-        bio_data = db.query(BiometricData).filter(BiometricData.user_id == user_id).first()
+        bio_data = await db.scalar(select(BiometricData).where(BiometricData.user_id == user_id))
         
         if not bio_data:
             bio_data = BiometricData(
@@ -898,14 +923,18 @@ async def submit_face(
             if video_path:
                 bio_data.encrypted_liveness_video_path = video_path # Plain text
         
-        db.commit()
+        await db.commit()
         logger.info("Face data saved successfully")
+        await progress_bus.publish(session_id, {"type": "step", "step": "face", "state": "done"})
         
         return {"status": "success", "message": "Face data uploaded"}
         
+    except UploadError:
+        await db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Face upload error: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -915,29 +944,24 @@ async def submit_face(
 async def submit_fingerprint(
     session_id: str = Form(...),
     fingerprint_image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit fingerprint image captured via camera."""
     try:
         logger.info(f"Fingerprint submission for session: {session_id}")
         
         # Find user
-        last_msg = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id,
-            ChatMessage.user_id != None
-        ).order_by(ChatMessage.timestamp.desc()).first()
+        user_id = await db.run_sync(session_resolver.resolve, session_id, use_cache=False)
         
-        if not last_msg:
+        if user_id is None:
             raise HTTPException(status_code=400, detail="User session not found")
         
-        user_id = last_msg.user_id
-        
         # Save fingerprint image
-        fp_path = save_upload_file(fingerprint_image, f"{session_id}_fingerprint.jpg")
+        fp_path = (await save_upload_file(fingerprint_image, f"{session_id}_fingerprint.jpg")).path
         logger.info(f"Fingerprint image saved: {fp_path}")
         
         # Update biometric data
-        bio_data = db.query(BiometricData).filter(BiometricData.user_id == user_id).first()
+        bio_data = await db.scalar(select(BiometricData).where(BiometricData.user_id == user_id))
         
         if not bio_data:
             bio_data = BiometricData(
@@ -950,43 +974,133 @@ async def submit_fingerprint(
             bio_data.fingerprint_verified = True
             bio_data.encrypted_fingerprint_data = fp_path  # Plain text path
         
-        db.commit()
+        await db.commit()
         logger.info("Fingerprint saved successfully")
+        await progress_bus.publish(session_id, {"type": "step", "step": "fingerprint", "state": "done"})
         
         return {"status": "success", "message": "Fingerprint captured"}
         
+    except UploadError:
+        await db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Fingerprint error: {e}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 
 
 # --- Status Check Endpoint ---
 
-@router.get("/status/{session_id}")
-async def check_status(session_id: str, db: Session = Depends(get_db)):
-    """Check verification status."""
+def session_status(db: Session, session_id: str) -> Optional[dict]:
+    """Verification status and background job progress for a session (None if unknown)."""
     session = db.query(VerificationSession).filter(
         VerificationSession.session_id == session_id
     ).first()
+    jobs = job_queue.jobs_for_session(db, session_id)
     
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    if not session and not jobs:
+        return None
     
+    latest_cnic_job = next((job for job in jobs if job.job_type == CNIC_JOB), None)
     return {
-        "status": session.status.value,
+        "status": session.status.value if session else "in_progress",
         "steps_completed": {
-            "cnic": session.cnic_uploaded,
-            "face": session.face_match_completed
-        }
+            "cnic": session.cnic_uploaded if session else (
+                latest_cnic_job is not None and latest_cnic_job.status == JobStatus.SUCCEEDED
+            ),
+            "face": session.face_match_completed if session else False
+        },
+        "jobs": [job_queue.describe(job) for job in jobs]
     }
 
 
+@router.get("/status/{session_id}")
+async def check_status(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Check verification status and per-step progress of the session's background jobs."""
+    snapshot = await db.run_sync(session_status, session_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return snapshot
+
+
+# --- Progress Push Endpoints ---
+
+@router.get("/events/{session_id}")
+async def stream_status(session_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-Sent Events stream of a session's progress.
+    Sends the current status once ("status" event), then step transitions
+    ("progress" events) as they happen, with keep-alive comments in between.
+    """
+    snapshot = await db.run_sync(session_status, session_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    async def event_stream():
+        async with progress_bus.subscribe(session_id) as events:
+            yield f"event: status\ndata: {json.dumps(snapshot)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=settings.PROGRESS_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/{session_id}")
+async def progress_socket(websocket: WebSocket, session_id: str):
+    """WebSocket variant of /events: a {"type": "snapshot"} message, then progress events."""
+    async with AsyncSessionLocal() as db:
+        snapshot = await db.run_sync(session_status, session_id)
+    
+    if snapshot is None:
+        await websocket.close(code=4404, reason="Session not found")
+        return
+    
+    async def wait_for_disconnect():
+        # Client messages are not used; reading them is how a disconnect is noticed
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+    
+    await websocket.accept()
+    async with progress_bus.subscribe(session_id) as events:
+        receiver = asyncio.create_task(wait_for_disconnect())
+        try:
+            await websocket.send_json({"type": "snapshot", **snapshot})
+            while not receiver.done():
+                getter = asyncio.ensure_future(events.get())
+                await asyncio.wait(
+                    {getter, receiver},
+                    timeout=settings.PROGRESS_STREAM_KEEPALIVE_SECONDS,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter.done():
+                    await websocket.send_json(getter.result())
+                else:
+                    getter.cancel()
+                    if not receiver.done():
+                        await websocket.send_json({"type": "ping"})
+        except (WebSocketDisconnect, RuntimeError):
+            pass
+        finally:
+            receiver.cancel()
+
+
 # --- Get Collected Data Endpoint (for final confirmation) ---
 
 @router.get("/get-collected-data")
-async def get_collected_data(session_id: str, db: Session = Depends(get_db)):
+async def get_collected_data(session_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Fetch all collected user data after fingerprint capture.
     Returns name, father name, DOB, CNIC, email, phone, account type.
@@ -995,26 +1109,21 @@ async def get_collected_data(session_id: str, db: Session = Depends(get_db)):
         logger.info(f"Fetching collected data for session: {session_id}")
         
         # Find user by session_id
-        last_msg = db.query(ChatMessage).filter(
-            ChatMessage.session_id == session_id,
-            ChatMessage.user_id != None
-        ).order_by(ChatMessage.timestamp.desc()).first()
+        user_id = await db.run_sync(session_resolver.resolve, session_id)
         
-        if not last_msg:
+        if user_id is None:
             raise HTTPException(status_code=400, detail="User session not found")
         
-        user_id = last_msg.user_id
-        
         # Fetch user data
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
         # Fetch CNIC data
-        cnic_data = db.query(CNICData).filter(CNICData.user_id == user_id).first()
+        cnic_data = await db.scalar(select(CNICData).where(CNICData.user_id == user_id))
         
         # Fetch account data
-        account = db.query(Account).filter(Account.user_id == user_id).first()
+        account = await db.scalar(select(Account).where(Account.user_id == user_id))
         
         # Helper function
         def safe_val(val):
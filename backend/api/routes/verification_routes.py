@@ -2,19 +2,23 @@
 Verification API routes for document upload and biometric verification.
 """
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 import os
-import shutil
 import uuid
 
-from database import get_db, User, VerificationSession, CNICData, BiometricData, Account, VerificationStatus
+from database import get_async_db, User, VerificationSession, CNICData, BiometricData, Account, VerificationStatus
 from security import jwt_handler, audit_logger
-from services.cv import face_match_service, didit_liveness_service
-from services.ocr_service import tesseract_ocr_service
-from services.ocrspace_service import ocrspace_service
+from services import cv_jobs
+from services.cv import didit_liveness_service
+from services.ocr_pipeline import ocr_pipeline
+from services.worker_pool import cv_worker_pool, WorkerPoolError
+from services.upload_sink import upload_sink, UploadError
+from services.progress_bus import progress_bus
+from services.stats_service import stats_service, ACCOUNTS_CREATED
 from services.validation import cnic_validator
 from config import settings
 
@@ -70,7 +74,7 @@ class VerificationFinalizeResponse(BaseModel):
 @router.post("/validate-token", response_model=TokenValidationResponse)
 async def validate_token(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Validate JWT token from verification link."""
     try:
@@ -94,9 +98,9 @@ async def validate_token(
         
         # Get session
         session_id = payload.get("session_id")
-        session = db.query(VerificationSession).filter(
+        session = await db.scalar(select(VerificationSession).where(
             VerificationSession.session_id == session_id
-        ).first()
+        ))
         
         if not session:
             return TokenValidationResponse(
@@ -105,10 +109,18 @@ async def validate_token(
                 message="Session not found"
             )
         
-        # Update session status
-        if session.status == VerificationStatus.PENDING:
-            session.status = VerificationStatus.IN_PROGRESS
-            db.commit()
+        # Update session status (conditional so concurrent validations count the transition once)
+        started = (await db.execute(
+            update(VerificationSession)
+            .where(
+                VerificationSession.id == session.id,
+                VerificationSession.status == VerificationStatus.PENDING
+            )
+            .values(status=VerificationStatus.IN_PROGRESS)
+        )).rowcount
+        if started:
+            await db.run_sync(stats_service.record_transition, VerificationStatus.PENDING, VerificationStatus.IN_PROGRESS)
+            await db.commit()
             
             audit_logger.log_verification_started(
                 payload.get("user_id"),
@@ -135,7 +147,7 @@ async def upload_cnic(
     token: str = Form(...),
     front_image: UploadFile = File(...),
     back_image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload and process CNIC front and back images."""
     try:
@@ -150,32 +162,25 @@ async def upload_cnic(
         user_id = payload.get("user_id")
         session_id = payload.get("session_id")
         
-        # Save uploaded files
-        front_path = os.path.join(UPLOAD_DIR, f"{session_id}_cnic_front.jpg")
-        back_path = os.path.join(UPLOAD_DIR, f"{session_id}_cnic_back.jpg")
-        
-        with open(front_path, "wb") as buffer:
-            shutil.copyfileobj(front_image.file, buffer)
-        
-        with open(back_path, "wb") as buffer:
-            shutil.copyfileobj(back_image.file, buffer)
+        # Save uploaded files (streamed, size/type checked) plus normalized copies for OCR
+        front_upload, front_normalized = await upload_sink.save_image(front_image, f"{session_id}_cnic_front.jpg", "cnic")
+        back_upload, back_normalized = await upload_sink.save_image(back_image, f"{session_id}_cnic_back.jpg", "cnic")
+        front_path, back_path = front_upload.path, back_upload.path
         
         # Log upload
         audit_logger.log_cnic_uploaded(user_id, session_id)
         
-        # Extract CNIC data using DUAL OCR approach (OCR.space + Tesseract)
+        # Extract CNIC data using DUAL OCR approach (OCR.space + Tesseract).
+        # Both engines and both sides run concurrently and are merged for best accuracy.
+        # The CNIC face is cropped for later matching from the same decoded front image.
         print("Extracting CNIC data using dual OCR approach...")
-        
-        # Try OCR.space API first
-        ocrspace_data = ocrspace_service.extract_cnic_data(front_path, back_path)
-        print(f"OCR.space extracted: {ocrspace_data}")
-        
-        # Always run Tesseract as well
-        tesseract_data = tesseract_ocr_service.extract_cnic_data(front_path, back_path)
-        print(f"Tesseract extracted: {tesseract_data}")
-        
-        # Merge results for best accuracy
-        extracted_data = ocrspace_service.merge_ocr_results(tesseract_data, ocrspace_data)
+        face_path = os.path.join(UPLOAD_DIR, f"{session_id}_cnic_face.jpg")
+        extracted_data = await ocr_pipeline.extract_cnic_data(
+            front_normalized.path,
+            back_normalized.path,
+            face_output_path=face_path,
+            image_digests={"front": front_normalized.sha256, "back": back_normalized.sha256}
+        )
         print(f"Merged OCR data: {extracted_data}")
         
         # Validate extracted data
@@ -198,10 +203,6 @@ async def upload_cnic(
             if field in extracted_data and extracted_data[field]:
                 encrypted_data[f'encrypted_{field}'] = extracted_data[field]
         
-        # Extract face from CNIC for later matching
-        face_path = os.path.join(UPLOAD_DIR, f"{session_id}_cnic_face.jpg")
-        face_match_service.extract_face_from_cnic(front_path, face_path)
-        
         # Validate required fields for database (cannot be null)
         if not encrypted_data.get('encrypted_cnic_number') or not encrypted_data.get('encrypted_name'):
             # Log failure but return success:True with errors so frontend can show them
@@ -214,7 +215,7 @@ async def upload_cnic(
             )
 
         # Save to database
-        cnic_record = db.query(CNICData).filter(CNICData.user_id == user_id).first()
+        cnic_record = await db.scalar(select(CNICData).where(CNICData.user_id == user_id))
         
         if cnic_record:
             # Update existing
@@ -235,15 +236,16 @@ async def upload_cnic(
             db.add(cnic_record)
         
         # Update session
-        session = db.query(VerificationSession).filter(
+        session = await db.scalar(select(VerificationSession).where(
             VerificationSession.session_id == session_id
-        ).first()
+        ))
         
         if session:
             session.cnic_uploaded = True
             session.ocr_completed = is_valid
         
-        db.commit()
+        await db.commit()
+        await progress_bus.publish(session_id, {"type": "step", "step": "ocr", "state": "done", "passed": is_valid})
         
         return CNICUploadResponse(
             success=True,
@@ -252,10 +254,10 @@ async def upload_cnic(
             validation_errors=validation_errors if not is_valid else None
         )
     
-    except HTTPException:
+    except (HTTPException, WorkerPoolError, UploadError):
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         import traceback
         error_detail = f"CNIC upload failed: {str(e)}"
         print(f"ERROR: {error_detail}")
@@ -270,7 +272,7 @@ async def upload_cnic(
 async def upload_selfie(
     token: str,
     selfie_image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Upload selfie and perform face matching with CNIC photo."""
     try:
@@ -286,10 +288,8 @@ async def upload_selfie(
         session_id = payload.get("session_id")
         
         # Save selfie
-        selfie_path = os.path.join(UPLOAD_DIR, f"{session_id}_selfie.jpg")
-        
-        with open(selfie_path, "wb") as buffer:
-            shutil.copyfileobj(selfie_image.file, buffer)
+        selfie_upload, selfie_normalized = await upload_sink.save_image(selfie_image, f"{session_id}_selfie.jpg", "face")
+        selfie_path = selfie_upload.path
         
         # Get CNIC face
         cnic_face_path = os.path.join(UPLOAD_DIR, f"{session_id}_cnic_face.jpg")
@@ -300,9 +300,10 @@ async def upload_selfie(
                 detail="CNIC must be uploaded first"
             )
         
-        # Perform face matching
-        is_match, match_score, error_msg = face_match_service.match_faces(
-            selfie_path,
+        # Perform face matching against the CNIC embedding stored at upload
+        is_match, match_score, error_msg = await cv_worker_pool.run(
+            cv_jobs.match_selfie,
+            selfie_normalized.path,
             cnic_face_path
         )
         
@@ -310,9 +311,9 @@ async def upload_selfie(
         audit_logger.log_face_match(user_id, session_id, match_score, is_match)
         
         # Save to database
-        biometric_record = db.query(BiometricData).filter(
+        biometric_record = await db.scalar(select(BiometricData).where(
             BiometricData.user_id == user_id
-        ).first()
+        ))
         
         if biometric_record:
             biometric_record.encrypted_selfie_path = selfie_path
@@ -328,15 +329,16 @@ async def upload_selfie(
             db.add(biometric_record)
         
         # Update session
-        session = db.query(VerificationSession).filter(
+        session = await db.scalar(select(VerificationSession).where(
             VerificationSession.session_id == session_id
-        ).first()
+        ))
         
         if session:
             session.selfie_uploaded = True
             session.face_match_completed = is_match
         
-        db.commit()
+        await db.commit()
+        await progress_bus.publish(session_id, {"type": "step", "step": "face_match", "state": "done", "passed": is_match})
         
         return FaceMatchResponse(
             success=True,
@@ -345,10 +347,10 @@ async def upload_selfie(
             message="Face matched successfully" if is_match else f"Face match failed: {error_msg}"
         )
     
-    except HTTPException:
+    except (HTTPException, WorkerPoolError, UploadError):
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Selfie upload failed: {str(e)}"
@@ -359,7 +361,7 @@ async def upload_selfie(
 async def liveness_check(
     token: str,
     liveness_video: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Perform liveness detection on uploaded video."""
     try:
@@ -375,14 +377,14 @@ async def liveness_check(
         session_id = payload.get("session_id")
         
         # Save video
-        video_path = os.path.join(UPLOAD_DIR, f"{session_id}_liveness.webm")
-        
-        with open(video_path, "wb") as buffer:
-            shutil.copyfileobj(liveness_video.file, buffer)
+        video_path = (await upload_sink.save(liveness_video, f"{session_id}_liveness.webm", kind="video")).path
         
-        # Perform liveness check using DIDIT API (with MediaPipe fallback)
+        # Perform liveness check using DIDIT API, hedged with local MediaPipe analysis
         print(f"Performing liveness check with DIDIT API: {video_path}")
-        is_live, liveness_score, details = didit_liveness_service.check_liveness(video_path)
+        is_live, liveness_score, details = await didit_liveness_service.check_liveness_async(
+            video_path,
+            lambda: cv_worker_pool.run(cv_jobs.check_liveness_local, video_path)
+        )
         
         print(f"Liveness result: is_live={is_live}, score={liveness_score}, details={details}")
         
@@ -390,9 +392,9 @@ async def liveness_check(
         audit_logger.log_liveness_check(user_id, session_id, liveness_score, is_live)
         
         # Save to database
-        biometric_record = db.query(BiometricData).filter(
+        biometric_record = await db.scalar(select(BiometricData).where(
             BiometricData.user_id == user_id
-        ).first()
+        ))
         
         if biometric_record:
             biometric_record.encrypted_liveness_video_path = video_path
@@ -400,14 +402,15 @@ async def liveness_check(
             biometric_record.liveness_result = is_live
         
         # Update session
-        session = db.query(VerificationSession).filter(
+        session = await db.scalar(select(VerificationSession).where(
             VerificationSession.session_id == session_id
-        ).first()
+        ))
         
         if session:
             session.liveness_completed = is_live
         
-        db.commit()
+        await db.commit()
+        await progress_bus.publish(session_id, {"type": "step", "step": "liveness", "state": "done", "passed": is_live})
         
         return LivenessCheckResponse(
             success=True,
@@ -417,10 +420,10 @@ async def liveness_check(
             message="Liveness verified" if is_live else "Liveness check failed"
         )
     
-    except HTTPException:
+    except (HTTPException, WorkerPoolError, UploadError):
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Liveness check failed: {str(e)}"
@@ -430,7 +433,7 @@ async def liveness_check(
 @router.post("/finalize", response_model=VerificationFinalizeResponse)
 async def finalize_verification(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Finalize verification and create bank account."""
     try:
@@ -446,9 +449,9 @@ async def finalize_verification(
         session_id = payload.get("session_id")
         
         # Get session
-        session = db.query(VerificationSession).filter(
+        session = await db.scalar(select(VerificationSession).where(
             VerificationSession.session_id == session_id
-        ).first()
+        ))
         
         if not session:
             raise HTTPException(
@@ -483,12 +486,15 @@ async def finalize_verification(
         )
         
         db.add(account)
+        await db.run_sync(stats_service.increment, ACCOUNTS_CREATED)
         
         # Update session
+        await db.run_sync(stats_service.record_transition, session.status, VerificationStatus.COMPLETED)
         session.status = VerificationStatus.COMPLETED
         session.completed_at = datetime.utcnow()
         
-        db.commit()
+        await db.commit()
+        await progress_bus.publish(session_id, {"type": "status", "status": VerificationStatus.COMPLETED.value})
         
         # Log account creation
         audit_logger.log_account_created(user_id, account_number)
@@ -503,7 +509,7 @@ async def finalize_verification(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         audit_logger.log_verification_failed(
             user_id,
             session_id,
@@ -70,20 +70,77 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = ""
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    ENCRYPTION_KEY: str = ""
+    SALT: str = ""
     APP_NAME: str = "Avanza Solutions eKYC"
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     FRONTEND_URL: str = "https://e-kyc-six.vercel.app"
     ALLOWED_ORIGINS: str = "https://e-kyc-six.vercel.app"
     MAX_FILE_SIZE_MB: int = 10
+    UPLOAD_CHUNK_KB: int = 1024
+    IMAGE_NORMALIZE_ENABLED: bool = True
+    IMAGE_NORMALIZE_FORMAT: str = "jpeg"  # jpeg or webp
+    IMAGE_NORMALIZE_QUALITY: int = 90
+    IMAGE_MAX_SIDE_CNIC: int = 2000  # Tesseract works at 1600px width
+    IMAGE_MAX_SIDE_FACE: int = 1280
     FACE_MATCH_THRESHOLD: float = 0.6
+    FACE_EMBEDDING_BACKEND: str = "deepface"
+    FACE_ONNX_MODEL_PATH: str = ""
+    FACE_ONNX_THREADS: int = 1
+    FACE_SCORE_CALIBRATION_PATH: str = ""
     LIVENESS_CONFIDENCE_THRESHOLD: float = 0.7
+    LIVENESS_SAMPLE_FPS: float = 15.0
+    LIVENESS_FRAME_MAX_SIDE: int = 480
+    LIVENESS_MAX_FRAMES: int = 120
+    LIVENESS_TIME_BUDGET_SECONDS: float = 15.0
+    LIVENESS_EARLY_EXIT: bool = True
+    LIVENESS_FACE_MESH_POOL_SIZE: int = 1
     OCR_LANGUAGES: str = "en,ur"
     LOG_LEVEL: str = "INFO"
     AUDIT_LOG_PATH: str = "./logs/audit.log"
     GROQ_API_KEY: str = ""
     GROQ_API_URL: str = "https://api.groq.com/openai/v1/chat/completions"
     GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    CV_WORKER_PROCESSES: int = 2
+    CV_MAX_QUEUE_DEPTH: int = 16
+    CV_JOB_TIMEOUT_SECONDS: float = 90.0
+    PRELOAD_MODELS: str = ""
+    WARM_UP_ON_STARTUP: bool = False
+    OCR_EARLY_EXIT: bool = True
+    TESSERACT_OCR_MODE: str = "full"
+    TESSERACT_BACKEND: str = "auto"
+    TESSDATA_DIR: str = ""
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_VERSION: str = "1"
+    OCR_CACHE_MAX_ENTRIES: int = 512
+    OCR_CACHE_DIR: str = ""
+    OCR_CACHE_TTL_SECONDS: int = 86400
+    OCR_CACHE_MAX_DISK_MB: int = 256
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: float = 5.0
+    JOB_RETRY_BACKOFF_MAX_SECONDS: float = 300.0
+    JOB_LOCK_TIMEOUT_SECONDS: float = 300.0
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_EMBEDDED_WORKER: bool = True  # Run jobs inside the API process (set False when running worker.py)
+    PROGRESS_BUS_BACKEND: str = "auto"  # auto, postgres (LISTEN/NOTIFY) or local (single process)
+    PROGRESS_BUS_CHANNEL: str = "kyc_progress"
+    PROGRESS_BUS_QUEUE_SIZE: int = 64
+    PROGRESS_STREAM_KEEPALIVE_SECONDS: float = 15.0
+    SESSION_CACHE_TTL_SECONDS: float = 60.0
+    SESSION_CACHE_MAX_ENTRIES: int = 10000
+    STATS_CACHE_TTL_SECONDS: float = 10.0
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_ECHO: bool = False
+    CHAT_GROUP_COMMIT_ENABLED: bool = False
+    CHAT_GROUP_COMMIT_MAX_DELAY_MS: float = 5.0
+    CHAT_GROUP_COMMIT_MAX_BATCH: int = 200
+    CHAT_MEMORY_MAX_TOKENS: int = 1500
+    CHAT_MEMORY_FETCH_MESSAGES: int = 40
 
     class Config:
         env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
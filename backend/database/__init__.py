@@ -1,11 +1,13 @@
 """Database package initialization."""
-from .database import Base, engine, get_db, init_db
-from .models import User, VerificationSession, CNICData, BiometricData, Account, AuditLog, VerificationStatus, ChatMessage
+from .database import Base, engine, async_engine, get_db, get_async_db, init_db
+from .models import User, VerificationSession, CNICData, BiometricData, Account, AuditLog, VerificationStatus, ChatMessage, ChatSessionLink, ChatMemorySlots, DailyStat, Job, JobStatus
 
 __all__ = [
     "Base",
     "engine",
+    "async_engine",
     "get_db",
+    "get_async_db",
     "init_db",
     "User",
     "VerificationSession",
@@ -14,5 +16,10 @@ __all__ = [
     "Account",
     "AuditLog",
     "VerificationStatus",
-    "ChatMessage"
+    "ChatMessage",
+    "ChatSessionLink",
+    "ChatMemorySlots",
+    "DailyStat",
+    "Job",
+    "JobStatus"
 ]
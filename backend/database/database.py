@@ -44,34 +44,80 @@
 
 """
 Database configuration and session management.
+Routes use the async engine (asyncpg / aiosqlite) through get_async_db so a
+slow query never blocks the event loop; the sync engine remains for the job
+worker, scripts and services that already run in threads.
 """
-from sqlalchemy import create_engine
+import logging
+import os
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # Check if we are using SQLite
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
 
-# Create database engine
-if is_sqlite:
-    # SQLite fix: remove pooling and add thread safety
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
-    # Original settings for PostgreSQL/MySQL
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
-    )
-
-# Create session factory
+# Async drivers for the sync URL's dialect
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Derive the async driver URL from DATABASE_URL.
+
+    postgresql:// and postgresql+psycopg2:// become postgresql+asyncpg://,
+    sqlite:// becomes sqlite+aiosqlite://. URLs that already name an async
+    driver are returned unchanged.
+
+    Args:
+        url: Sync database URL
+
+    Returns:
+        Async database URL
+    """
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None or parsed.get_driver_name() == driver:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def _engine_options() -> dict:
+    if is_sqlite:
+        # SQLite fix: remove pooling and add thread safety
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_pre_ping": True,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS
+    }
+
+
+# Sync engine (worker, scripts, init_db)
+engine = create_engine(settings.DATABASE_URL, echo=settings.DB_ECHO, **_engine_options())
+
+# Async engine (FastAPI routes)
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    echo=settings.DB_ECHO,
+    **_engine_options()
+)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay readable after commit: async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for ORM models
 Base = declarative_base()
@@ -83,5 +129,52 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting an async database session.
+
+    Yields:
+        Async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Alembic migrations (migrations/); BASELINE_REVISION is the schema create_all() used to build
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+BASELINE_REVISION = "0001"
+MIGRATION_LOCK_ID = 7413052201  # pg_advisory_lock key
+
+
+def migration_config():
+    """Alembic config for the migrations directory (URL comes from settings via migrations/env.py)."""
+    from alembic.config import Config
+
+    config = Config()
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    return config
+
+
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    """
+    Bring the database schema up to date by running migrations to head.
+
+    Databases built by the old create_all() setup (tables but no
+    alembic_version) are stamped at the baseline first so only the later
+    migrations run. On PostgreSQL an advisory lock keeps the API and
+    worker.py from migrating at the same time.
+    """
+    from alembic import command
+
+    config = migration_config()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        if engine.dialect.name == "postgresql":
+            lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            tables = inspect(lock_conn).get_table_names()
+            if "alembic_version" not in tables and "users" in tables:
+                logger.info(f"Existing schema without migration history, stamping {BASELINE_REVISION}")
+                command.stamp(config, BASELINE_REVISION)
+            command.upgrade(config, "head")
+        finally:
+            if engine.dialect.name == "postgresql":
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
@@ -2,7 +2,7 @@
 Database models for eKYC application.
 All sensitive data is stored encrypted.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, Float, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -18,6 +18,14 @@ class VerificationStatus(str, enum.Enum):
     EXPIRED = "expired"
 
 
+class JobStatus(str, enum.Enum):
+    """Background job status enum."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class User(Base):
     """User model for storing basic user information."""
     __tablename__ = "users"
@@ -64,6 +72,19 @@ class VerificationSession(Base):
     # Relationship
     user = relationship("User", back_populates="verification_sessions")
 
+    __table_args__ = (
+        # Latest session per user (admin user list)
+        Index("ix_verification_sessions_user_created", "user_id", "created_at"),
+        # Open sessions only (pending counts, expiry sweeps); finished sessions stay out of the index
+        Index(
+            "ix_verification_sessions_active",
+            "status",
+            "expires_at",
+            postgresql_where=status.in_([VerificationStatus.PENDING, VerificationStatus.IN_PROGRESS]),
+            sqlite_where=status.in_([VerificationStatus.PENDING, VerificationStatus.IN_PROGRESS])
+        ),
+    )
+
 
 class CNICData(Base):
     """CNIC data extracted from OCR (encrypted)."""
@@ -145,7 +166,7 @@ class AuditLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     session_id = Column(String(255), nullable=True)
-    event_type = Column(String(100), nullable=False, index=True)
+    event_type = Column(String(100), nullable=False)
     event_data = Column(Text, nullable=True)  # JSON string
     ip_address = Column(String(50), nullable=True)
     user_agent = Column(String(255), nullable=True)
@@ -154,6 +175,12 @@ class AuditLog(Base):
     # Relationship
     user = relationship("User", back_populates="audit_logs")
 
+    # Audit log filters, newest first (created_at alone serves the unfiltered list)
+    __table_args__ = (
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        Index("ix_audit_logs_event_created", "event_type", "created_at"),
+    )
+
 
 class ChatMessage(Base):
     """Store chat history between user and LLM."""
@@ -161,7 +188,7 @@ class ChatMessage(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True) 
-    session_id = Column(String(255), nullable=True, index=True) # For anonymous session tracking
+    session_id = Column(String(255), nullable=True) # For anonymous session tracking
     sender = Column(String(50), nullable=False) # 'user' or 'bot'
     message = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -169,3 +196,82 @@ class ChatMessage(Base):
     # Relationship
     user = relationship("User", back_populates="chat_messages")
 
+    # Chat history in order, by user or by anonymous session (also serves the
+    # legacy session -> user lookup for sessions that predate chat_session_links)
+    __table_args__ = (
+        Index("ix_chat_messages_user_ts", "user_id", "timestamp"),
+        Index("ix_chat_messages_session_ts", "session_id", "timestamp"),
+    )
+
+
+class ChatSessionLink(Base):
+    """Chat session -> user mapping used to resolve the user at every verification step."""
+    __tablename__ = "chat_session_links"
+
+    session_id = Column(String(255), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationship
+    user = relationship("User")
+
+    # Sessions of a user (admin views, cleanup)
+    __table_args__ = (Index("ix_chat_session_links_user_session", "user_id", "session_id"),)
+
+
+class ChatMemorySlots(Base):
+    """Account details collected in a chat conversation, kept for the LLM prompt."""
+    __tablename__ = "chat_memory_slots"
+
+    conversation_key = Column(String(255), primary_key=True)  # "user:<id>" or "session:<id>"
+    slots = Column(Text, nullable=False)  # JSON string: name, email, phone, account_type
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailyStat(Base):
+    """Daily rollup counter (registrations, accounts, session status transitions)."""
+    __tablename__ = "daily_stats"
+
+    day = Column(Date, primary_key=True)
+    metric = Column(String(50), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+
+class Job(Base):
+    """Durable background job (KYC pipeline steps run outside the HTTP request)."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False)
+    session_id = Column(String(255), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    idempotency_key = Column(String(255), unique=True, nullable=True)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+
+    payload = Column(Text, nullable=True)  # JSON string
+    result = Column(Text, nullable=True)  # JSON string
+    progress = Column(Text, nullable=True)  # JSON string: step -> state
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    # Workers claim the oldest due job; finished jobs (the bulk of the table) stay out of the index
+    __table_args__ = (
+        Index(
+            "ix_jobs_unfinished",
+            "run_after",
+            "id",
+            postgresql_where=status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            sqlite_where=status.in_([JobStatus.QUEUED, JobStatus.RUNNING])
+        ),
+    )
+
@@ -4,6 +4,7 @@ FastAPI application entry point for eKYC system.
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+import asyncio
 import time
 import logging
 from PIL import Image
@@ -14,8 +15,20 @@ if not hasattr(Image, 'ANTIALIAS'):
 
 # FIXED: Removed relative imports (dots)
 from config import settings
-from database import init_db
+from database import init_db, User
+from database.database import SessionLocal, async_engine
 from api.routes import chat_routes, verification_routes, admin_routes
+from services.worker_pool import cv_worker_pool, WorkerPoolSaturated, WorkerJobTimeout
+from services.ocrspace_service import ocrspace_service
+from services.model_registry import model_registry
+from services.cv import didit_liveness_service
+from services.upload_sink import UploadTooLarge, UnsupportedUploadType
+from services.image_normalizer import image_normalizer
+from services.job_queue import job_queue
+from services.progress_bus import progress_bus
+from services.stats_service import stats_service
+from services.chat_writer import chat_writer
+from services import kyc_jobs  # noqa: F401  (registers job handlers)
 
 # Initialize logging
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
@@ -72,6 +85,95 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.exception_handler(WorkerPoolSaturated)
+async def worker_pool_saturated_handler(request: Request, exc: WorkerPoolSaturated):
+    """Backpressure: reject CV work while the worker pool queue is full."""
+    logger.warning(f"Rejected {request.url.path}: {exc}")
+    
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": "5"},
+        content={
+            "success": False,
+            "error": "Server busy",
+            "message": "Too many verifications are being processed. Please try again shortly."
+        }
+    )
+
+
+@app.exception_handler(WorkerJobTimeout)
+async def worker_job_timeout_handler(request: Request, exc: WorkerJobTimeout):
+    """CV job exceeded its time budget."""
+    logger.error(f"Timed out {request.url.path}: {exc}")
+    
+    return JSONResponse(
+        status_code=504,
+        content={
+            "success": False,
+            "error": "Processing timeout",
+            "message": "Processing took too long. Please try again."
+        }
+    )
+
+
+@app.exception_handler(UploadTooLarge)
+async def upload_too_large_handler(request: Request, exc: UploadTooLarge):
+    """Upload exceeded MAX_FILE_SIZE_MB."""
+    logger.warning(f"Rejected upload on {request.url.path}: {exc}")
+    
+    return JSONResponse(
+        status_code=413,
+        content={
+            "success": False,
+            "error": "File too large",
+            "message": f"Files must be smaller than {settings.MAX_FILE_SIZE_MB} MB."
+        }
+    )
+
+
+@app.exception_handler(UnsupportedUploadType)
+async def unsupported_upload_type_handler(request: Request, exc: UnsupportedUploadType):
+    """Upload is not an accepted image/video type."""
+    logger.warning(f"Rejected upload on {request.url.path}: {exc}")
+    
+    return JSONResponse(
+        status_code=415,
+        content={
+            "success": False,
+            "error": "Unsupported file type",
+            "message": str(exc)
+        }
+    )
+
+
+# Retry delay after a failed CV warm-up (doubles per failure, up to the max)
+WARM_UP_RETRY_SECONDS = 30.0
+WARM_UP_RETRY_MAX_SECONDS = 600.0
+
+
+async def _run_warm_up():
+    await cv_worker_pool.warm_up()
+    if cv_worker_pool.warm_up_state == "failed":
+        app.state.warm_up_failures = getattr(app.state, "warm_up_failures", 0) + 1
+        delay = min(WARM_UP_RETRY_MAX_SECONDS, WARM_UP_RETRY_SECONDS * 2 ** (app.state.warm_up_failures - 1))
+        app.state.warm_up_retry_at = time.monotonic() + delay
+        logger.warning(f"CV warm-up failed; the next readiness probe after {delay:.0f}s retries it")
+    else:
+        app.state.warm_up_failures = 0
+
+
+def start_warm_up():
+    """Start the CV worker warm-up unless one is in flight or a failed one is backing off."""
+    task = getattr(app.state, "warm_up_task", None)
+    if task is not None and not task.done():
+        return
+    if time.monotonic() < getattr(app.state, "warm_up_retry_at", 0.0):
+        return
+    # Set before the task runs so concurrent probes see the warm-up as started
+    cv_worker_pool.warm_up_state = "running"
+    app.state.warm_up_task = asyncio.create_task(_run_warm_up())
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -82,7 +184,27 @@ async def startup_event():
     init_db()
     logger.info("Database initialized")
     
-
+    with SessionLocal() as db:
+        if stats_service.is_empty(db) and db.query(User.id).first() is not None:
+            logger.warning("daily_stats is empty: run `python scripts/backfill_stats.py` so /stats includes existing data")
+    
+    # Models load lazily on first use; warm-up spawns the CV workers now so they
+    # preload PRELOAD_MODELS in the background without delaying boot
+    if settings.WARM_UP_ON_STARTUP:
+        start_warm_up()
+        logger.info(f"Warming up CV workers (preload: {', '.join(cv_worker_pool.preload_models) or 'none'})")
+    
+    # Push channel for verification progress (SSE / WebSocket)
+    await progress_bus.start()
+    
+    # Development setup: process background jobs in this process instead of worker.py
+    if settings.JOB_EMBEDDED_WORKER:
+        app.state.job_worker_stop = asyncio.Event()
+        app.state.job_worker_task = asyncio.create_task(job_queue.run_worker(
+            concurrency=settings.JOB_WORKER_CONCURRENCY,
+            stop_event=app.state.job_worker_stop
+        ))
+        logger.info("Embedded job worker started")
     
     logger.info("eKYC application started successfully")
 
@@ -92,6 +214,15 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown."""
     logger.info("Shutting down eKYC application...")
+    if getattr(app.state, "job_worker_task", None):
+        app.state.job_worker_stop.set()
+        await app.state.job_worker_task
+    await progress_bus.stop()
+    cv_worker_pool.shutdown()
+    await ocrspace_service.aclose()
+    await didit_liveness_service.aclose()
+    await chat_writer.stop()
+    await async_engine.dispose()
 
 
 # Health check endpoint
@@ -101,10 +232,37 @@ async def health_check():
     return {
         "status": "healthy",
         "service": settings.APP_NAME,
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "circuit_breakers": {
+            "ocrspace": ocrspace_service.breaker.metrics(),
+            "didit": didit_liveness_service.breaker.metrics()
+        },
+        "image_normalizer": image_normalizer.stats(),
+        "chat_writer": chat_writer.stats()
     }
 
 
+# Readiness endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe with per-model load state (503 until preloaded models are ready)."""
+    ready = cv_worker_pool.is_ready()
+    if not ready and cv_worker_pool.warm_up_state in ("not_started", "failed"):
+        # Preload configured without startup warm-up (or it failed): start it now
+        start_warm_up()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "warm_up": cv_worker_pool.warm_up_state,
+            "preload_models": list(cv_worker_pool.preload_models),
+            "api_models": model_registry.status(),
+            "worker_models": {str(pid): status for pid, status in cv_worker_pool.worker_models().items()},
+            "worker_pool": cv_worker_pool.stats()
+        }
+    )
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -113,7 +271,8 @@ async def root():
         "service": settings.APP_NAME,
         "version": "1.0.0",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 
@@ -0,0 +1,159 @@
+"""baseline schema
+
+Tables as created by Base.metadata.create_all() before migrations were
+introduced. Existing databases without an alembic_version table are stamped
+at this revision by init_db() instead of running it.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('phone', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_phone'), 'users', ['phone'], unique=True)
+    op.create_table('accounts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('account_number', sa.String(length=20), nullable=False),
+    sa.Column('account_type', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_number'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_accounts_id'), 'accounts', ['id'], unique=False)
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('session_id', sa.String(length=255), nullable=True),
+    sa.Column('event_type', sa.String(length=100), nullable=False),
+    sa.Column('event_data', sa.Text(), nullable=True),
+    sa.Column('ip_address', sa.String(length=50), nullable=True),
+    sa.Column('user_agent', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_audit_logs_event_type'), 'audit_logs', ['event_type'], unique=False)
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.create_table('biometric_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('encrypted_selfie_path', sa.Text(), nullable=True),
+    sa.Column('face_match_score', sa.Float(), nullable=True),
+    sa.Column('face_match_result', sa.Boolean(), nullable=True),
+    sa.Column('liveness_score', sa.Float(), nullable=True),
+    sa.Column('liveness_result', sa.Boolean(), nullable=True),
+    sa.Column('encrypted_liveness_video_path', sa.Text(), nullable=True),
+    sa.Column('encrypted_fingerprint_data', sa.Text(), nullable=True),
+    sa.Column('fingerprint_verified', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_biometric_data_id'), 'biometric_data', ['id'], unique=False)
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('session_id', sa.String(length=255), nullable=True),
+    sa.Column('sender', sa.String(length=50), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_chat_messages_id'), 'chat_messages', ['id'], unique=False)
+    op.create_index(op.f('ix_chat_messages_session_id'), 'chat_messages', ['session_id'], unique=False)
+    op.create_table('cnic_data',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('encrypted_cnic_number', sa.Text(), nullable=False),
+    sa.Column('encrypted_name', sa.Text(), nullable=False),
+    sa.Column('encrypted_father_name', sa.Text(), nullable=True),
+    sa.Column('encrypted_dob', sa.Text(), nullable=True),
+    sa.Column('encrypted_gender', sa.Text(), nullable=True),
+    sa.Column('encrypted_address', sa.Text(), nullable=True),
+    sa.Column('encrypted_issue_date', sa.Text(), nullable=True),
+    sa.Column('encrypted_expiry_date', sa.Text(), nullable=True),
+    sa.Column('is_valid', sa.Boolean(), nullable=True),
+    sa.Column('validation_errors', sa.Text(), nullable=True),
+    sa.Column('encrypted_front_image_path', sa.Text(), nullable=True),
+    sa.Column('encrypted_back_image_path', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_index(op.f('ix_cnic_data_id'), 'cnic_data', ['id'], unique=False)
+    op.create_table('verification_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.Text(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'EXPIRED', name='verificationstatus'), nullable=True),
+    sa.Column('cnic_uploaded', sa.Boolean(), nullable=True),
+    sa.Column('ocr_completed', sa.Boolean(), nullable=True),
+    sa.Column('selfie_uploaded', sa.Boolean(), nullable=True),
+    sa.Column('face_match_completed', sa.Boolean(), nullable=True),
+    sa.Column('liveness_completed', sa.Boolean(), nullable=True),
+    sa.Column('fingerprint_captured', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_verification_sessions_id'), 'verification_sessions', ['id'], unique=False)
+    op.create_index(op.f('ix_verification_sessions_session_id'), 'verification_sessions', ['session_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_verification_sessions_session_id'), table_name='verification_sessions')
+    op.drop_index(op.f('ix_verification_sessions_id'), table_name='verification_sessions')
+    op.drop_table('verification_sessions')
+    op.drop_index(op.f('ix_cnic_data_id'), table_name='cnic_data')
+    op.drop_table('cnic_data')
+    op.drop_index(op.f('ix_chat_messages_session_id'), table_name='chat_messages')
+    op.drop_index(op.f('ix_chat_messages_id'), table_name='chat_messages')
+    op.drop_table('chat_messages')
+    op.drop_index(op.f('ix_biometric_data_id'), table_name='biometric_data')
+    op.drop_table('biometric_data')
+    op.drop_index(op.f('ix_audit_logs_id'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_event_type'), table_name='audit_logs')
+    op.drop_index(op.f('ix_audit_logs_created_at'), table_name='audit_logs')
+    op.drop_table('audit_logs')
+    op.drop_index(op.f('ix_accounts_id'), table_name='accounts')
+    op.drop_table('accounts')
+    op.drop_index(op.f('ix_users_phone'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='verificationstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,94 @@
+"""job queue, session links and stats rollups
+
+Deployments that ran the create_all() setup after these models were added
+already have some of these tables (but not the indexes on existing tables),
+so every step checks first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(name: str) -> bool:
+    # Offline (--sql) runs cannot inspect, so they emit every statement
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _create_index(name: str, table: str, columns: list):
+    op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def upgrade() -> None:
+    if not _has_table('daily_stats'):
+        op.create_table('daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(length=50), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'metric')
+        )
+
+    if not _has_table('chat_session_links'):
+        op.create_table('chat_session_links',
+        sa.Column('session_id', sa.String(length=255), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('session_id')
+        )
+    _create_index('ix_chat_session_links_user_session', 'chat_session_links', ['user_id', 'session_id'])
+
+    if not _has_table('jobs'):
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_type', sa.String(length=50), nullable=False),
+        sa.Column('session_id', sa.String(length=255), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('idempotency_key', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus'), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('progress', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+        )
+    _create_index(op.f('ix_jobs_id'), 'jobs', ['id'])
+    _create_index(op.f('ix_jobs_session_id'), 'jobs', ['session_id'])
+
+    _create_index('ix_verification_sessions_user_created', 'verification_sessions', ['user_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_verification_sessions_user_created', table_name='verification_sessions')
+    op.drop_index(op.f('ix_jobs_session_id'), table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
+    op.drop_index('ix_chat_session_links_user_session', table_name='chat_session_links')
+    op.drop_table('chat_session_links')
+    op.drop_table('daily_stats')
@@ -0,0 +1,66 @@
+"""hot query indexes
+
+Composite indexes matching the filter + ORDER BY of chat history, audit log
+and admin queries, and partial indexes over open verification sessions and
+unfinished jobs. Indexes that became a prefix of a composite one are dropped.
+On PostgreSQL the indexes are built CONCURRENTLY so writes are not blocked.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ACTIVE_SESSIONS = sa.text("status IN ('PENDING', 'IN_PROGRESS')")
+UNFINISHED_JOBS = sa.text("status IN ('QUEUED', 'RUNNING')")
+
+# name, table, columns, partial index predicate
+NEW_INDEXES = [
+    ('ix_chat_messages_user_ts', 'chat_messages', ['user_id', 'timestamp'], None),
+    ('ix_chat_messages_session_ts', 'chat_messages', ['session_id', 'timestamp'], None),
+    ('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'], None),
+    ('ix_audit_logs_event_created', 'audit_logs', ['event_type', 'created_at'], None),
+    ('ix_verification_sessions_active', 'verification_sessions', ['status', 'expires_at'], ACTIVE_SESSIONS),
+    ('ix_jobs_unfinished', 'jobs', ['run_after', 'id'], UNFINISHED_JOBS),
+]
+
+# Covered or replaced by the indexes above
+REDUNDANT_INDEXES = [
+    ('ix_chat_messages_session_id', 'chat_messages', ['session_id']),
+    ('ix_audit_logs_event_type', 'audit_logs', ['event_type']),
+]
+
+
+def _concurrently() -> dict:
+    return {'postgresql_concurrently': True} if op.get_context().dialect.name == 'postgresql' else {}
+
+
+def upgrade() -> None:
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in NEW_INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_where=where, sqlite_where=where, **_concurrently()
+            )
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, **_concurrently())
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in REDUNDANT_INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, **_concurrently())
+        for name, table, _, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, **_concurrently())
@@ -0,0 +1,34 @@
+"""chat memory slots
+
+Per-conversation account details extracted from the chat, so the webhook
+reads one row instead of rescanning turns older than the history it fetches.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('chat_memory_slots',
+    sa.Column('conversation_key', sa.String(length=255), nullable=False),
+    sa.Column('slots', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('conversation_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('chat_memory_slots')
@@ -0,0 +1,31 @@
+"""
+Rebuild the daily_stats rollups behind the admin /stats endpoint from
+users, accounts and verification_sessions.
+
+Run once after deploying the rollup table, or any time the counters are
+suspected to be off. Existing counters are replaced in one transaction.
+
+Usage:
+    python scripts/backfill_stats.py
+"""
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database import SessionLocal, init_db
+from services.stats_service import stats_service
+
+
+def main():
+    init_db()
+    with SessionLocal() as db:
+        rows = stats_service.rebuild(db)
+        print(f"Rebuilt {rows} daily counters")
+        for field, value in stats_service.dashboard(db).items():
+            print(f"  {field}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark the admin /users endpoint against a large seeded database.
+
+Seeds users (default 100k) with verification sessions and accounts into a
+separate database, then times pages at the start, middle and end of the table
+with offset and keyset (after_id) pagination, counting SQL statements per
+request. The pre-batching implementation (two queries per user) is timed on
+the first page for comparison.
+
+Usage:
+    python scripts/benchmark_admin_users.py --users 100000
+    python scripts/benchmark_admin_users.py --database-url sqlite:///./admin_benchmark.db --reuse
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the admin /users endpoint")
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database-url', default="sqlite:///./admin_benchmark.db")
+    parser.add_argument('--reuse', action='store_true', help="Skip seeding if the database already has users")
+    return parser.parse_args()
+
+
+# The database URL must be set before the app's settings are imported
+args = parse_args()
+os.environ["DATABASE_URL"] = args.database_url
+
+from fastapi import Response
+from sqlalchemy import desc, event, func, insert
+
+from api.routes.admin_routes import get_users
+from database.database import AsyncSessionLocal, SessionLocal, async_engine, engine, init_db
+from database.models import Account, User, VerificationSession, VerificationStatus
+
+BATCH_SIZE = 10_000
+
+
+def seed(total_users: int):
+    """Bulk insert users, 0-3 sessions each and accounts for about half of them."""
+    statuses = list(VerificationStatus)
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        first_id = (conn.execute(func.coalesce(func.max(User.id), 0).select()).scalar() or 0) + 1
+        for batch_start in range(first_id, first_id + total_users, BATCH_SIZE):
+            ids = range(batch_start, min(batch_start + BATCH_SIZE, first_id + total_users))
+            users, sessions, accounts = [], [], []
+            for user_id in ids:
+                created_at = now - timedelta(minutes=user_id)
+                users.append({
+                    "id": user_id,
+                    "name": f"User {user_id}",
+                    "email": f"user{user_id}@example.com",
+                    "phone": f"+92{user_id:010d}",
+                    "created_at": created_at,
+                    "updated_at": created_at
+                })
+                for n in range(random.randint(0, 3)):
+                    sessions.append({
+                        "session_id": f"bench-{user_id}-{n}",
+                        "user_id": user_id,
+                        "token": "benchmark",
+                        "status": random.choice(statuses),
+                        "created_at": created_at + timedelta(seconds=n),
+                        "expires_at": created_at + timedelta(hours=1)
+                    })
+                if user_id % 2 == 0:
+                    accounts.append({"user_id": user_id, "account_number": f"PK{user_id:012d}"})
+            conn.execute(insert(User), users)
+            if sessions:
+                conn.execute(insert(VerificationSession), sessions)
+            conn.execute(insert(Account), accounts)
+            print(f"  seeded users up to {ids[-1]}")
+    print(f"Seeded {total_users} users in {time.perf_counter() - start:.1f}s")
+
+
+def legacy_get_users(db, skip: int, limit: int):
+    """The previous implementation: one query for the page, two per user."""
+    users = db.query(User).offset(skip).limit(limit).all()
+    result = []
+    for user in users:
+        latest_session = db.query(VerificationSession).filter(
+            VerificationSession.user_id == user.id
+        ).order_by(desc(VerificationSession.created_at)).first()
+        account = db.query(Account).filter(Account.user_id == user.id).first()
+        result.append((user.id, account.account_number if account else None,
+                       latest_session.status.value if latest_session else "not_started"))
+    return result
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the database (sync and async engines)."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(async_engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_):
+        self.count += 1
+
+
+async def timed(counter, repeat, fn):
+    """Return (median ms, statements per call); fn may return an awaitable."""
+    timings = []
+    statements = 0
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append((time.perf_counter() - start) * 1000)
+        statements = counter.count
+    return statistics.median(timings), statements
+
+
+async def run_benchmark(total: int):
+    """Time offset and keyset pages through the async route, then the legacy code."""
+    counter = StatementCounter()
+    positions = {"first": 0, "middle": total // 2, "last": max(0, total - args.limit)}
+
+    print(f"{'page':<8} {'mode':<8} {'median ms':>10} {'statements':>11}")
+    async with AsyncSessionLocal() as db:
+        for name, offset in positions.items():
+            ms, statements = await timed(counter, args.repeat, lambda: get_users(
+                Response(), skip=offset, limit=args.limit, after_id=None, db=db
+            ))
+            print(f"{name:<8} {'offset':<8} {ms:>10.1f} {statements:>11}")
+
+            # Same page via keyset: the id just before it
+            after_id = (await get_users(Response(), skip=offset, limit=1, after_id=None, db=db))[0].id - 1
+            ms, statements = await timed(counter, args.repeat, lambda: get_users(
+                Response(), skip=0, limit=args.limit, after_id=after_id, db=db
+            ))
+            print(f"{name:<8} {'keyset':<8} {ms:>10.1f} {statements:>11}")
+
+    with SessionLocal() as db:
+        ms, statements = await timed(counter, 1, lambda: legacy_get_users(db, 0, args.limit))
+        print(f"{'first':<8} {'legacy':<8} {ms:>10.1f} {statements:>11}")
+    await async_engine.dispose()
+
+
+def main():
+    init_db()
+    with SessionLocal() as db:
+        existing = db.query(func.count(User.id)).scalar()
+    if not (args.reuse and existing):
+        seed(args.users)
+    with SessionLocal() as db:
+        total = db.query(func.count(User.id)).scalar()
+    print(f"\n{total} users, page size {args.limit}\n")
+
+    asyncio.run(run_benchmark(total))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark Tesseract OCR backends (pytesseract subprocess vs in-process tesserocr).
+
+Runs the same preprocessed CNIC images through each available backend and
+reports per-image latency. The first call per backend is timed separately,
+since that is where tesserocr loads traineddata.
+
+Usage:
+    python scripts/benchmark_ocr_backends.py uploads/cnic/*_front.jpg --iterations 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.image_context import ImageContext
+from services.ocr_service import (
+    PytesseractBackend,
+    TesserocrBackend,
+    TesseractOCRService,
+    TESSEROCR_AVAILABLE,
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def benchmark(backend, images, iterations, lang, psm):
+    """Return (first_call_ms, per-call latencies in ms, last output per image)."""
+    start = time.perf_counter()
+    backend.recognize(images[0], lang=lang, psm=psm)
+    first_call_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    outputs = []
+    for _ in range(iterations):
+        outputs = []
+        for image in images:
+            start = time.perf_counter()
+            outputs.append(backend.recognize(image, lang=lang, psm=psm))
+            timings.append((time.perf_counter() - start) * 1000)
+    return first_call_ms, timings, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Tesseract OCR backends")
+    parser.add_argument('images', nargs='+', help="CNIC image files")
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--lang', default='eng+urd')
+    parser.add_argument('--psm', type=int, default=6)
+    args = parser.parse_args()
+
+    # Preprocess once so only recognition is measured
+    service = TesseractOCRService()
+    images = [service.preprocess_image(ImageContext(image_path=path)) for path in args.images]
+    images = [image for image in images if image is not None]
+    if not images:
+        print("No readable images")
+        return 1
+
+    backends = [PytesseractBackend()]
+    if TESSEROCR_AVAILABLE:
+        backends.append(TesserocrBackend())
+    else:
+        print("tesserocr not installed; benchmarking pytesseract only")
+
+    print(f"{len(images)} images x {args.iterations} iterations, lang={args.lang}, psm={args.psm}\n")
+    print(f"{'backend':<12} {'first ms':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'img/s':>7}")
+
+    results = {}
+    for backend in backends:
+        first_call_ms, timings, outputs = benchmark(backend, images, args.iterations, args.lang, args.psm)
+        results[backend.name] = outputs
+        mean = statistics.mean(timings)
+        print(f"{backend.name:<12} {first_call_ms:>9.1f} {mean:>9.1f} "
+              f"{percentile(timings, 50):>9.1f} {percentile(timings, 95):>9.1f} {1000 / mean:>7.2f}")
+        backend.close()
+
+    if len(results) > 1:
+        baseline = results['pytesseract']
+        same = sum(1 for a, b in zip(baseline, results['tesserocr']) if a.strip() == b.strip())
+        print(f"\nIdentical text on {same}/{len(baseline)} images")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Calibrate a face embedding backend against FACE_MATCH_THRESHOLD.
+
+Scores labelled image pairs with the candidate backend (and, if available, the
+DeepFace VGG-Face reference) and picks the raw similarity threshold that
+reproduces the reference decisions. The result is written as a calibration file
+for FACE_SCORE_CALIBRATION_PATH, which maps candidate scores onto the reference
+scale so FACE_MATCH_THRESHOLD keeps its meaning.
+
+Pairs file (CSV, no header): selfie_path,cnic_face_path,label  (label 1 = same person)
+
+Usage:
+    python scripts/calibrate_face_backend.py pairs.csv --backend onnx \
+        --onnx-model models/mobilefacenet.onnx --output face_calibration.json
+    python scripts/calibrate_face_backend.py pairs.csv --backend onnx \
+        --onnx-model models/mobilefacenet.onnx --no-reference --target-far 0.01
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import settings
+from services.cv.face_embedding import DeepFaceBackend, cosine_similarity, create_face_backend
+
+
+def load_pairs(path):
+    with open(path, newline='') as f:
+        return [(row[0], row[1], int(row[2])) for row in csv.reader(f) if row and not row[0].startswith('#')]
+
+
+def score_pairs(backend, pairs, batch_size):
+    """Raw cosine similarity per pair (NaN where a face was not found)."""
+    images = [image for selfie, cnic, _ in pairs for image in (selfie, cnic)]
+    embeddings = []
+    for start in range(0, len(images), batch_size):
+        embeddings.extend(backend.embed_batch(images[start:start + batch_size]))
+
+    scores = []
+    for i in range(len(pairs)):
+        a, b = embeddings[2 * i], embeddings[2 * i + 1]
+        scores.append(float(cosine_similarity(a, b)[0]) if a is not None and b is not None else float('nan'))
+    return np.array(scores)
+
+
+def error_rates(scores, labels, threshold):
+    """(FAR, FRR) at a threshold; pairs without faces count as rejections."""
+    accepted = np.nan_to_num(scores, nan=-1.0) >= threshold
+    impostors, genuines = labels == 0, labels == 1
+    far = float(accepted[impostors].mean()) if impostors.any() else 0.0
+    frr = float((~accepted[genuines]).mean()) if genuines.any() else 0.0
+    return far, frr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate a face embedding backend")
+    parser.add_argument('pairs', help="CSV of selfie_path,cnic_face_path,label")
+    parser.add_argument('--backend', default='onnx')
+    parser.add_argument('--onnx-model', default=settings.FACE_ONNX_MODEL_PATH)
+    parser.add_argument('--threads', type=int, default=settings.FACE_ONNX_THREADS)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--threshold', type=float, default=settings.FACE_MATCH_THRESHOLD,
+                        help="Reference decision threshold (FACE_MATCH_THRESHOLD)")
+    parser.add_argument('--no-reference', action='store_true', help="Skip DeepFace; calibrate to --target-far")
+    parser.add_argument('--target-far', type=float, default=0.01)
+    parser.add_argument('--output', default='face_calibration.json')
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.pairs)
+    labels = np.array([label for _, _, label in pairs])
+    print(f"{len(pairs)} pairs ({int(labels.sum())} genuine, {int((labels == 0).sum())} impostor)")
+
+    backend = create_face_backend(args.backend, onnx_model_path=args.onnx_model, intra_op_threads=args.threads)
+    scores = score_pairs(backend, pairs, args.batch_size)
+    candidates = np.unique(np.round(scores[~np.isnan(scores)], 4))
+    if len(candidates) == 0:
+        print("No faces found by the candidate backend")
+        return 1
+
+    if args.no_reference:
+        # Lowest threshold whose false accept rate stays within the target
+        raw_threshold = next(
+            (float(t) for t in candidates if error_rates(scores, labels, t)[0] <= args.target_far),
+            float(candidates[-1])
+        )
+        agreement = None
+    else:
+        reference_scores = score_pairs(DeepFaceBackend(), pairs, args.batch_size)
+        reference_decisions = np.nan_to_num(reference_scores, nan=-1.0) >= args.threshold
+        far, frr = error_rates(reference_scores, labels, args.threshold)
+        print(f"Reference deepface @ {args.threshold:.3f}: FAR={far:.4f} FRR={frr:.4f}")
+
+        # Threshold that makes the same accept/reject decisions as the reference
+        agreements = [
+            float(((np.nan_to_num(scores, nan=-1.0) >= t) == reference_decisions).mean())
+            for t in candidates
+        ]
+        best = int(np.argmax(agreements))
+        raw_threshold, agreement = float(candidates[best]), agreements[best]
+
+    far, frr = error_rates(scores, labels, raw_threshold)
+    print(f"Candidate {backend.name} @ raw {raw_threshold:.4f}: FAR={far:.4f} FRR={frr:.4f}"
+          + (f", agreement with reference={agreement:.4f}" if agreement is not None else ""))
+
+    calibration = {
+        "backend": backend.name,
+        "model": os.path.basename(args.onnx_model) if backend.name == 'onnx' else None,
+        "raw_threshold": raw_threshold,
+        "target_threshold": args.threshold,
+        "pairs": len(pairs),
+        "far": far,
+        "frr": frr,
+        "reference_agreement": agreement,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(calibration, f, indent=2)
+    print(f"Wrote {args.output}; set FACE_SCORE_CALIBRATION_PATH to use it")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Local DIDIT liveness stub server for tests and offline development.
+Point DIDIT_API_BASE_URL at it to exercise the async client, hedging and
+circuit breaker without calling the real API.
+
+Usage:
+    python scripts/didit_stub_server.py --port 8766 --delay 3 --fail-first 1
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class DiditStubState:
+    """Mutable behaviour shared by all stub request handlers."""
+
+    def __init__(self, is_live: bool = True, confidence: float = 0.95, fail_first: int = 0,
+                 fail_status: int = 503, delay: float = 0.0):
+        self.is_live = is_live
+        self.confidence = confidence
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.requests = 0
+        self.bytes_received = 0
+        self.last_content_type = None
+        self.lock = threading.Lock()
+
+
+def make_handler(state: DiditStubState):
+    """Build a request handler bound to the given stub state."""
+
+    class DiditStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+
+            with state.lock:
+                state.requests += 1
+                state.bytes_received += len(body)
+                state.last_content_type = self.headers.get('Content-Type')
+                should_fail = state.requests <= state.fail_first
+
+            if state.delay:
+                time.sleep(state.delay)
+
+            if should_fail:
+                self.send_response(state.fail_status)
+                self.end_headers()
+                return
+
+            payload = json.dumps({
+                "success": True,
+                "liveness": {
+                    "is_live": state.is_live,
+                    "confidence": state.confidence,
+                    "checks": {
+                        "blink_detected": state.is_live,
+                        "movement_detected": state.is_live,
+                        "face_quality": "high"
+                    }
+                }
+            }).encode()
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client gave up (e.g. a hedged request that lost the race)
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return DiditStubHandler
+
+
+def start_stub_server(port: int = 0, **kwargs):
+    """
+    Start the stub server in a background thread.
+
+    Args:
+        port: Port to bind (0 picks a free port)
+        **kwargs: DiditStubState options (is_live, confidence, fail_first, fail_status, delay)
+
+    Returns:
+        Tuple of (server, state, base_url)
+    """
+    state = DiditStubState(**kwargs)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, state, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DIDIT liveness stub server")
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--not-live', action='store_true', help="Report the video as not live")
+    parser.add_argument('--fail-first', type=int, default=0, help="Fail this many requests first")
+    parser.add_argument('--fail-status', type=int, default=503)
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait per request")
+    args = parser.parse_args()
+
+    state = DiditStubState(is_live=not args.not_live, fail_first=args.fail_first,
+                           fail_status=args.fail_status, delay=args.delay)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(state))
+    print(f"DIDIT stub listening on http://127.0.0.1:{args.port} (POST /v1/liveness)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
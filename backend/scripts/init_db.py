@@ -1,6 +1,6 @@
 """
 Database initialization script.
-Run this to create all database tables.
+Run this to create the database tables (applies all migrations).
 """
 import sys
 import os
@@ -18,9 +18,9 @@ logger = logging.getLogger(__name__)
 def main():
     """Initialize the database."""
     try:
-        logger.info("Creating database tables...")
+        logger.info("Applying database migrations...")
         init_db()
-        logger.info("✓ Database tables created successfully!")
+        logger.info("✓ Database schema is up to date!")
         
         # Verify tables were created
         from sqlalchemy import inspect
@@ -0,0 +1,113 @@
+"""
+Local OCR.space stub server for tests and offline development.
+Point OCRSPACE_API_BASE_URL at it to exercise the async client, retries and
+circuit breaker without calling the real API.
+
+Usage:
+    python scripts/ocrspace_stub_server.py --port 8765 --fail-first 2 --delay 0.2
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_TEXT = (
+    "PAKISTAN National Identity Card\n"
+    "Name\nMuhammad Ali Khan\n"
+    "Father Name\nAhmed Khan\n"
+    "Gender M\n"
+    "Identity Number 35202-1234567-1\n"
+    "Date of Birth 01.01.1990\n"
+    "Date of Issue 01.01.2020\n"
+    "Date of Expiry 01.01.2030\n"
+)
+
+
+class StubState:
+    """Mutable behaviour shared by all stub request handlers."""
+
+    def __init__(self, text: str = DEFAULT_TEXT, fail_first: int = 0,
+                 fail_status: int = 503, delay: float = 0.0):
+        self.text = text
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.delay = delay
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def make_handler(state: StubState):
+    """Build a request handler bound to the given stub state."""
+
+    class OCRSpaceStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(length)
+
+            with state.lock:
+                state.requests += 1
+                should_fail = state.requests <= state.fail_first
+
+            if state.delay:
+                time.sleep(state.delay)
+
+            if should_fail:
+                self.send_response(state.fail_status)
+                self.end_headers()
+                return
+
+            body = json.dumps({
+                "ParsedResults": [{"ParsedText": state.text}],
+                "IsErroredOnProcessing": False
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return OCRSpaceStubHandler
+
+
+def start_stub_server(port: int = 0, **kwargs):
+    """
+    Start the stub server in a background thread.
+
+    Args:
+        port: Port to bind (0 picks a free port)
+        **kwargs: StubState options (text, fail_first, fail_status, delay)
+
+    Returns:
+        Tuple of (server, state, base_url)
+    """
+    state = StubState(**kwargs)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/parse/image"
+    return server, state, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR.space stub server")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-first', type=int, default=0, help="Fail this many requests first")
+    parser.add_argument('--fail-status', type=int, default=503)
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait per request")
+    args = parser.parse_args()
+
+    state = StubState(fail_first=args.fail_first, fail_status=args.fail_status, delay=args.delay)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(state))
+    print(f"OCR.space stub listening on http://127.0.0.1:{args.port}/parse/image")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,9 +15,14 @@ from config import settings
 class EncryptionService:
     """Service for encrypting and decrypting sensitive data."""
     
-    def __init__(self):
-        """Initialize encryption service with key derivation."""
-        self.key = self.derive_key(
+    def __init__(self, key: Optional[bytes] = None):
+        """
+        Initialize encryption service with key derivation.
+        
+        Args:
+            key: Raw 32-byte key (optional, derived from settings if None)
+        """
+        self.key = key or self.derive_key(
             settings.ENCRYPTION_KEY,
             settings.SALT.encode()
         )
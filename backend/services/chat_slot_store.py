@@ -0,0 +1,77 @@
+"""
+Stored chat memory slots.
+The account details extracted from a conversation (see conversation_memory)
+are kept in one chat_memory_slots row per conversation and updated as each
+turn is saved, so the webhook never rescans turns older than the history it
+fetches.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database.models import ChatMemorySlots
+
+logger = logging.getLogger(__name__)
+
+
+class ChatSlotStore:
+    """Reads and writes per-conversation slot state."""
+
+    @staticmethod
+    def conversation_key(user_id: Optional[int], session_id: Optional[str]) -> Optional[str]:
+        """Key of the conversation the webhook loads history for (by user, else by session)."""
+        if user_id:
+            return f"user:{user_id}"
+        if session_id:
+            return f"session:{session_id}"
+        return None
+
+    def load(self, db: Session, key: str) -> Dict[str, str]:
+        """
+        Read a conversation's slots.
+
+        Args:
+            db: Database session
+            key: Conversation key
+
+        Returns:
+            Stored slots (empty if none were recorded)
+        """
+        row = db.get(ChatMemorySlots, key)
+        if row is None:
+            return {}
+        try:
+            return json.loads(row.slots)
+        except ValueError:
+            logger.warning(f"Ignoring unreadable chat memory slots for {key}")
+            return {}
+
+    def save(self, db: Session, key: str, slots: Dict[str, str]):
+        """Store a conversation's slots in the caller's transaction (not committed)."""
+        now = datetime.utcnow()
+        values = {"conversation_key": key, "slots": json.dumps(slots), "updated_at": now}
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Upsert: concurrent turns of one conversation cannot conflict
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(ChatMemorySlots).values(**values)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ChatMemorySlots.conversation_key],
+                set_={"slots": stmt.excluded.slots, "updated_at": stmt.excluded.updated_at}
+            ))
+        else:
+            db.merge(ChatMemorySlots(**values))
+            db.flush()
+
+    def clear(self, db: Session, keys: Sequence[str]):
+        """Forget conversations' slots (chat reset) in the caller's transaction."""
+        db.execute(delete(ChatMemorySlots).where(ChatMemorySlots.conversation_key.in_(list(keys))))
+
+
+# Global chat slot store instance
+chat_slot_store = ChatSlotStore()
@@ -0,0 +1,121 @@
+"""
+Group commit for chat messages.
+Concurrent webhook calls hand their ChatMessage rows to one writer, which
+inserts everything that arrives within a few milliseconds as one multi-row
+INSERT ... VALUES and commits once for the whole batch. Callers wait until
+their batch is committed, so a reply is never sent before it is stored.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import insert
+
+from config import settings
+from database.database import async_engine
+from database.models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ChatMessageWriter:
+    """Coalesces chat message inserts from concurrent requests into batches."""
+
+    def __init__(self, engine, enabled: bool = False, max_delay_ms: float = 5.0, max_batch: int = 200):
+        """
+        Initialize chat message writer.
+
+        Args:
+            engine: Async SQLAlchemy engine batches are written with
+            enabled: Whether the webhook routes messages through this writer
+            max_delay_ms: How long the first message of a batch waits for others
+            max_batch: Rows that trigger an immediate flush (also the INSERT size cap)
+        """
+        self.engine = engine
+        self.enabled = enabled
+        self.max_delay_ms = max_delay_ms
+        self.max_batch = max_batch
+        self._pending: List[tuple] = []
+        self._pending_rows = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._stats = {"batches": 0, "rows": 0, "requests": 0, "largest_batch": 0, "errors": 0}
+
+    async def write(self, rows: List[Dict]):
+        """
+        Insert chat messages with the next batch and wait for its commit.
+
+        Args:
+            rows: ChatMessage column values (user_id, session_id, sender, message, timestamp)
+
+        Raises:
+            The database error if the batch could not be committed
+        """
+        if not rows:
+            return
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._pending.append((rows, done))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay_ms / 1000, self._flush)
+
+        # The batch commits for every caller in it, even if this request is cancelled
+        await asyncio.shield(done)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_rows = self._pending, [], 0
+        task = asyncio.create_task(self._commit(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _commit(self, batch: List[tuple]):
+        rows = [row for request_rows, _ in batch for row in request_rows]
+        try:
+            async with self.engine.begin() as conn:
+                for start in range(0, len(rows), self.max_batch):
+                    await conn.execute(insert(ChatMessage).values(rows[start:start + self.max_batch]))
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Chat message batch of {len(rows)} rows failed: {e}")
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+            return
+
+        self._stats["batches"] += 1
+        self._stats["rows"] += len(rows)
+        self._stats["requests"] += len(batch)
+        self._stats["largest_batch"] = max(self._stats["largest_batch"], len(rows))
+        for _, done in batch:
+            if not done.done():
+                done.set_result(None)
+
+    async def stop(self):
+        """Write out anything still pending (shutdown)."""
+        self._flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        """Batch counters for /health."""
+        stats = dict(self._stats, enabled=self.enabled)
+        stats["avg_batch_rows"] = round(stats["rows"] / stats["batches"], 1) if stats["batches"] else 0.0
+        return stats
+
+
+# Global chat message writer instance
+chat_writer = ChatMessageWriter(
+    async_engine,
+    enabled=settings.CHAT_GROUP_COMMIT_ENABLED,
+    max_delay_ms=settings.CHAT_GROUP_COMMIT_MAX_DELAY_MS,
+    max_batch=settings.CHAT_GROUP_COMMIT_MAX_BATCH
+)
@@ -0,0 +1,127 @@
+"""
+Circuit breaker for external OCR / liveness APIs.
+Stops calling a dependency while it is failing and probes it again after a cool-down.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed -> open -> half-open circuit breaker with transition metrics."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize circuit breaker.
+
+        Args:
+            name: Dependency name used in logs and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            recovery_timeout: Seconds to stay open before allowing a probe
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_calls = 0
+        self._metrics: Dict[str, int] = {
+            "calls": 0,
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+        }
+        self._transitions: Dict[str, int] = {}
+
+    @property
+    def state(self) -> str:
+        """Current state (an expired open circuit reports half-open)."""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _transition(self, new_state: str):
+        """Move to a new state and record the transition (lock must be held)."""
+        if new_state == self._state:
+            return
+        key = f"{self._state}->{new_state}"
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        logger.warning(f"Circuit '{self.name}' {key}")
+        self._state = new_state
+        if new_state == self.OPEN:
+            self._opened_at = time.monotonic()
+        self._half_open_calls = 0
+
+    def _maybe_half_open(self):
+        if (self._state == self.OPEN and self._opened_at is not None
+                and time.monotonic() - self._opened_at >= self.recovery_timeout):
+            self._transition(self.HALF_OPEN)
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed.
+
+        Returns:
+            True if the call is allowed, False if the circuit rejects it
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.OPEN or (
+                self._state == self.HALF_OPEN and self._half_open_calls >= self.half_open_max_calls
+            ):
+                self._metrics["rejected"] += 1
+                return False
+            if self._state == self.HALF_OPEN:
+                self._half_open_calls += 1
+            self._metrics["calls"] += 1
+            return True
+
+    def release(self):
+        """Give back a half-open probe slot for a call that ended without an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        """Record a successful call."""
+        with self._lock:
+            self._metrics["successes"] += 1
+            self._consecutive_failures = 0
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Record a failed call (after retries are exhausted)."""
+        with self._lock:
+            self._metrics["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._transition(self.OPEN)
+
+    def metrics(self) -> Dict:
+        """Return state, call counters and transition counts."""
+        with self._lock:
+            self._maybe_half_open()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                **self._metrics,
+                "transitions": dict(self._transitions),
+            }
@@ -0,0 +1,192 @@
+"""
+Conversation memory for the onboarding chat LLM prompt.
+Keeps the most recent turns that fit a token budget and replaces older turns
+with a compact note of the account details the customer already gave (name,
+email, phone, account type), so prompt size stays bounded however long the
+conversation gets. The details are extracted turn by turn and stored per
+conversation (services/chat_slot_store.py).
+"""
+import logging
+import re
+from typing import Dict, List, Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Built once: identical for every call
+SYSTEM_PROMPT = f"""You are the {settings.APP_NAME} Assistant. Your ONLY mission is to help users open a bank account by collecting:
+1. Full Name
+2. Email Address
+3. Phone Number (starting with +92)
+4. Account Type (Savings, Current, or Credit)
+
+PROCESS EXPLANATION:
+Tell the user that after providing these details, they will need to complete eKYC which includes:
+- CNIC Capture (Front & Back)
+- Real-time Face Verification
+- Fingerprint Scanning
+
+RULES:
+- Be professional and helpful.
+- If any info (Name, Email, Phone, Account Type) is missing, ask for it politely.
+- Check the conversation history and the collected details note to see what info you already have. DO NOT ASK FOR INFO ALREADY GIVEN.
+- ONCE YOU HAVE ALL FOUR (Name, Email, Phone, Account Type), you MUST end your response with this EXACT tag for our system to process:
+  [DATA_COLLECTED] Name: {{name}}, Email: {{email}}, Phone: {{phone}}, Account Type: {{account_type}}"""
+
+SLOT_LABELS = {"name": "Name", "email": "Email", "phone": "Phone", "account_type": "Account Type"}
+ACCOUNT_TYPES = {"saving": "Savings", "savings": "Savings", "current": "Current", "credit": "Credit"}
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"(?:\+|00)?92[\s-]?3\d{2}[\s-]?\d{7}\b|\b03\d{2}[\s-]?\d{7}\b")
+ACCOUNT_TYPE_PATTERN = re.compile(r"\b(savings?|current|credit)\b", re.IGNORECASE)
+EXPLICIT_NAME_PATTERN = re.compile(r"\b(?:my (?:full )?name is|name\s*[:\-])\s*([a-z][a-z .'-]{1,60})", re.IGNORECASE)
+NAME_PREFIX_PATTERN = re.compile(r"^(?:i am|i'm|im|it's|its|this is)\s+", re.IGNORECASE)
+NAME_PATTERN = re.compile(r"^[a-z][a-z.'-]*(?: [a-z][a-z.'-]*){0,3}$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token, as for English text)."""
+    return len(text) // 4 + 1
+
+
+def _normalize_phone(raw: str) -> str:
+    digits = re.sub(r"\D", "", raw)
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if digits.startswith("0"):
+        digits = "92" + digits[1:]
+    return "+" + digits
+
+
+class ConversationMemory:
+    """Builds token-bounded LLM message lists from stored chat history."""
+
+    def __init__(self, max_history_tokens: int = 1500, message_overhead_tokens: int = 4):
+        """
+        Initialize conversation memory.
+
+        Args:
+            max_history_tokens: Token budget for verbatim history turns
+            message_overhead_tokens: Per-message token cost of role/formatting
+        """
+        self.max_history_tokens = max_history_tokens
+        self.message_overhead_tokens = message_overhead_tokens
+
+    def message_tokens(self, message: Dict[str, str]) -> int:
+        """Estimated prompt tokens of one chat message."""
+        return estimate_tokens(message["content"]) + self.message_overhead_tokens
+
+    def extract_slots(
+        self,
+        history: List[Dict[str, str]],
+        slots: Optional[Dict[str, str]] = None
+    ) -> Dict[str, str]:
+        """
+        Collect the account details the customer has given so far.
+
+        Only user turns are read; a later answer overrides an earlier one
+        (corrections). A bare name is taken when it answers a question about
+        the name. Passing the previous slots and only the new turns (with
+        the assistant turn before them) updates the state incrementally.
+
+        Args:
+            history: Chat messages ({"role", "content"}), oldest first
+            slots: Details collected from earlier turns (not modified)
+
+        Returns:
+            Dictionary with any of name, email, phone, account_type
+        """
+        slots = dict(slots or {})
+        last_question = ""
+        for message in history:
+            content = message["content"].strip()
+            if message["role"] != "user":
+                last_question = content.lower()
+                continue
+
+            email = EMAIL_PATTERN.search(content)
+            if email:
+                slots["email"] = email.group(0)
+            phone = PHONE_PATTERN.search(content)
+            if phone:
+                slots["phone"] = _normalize_phone(phone.group(0))
+            account_type = ACCOUNT_TYPE_PATTERN.search(content)
+            if account_type and ("account" in content.lower() or "account type" in last_question):
+                slots["account_type"] = ACCOUNT_TYPES[account_type.group(1).lower()]
+
+            name = self._extract_name(content, asked="name" in last_question)
+            if name:
+                slots["name"] = name
+        return slots
+
+    @staticmethod
+    def _extract_name(content: str, asked: bool) -> Optional[str]:
+        explicit = EXPLICIT_NAME_PATTERN.search(content)
+        if explicit:
+            candidate = re.split(r"[,;\n]| and ", explicit.group(1))[0]
+        elif asked:
+            # "Ali Khan" or "Ali Khan, ali@example.com, ..." in reply to the name question
+            candidate = re.split(r"[,;\n]", content)[0]
+            candidate = NAME_PREFIX_PATTERN.sub("", candidate.strip())
+            if EMAIL_PATTERN.search(candidate) or re.search(r"\d", candidate):
+                return None
+        else:
+            return None
+        candidate = candidate.strip().rstrip(".!")
+        return candidate if NAME_PATTERN.match(candidate) else None
+
+    def slot_note(self, slots: Dict[str, str]) -> str:
+        """One-line summary of collected details for the prompt."""
+        details = ", ".join(f"{label}: {slots[key]}" for key, label in SLOT_LABELS.items() if key in slots)
+        return f"Details the customer has already given (earlier in the conversation): {details}."
+
+    def build_messages(
+        self,
+        prompt: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        slots: Optional[Dict[str, str]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Assemble the LLM messages for one chat turn.
+
+        The newest history turns are kept verbatim while they fit the token
+        budget. If any older turns are left out (trimmed by the budget, or
+        never fetched, in which case their stored slots are passed), the
+        details collected in the whole conversation are added as one short
+        system note instead.
+
+        Args:
+            prompt: Current user message
+            history: Recent chat messages ({"role", "content"}), oldest first
+            slots: Stored details of the conversation, when turns before
+                history exist that were not fetched
+
+        Returns:
+            Messages for the chat completion request
+        """
+        history = history or []
+        kept: List[Dict[str, str]] = []
+        budget = self.max_history_tokens
+        for message in reversed(history):
+            cost = self.message_tokens(message)
+            if cost > budget:
+                break
+            budget -= cost
+            kept.append(message)
+        kept.reverse()
+
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        dropped = len(history) - len(kept)
+        if dropped or slots is not None:
+            known = self.extract_slots(history, slots)
+            if known:
+                messages.append({"role": "system", "content": self.slot_note(known)})
+            logger.debug(f"Conversation memory: older turns replaced by slots {sorted(known)} ({dropped} trimmed)")
+        messages.extend(kept)
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+
+# Global conversation memory instance
+conversation_memory = ConversationMemory(max_history_tokens=settings.CHAT_MEMORY_MAX_TOKENS)
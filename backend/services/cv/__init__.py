@@ -1,7 +1,24 @@
-"""CV services package initialization."""
-from .cnic_ocr import cnic_ocr_service
-from .face_matcher import face_match_service
-from .liveness_detection import liveness_service
-from .didit_liveness_service import didit_liveness_service
+"""CV services package initialization.
+
+Services are imported on first attribute access so that importing the package
+does not pull in DeepFace/TensorFlow, EasyOCR or MediaPipe.
+"""
+import importlib
+
+_SERVICE_MODULES = {
+    "cnic_ocr_service": ".cnic_ocr",
+    "face_match_service": ".face_matcher",
+    "liveness_service": ".liveness_detection",
+    "didit_liveness_service": ".didit_liveness_service",
+}
 
 __all__ = ["cnic_ocr_service", "face_match_service", "liveness_service", "didit_liveness_service"]
+
+
+def __getattr__(name):
+    module_name = _SERVICE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    service = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = service
+    return service
@@ -2,7 +2,6 @@
 CNIC OCR extraction service using EasyOCR.
 Extracts text from Pakistani CNIC front and back images.
 """
-import easyocr
 import cv2
 import re
 import numpy as np
@@ -11,6 +10,7 @@ import traceback
 from typing import Dict, Optional, Tuple, List
 from PIL import Image
 from datetime import datetime
+from services.model_registry import model_registry
 
 # Patch for Pillow 10+ compatibility (ANTIALIAS was removed)
 if not hasattr(Image, 'ANTIALIAS'):
@@ -21,16 +21,18 @@ class CNICOCRService:
     """Service for extracting data from Pakistani CNIC using OCR."""
     
     def __init__(self):
-        """Initialize EasyOCR reader."""
-        # Initialize reader for English and Urdu
-        self.reader = easyocr.Reader(['en', 'ur'], gpu=False)
-        
+        """Initialize OCR patterns (the EasyOCR reader is loaded on first use)."""
         # CNIC number pattern (XXXXX-XXXXXXX-X)
         self.cnic_pattern = re.compile(r'\d{5}-\d{7}-\d')
         
         # Date pattern (DD.MM.YYYY or DD/MM/YYYY)
         self.date_pattern = re.compile(r'\d{2}[./]\d{2}[./]\d{4}')
     
+    @property
+    def reader(self):
+        """EasyOCR reader for English and Urdu."""
+        return model_registry.get("easyocr")
+    
     def preprocess_image(self, image_path: str) -> np.ndarray:
         """
         Preprocess image for better OCR results.
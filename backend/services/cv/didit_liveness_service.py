@@ -2,10 +2,17 @@
 DIDIT API service for face liveness detection.
 Provides professional-grade liveness verification with anti-spoofing.
 """
+import asyncio
+import time
+import uuid
 import requests
+import httpx
 import os
-from typing import Tuple, Dict, Optional
+from typing import Awaitable, Callable, Tuple, Dict, Optional
 import json
+from services.circuit_breaker import CircuitBreaker
+
+LivenessResult = Tuple[bool, float, Dict]
 
 
 class DiditLivenessService:
@@ -27,6 +34,119 @@ class DiditLivenessService:
             'liveness': f'{self.api_base_url}/v1/liveness',
             'verify': f'{self.api_base_url}/v1/liveness/verify'
         }
+        
+        # Async client and hedging policy
+        self.timeout = float(os.getenv('DIDIT_TIMEOUT_SECONDS', '60'))
+        self.upload_chunk_size = int(os.getenv('DIDIT_UPLOAD_CHUNK_KB', '256')) * 1024
+        self.hedge_enabled = os.getenv('DIDIT_HEDGE_ENABLED', 'true').lower() == 'true'
+        self.hedge_delay = float(os.getenv('DIDIT_HEDGE_DELAY_SECONDS', '5'))
+        self.local_accept_score = float(os.getenv('DIDIT_HEDGE_LOCAL_MIN_SCORE', '0.7'))
+        self.breaker = CircuitBreaker(
+            'didit',
+            failure_threshold=int(os.getenv('DIDIT_BREAKER_FAILURES', '3')),
+            recovery_timeout=float(os.getenv('DIDIT_BREAKER_RECOVERY_SECONDS', '60'))
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+    
+    def is_available(self) -> bool:
+        """Whether DIDIT is configured and its circuit is not open."""
+        return self.enabled and bool(self.api_key) and self.breaker.state != CircuitBreaker.OPEN
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared async client, creating it for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=5.0))
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared async client."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    @staticmethod
+    def _multipart_parts(video_path: str, boundary: str) -> Tuple[bytes, bytes]:
+        """Multipart/form-data bytes before and after the video content."""
+        head = (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="video"; filename="{os.path.basename(video_path)}"\r\n'
+            f'Content-Type: video/webm\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        return head, tail
+    
+    async def _multipart_video(self, video_path: str, head: bytes, tail: bytes):
+        """Yield the multipart body, reading the video from disk in chunks."""
+        yield head
+        with open(video_path, 'rb') as video_file:
+            while True:
+                chunk = await asyncio.to_thread(video_file.read, self.upload_chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        yield tail
+    
+    async def upload_video_async(self, video_path: str) -> Optional[Dict]:
+        """
+        Upload video to DIDIT with the async client, streaming it from disk.
+        
+        Args:
+            video_path: Path to liveness video file
+            
+        Returns:
+            DIDIT API response dictionary or None on error
+        """
+        if not self.enabled or not self.api_key:
+            print("DIDIT API is disabled or API key not configured")
+            return None
+        
+        if not self.breaker.allow_request():
+            print("DIDIT circuit is open, skipping API")
+            return None
+        
+        boundary = uuid.uuid4().hex
+        head, tail = self._multipart_parts(video_path, boundary)
+        
+        try:
+            # Content-Length is known up front, so the body streams without chunked encoding
+            headers = {
+                'Authorization': f'Bearer {self.api_key}',
+                'Content-Type': f'multipart/form-data; boundary={boundary}',
+                'Content-Length': str(len(head) + os.path.getsize(video_path) + len(tail))
+            }
+            response = await self._get_client().post(
+                self.endpoints['liveness'],
+                content=self._multipart_video(video_path, head, tail),
+                headers=headers
+            )
+        except (httpx.HTTPError, OSError) as e:
+            print(f"Error uploading video to DIDIT API: {e!r}")
+            self.breaker.record_failure()
+            return None
+        except BaseException:
+            # Cancelled (e.g. the local check won the hedge): return the probe slot
+            self.breaker.release()
+            raise
+        
+        if response.status_code == 200:
+            try:
+                result = response.json()
+            except ValueError as e:
+                print(f"DIDIT API returned invalid JSON: {e}")
+                self.breaker.record_failure()
+                return None
+            self.breaker.record_success()
+            return result
+        
+        print(f"DIDIT API request failed with status {response.status_code}")
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return None
     
     def upload_video_to_didit(self, video_path: str) -> Optional[Dict]:
         """
@@ -163,6 +283,77 @@ class DiditLivenessService:
             print("Falling back to MediaPipe")
             return self._fallback_to_mediapipe(video_path)
     
+    def _local_result_wins(self, result: LivenessResult) -> bool:
+        """Hedging policy: a local result only beats a pending DIDIT call if it is confidently live."""
+        is_live, confidence, details = result
+        return is_live and confidence >= self.local_accept_score and 'error' not in details
+    
+    async def check_liveness_async(
+        self,
+        video_path: str,
+        local_check: Callable[[], Awaitable[LivenessResult]]
+    ) -> LivenessResult:
+        """
+        Check liveness with DIDIT, racing the local analysis in hedged mode.
+        
+        The DIDIT upload starts immediately. In hedged mode the local check starts
+        after hedge_delay seconds (or at once if DIDIT fails first); a confidently
+        live local result returned while DIDIT is still pending wins. Otherwise
+        the DIDIT result is used, and the local result only if DIDIT fails.
+        
+        Args:
+            video_path: Path to liveness video file
+            local_check: Coroutine factory running the local (MediaPipe) analysis;
+                its exceptions propagate if DIDIT cannot answer either
+            
+        Returns:
+            Tuple of (is_live, confidence_score, details)
+        """
+        start_time = time.perf_counter()
+        
+        async def run_local() -> LivenessResult:
+            is_live, confidence, details = await local_check()
+            details['didit_used'] = False
+            details['fallback_method'] = 'MediaPipe'
+            return is_live, confidence, details
+        
+        def finish(result: LivenessResult, winner: str) -> LivenessResult:
+            result[2]['liveness_source'] = winner
+            result[2]['elapsed_seconds'] = round(time.perf_counter() - start_time, 3)
+            print(f"Liveness decided by {winner} in {result[2]['elapsed_seconds']}s")
+            return result
+        
+        if not self.is_available():
+            print("DIDIT API not available, using local liveness")
+            return finish(await run_local(), 'local')
+        
+        didit_task = asyncio.create_task(self.upload_video_async(video_path))
+        local_task: Optional[asyncio.Task] = None
+        
+        try:
+            if self.hedge_enabled:
+                done, _ = await asyncio.wait({didit_task}, timeout=self.hedge_delay)
+                if not done:
+                    print(f"DIDIT pending after {self.hedge_delay}s, starting local liveness")
+                    local_task = asyncio.create_task(run_local())
+                    done, _ = await asyncio.wait({didit_task, local_task}, return_when=asyncio.FIRST_COMPLETED)
+                    # A failed local check is not final: keep waiting for DIDIT
+                    if didit_task not in done and local_task.exception() is None:
+                        if self._local_result_wins(local_task.result()):
+                            didit_task.cancel()
+                            return finish(local_task.result(), 'local')
+            
+            response = await didit_task
+            if response is not None:
+                return finish(self.parse_didit_response(response), 'didit')
+            
+            print("DIDIT API failed, falling back to local liveness")
+            return finish(await (local_task or run_local()), 'local')
+        finally:
+            for task in (didit_task, local_task):
+                if task is not None and not task.done():
+                    task.cancel()
+    
     def _fallback_to_mediapipe(self, video_path: str) -> Tuple[bool, float, Dict]:
         """
         Fallback to MediaPipe-based liveness detection.
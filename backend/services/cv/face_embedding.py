@@ -0,0 +1,223 @@
+"""
+Face embedding backends for FaceMatchService.
+DeepFace (VGG-Face on TensorFlow) is the reference backend; the ONNX Runtime
+backend runs a compact ArcFace/MobileFaceNet-class model on CPU with batching.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+
+from services.model_registry import model_registry
+
+ImageInput = Union[str, np.ndarray]
+
+
+class FaceEmbeddingBackend(ABC):
+    """Interface: turn face images into embedding vectors."""
+
+    name = "base"
+
+    def embed(self, image: ImageInput) -> Optional[np.ndarray]:
+        """
+        Embed the (first) face in one image.
+
+        Args:
+            image: Path to image file or BGR array
+
+        Returns:
+            Embedding as a float32 vector, or None if no face is found
+        """
+        return self.embed_batch([image])[0]
+
+    @abstractmethod
+    def embed_batch(self, images: Sequence[ImageInput]) -> List[Optional[np.ndarray]]:
+        """Embed several images; entries are None where no face was found."""
+
+
+class DeepFaceBackend(FaceEmbeddingBackend):
+    """DeepFace.represent with the configured model (TensorFlow)."""
+
+    name = "deepface"
+
+    def __init__(self, model_name: str = 'VGG-Face', detector_backend: str = 'opencv'):
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+
+    def embed_batch(self, images: Sequence[ImageInput]) -> List[Optional[np.ndarray]]:
+        deepface = model_registry.get("deepface")
+        embeddings = []
+        # DeepFace.represent takes one image at a time
+        for image in images:
+            try:
+                representations = deepface.represent(
+                    img_path=image,
+                    model_name=self.model_name,
+                    detector_backend=self.detector_backend,
+                    enforce_detection=True
+                )
+            except ValueError as e:
+                print(f"Face embedding error: {e}")
+                representations = None
+            embeddings.append(
+                np.asarray(representations[0]['embedding'], dtype=np.float32) if representations else None
+            )
+        return embeddings
+
+
+class OnnxFaceBackend(FaceEmbeddingBackend):
+    """
+    ONNX Runtime CPU backend for ArcFace/MobileFaceNet-style models
+    (112x112 RGB input normalized to [-1, 1], one embedding per face).
+
+    Faces are located with OpenCV's Haar cascade, the same detector DeepFace's
+    'opencv' backend uses, and cropped with a small margin (no landmark alignment).
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, intra_op_threads: int = 1, input_size: int = 112, face_margin: float = 0.1):
+        """
+        Initialize ONNX backend (the session is created on first use).
+
+        Args:
+            model_path: Path to the .onnx model
+            intra_op_threads: ONNX Runtime intra-op thread count per worker process
+            input_size: Square model input size in pixels
+            face_margin: Extra margin around the detected face box (fraction of its size)
+        """
+        self.model_path = model_path
+        self.intra_op_threads = intra_op_threads
+        self.input_size = input_size
+        self.face_margin = face_margin
+        self._detector = None
+
+    def create_session(self):
+        """Build the ONNX Runtime session (used as the model registry loader)."""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return ort.InferenceSession(self.model_path, sess_options=options, providers=['CPUExecutionProvider'])
+
+    @property
+    def session(self):
+        return model_registry.get("face_onnx")
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            self._detector = cv2.CascadeClassifier(
+                os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+            )
+        return self._detector
+
+    def crop_face(self, image: ImageInput) -> Optional[np.ndarray]:
+        """Return the largest detected face (BGR, with margin), or None."""
+        img = cv2.imread(image) if isinstance(image, str) else image
+        if img is None:
+            return None
+
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        faces = self.detector.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(40, 40))
+        if len(faces) == 0:
+            return None
+
+        x, y, w, h = max(faces, key=lambda box: box[2] * box[3])
+        margin_x, margin_y = int(w * self.face_margin), int(h * self.face_margin)
+        height, width = img.shape[:2]
+        return img[max(0, y - margin_y):min(height, y + h + margin_y),
+                   max(0, x - margin_x):min(width, x + w + margin_x)]
+
+    def embed_batch(self, images: Sequence[ImageInput]) -> List[Optional[np.ndarray]]:
+        crops = [self.crop_face(image) for image in images]
+        indices = [i for i, crop in enumerate(crops) if crop is not None]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(crops)
+        if not indices:
+            return embeddings
+
+        # One session.run for all faces: (N, 112, 112, 3) RGB in [-1, 1]
+        batch = np.stack([
+            cv2.resize(crops[i], (self.input_size, self.input_size), interpolation=cv2.INTER_AREA)
+            for i in indices
+        ])[..., ::-1].astype(np.float32)
+        batch = (batch - 127.5) / 127.5
+
+        session = self.session
+        model_input = session.get_inputs()[0]
+        if len(model_input.shape) == 4 and model_input.shape[1] == 3:
+            batch = batch.transpose(0, 3, 1, 2)
+        outputs = session.run(None, {model_input.name: np.ascontiguousarray(batch)})[0]
+
+        for i, vector in zip(indices, outputs):
+            embeddings[i] = np.asarray(vector, dtype=np.float32).ravel()
+        return embeddings
+
+
+class ScoreCalibration:
+    """
+    Maps a backend's raw cosine similarity onto the reference (VGG-Face) score scale.
+
+    Piecewise linear through (0, 0), (raw_threshold, target_threshold) and (1, 1),
+    so a raw score passes the calibrated raw_threshold exactly when the mapped
+    score passes FACE_MATCH_THRESHOLD.
+    """
+
+    def __init__(self, raw_threshold: Optional[float] = None, target_threshold: Optional[float] = None):
+        self.raw_threshold = raw_threshold
+        self.target_threshold = target_threshold
+
+    @classmethod
+    def load(cls, path: Optional[str], backend_name: str) -> "ScoreCalibration":
+        """Load a calibration file written by scripts/calibrate_face_backend.py (identity if absent)."""
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get('backend') != backend_name:
+            print(f"Face score calibration is for '{data.get('backend')}', not '{backend_name}'; ignoring it")
+            return cls()
+        return cls(data['raw_threshold'], data['target_threshold'])
+
+    def apply(self, raw_similarity: float) -> float:
+        if self.raw_threshold is None or self.target_threshold is None:
+            return raw_similarity
+        raw, t_raw, t_target = float(np.clip(raw_similarity, 0.0, 1.0)), self.raw_threshold, self.target_threshold
+        if raw <= t_raw:
+            return raw / t_raw * t_target if t_raw > 0 else t_target
+        return t_target + (raw - t_raw) / (1 - t_raw) * (1 - t_target) if t_raw < 1 else 1.0
+
+
+def cosine_similarity(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two (N, D) arrays (or two vectors)."""
+    a = np.atleast_2d(a).astype(np.float32)
+    b = np.atleast_2d(b).astype(np.float32)
+    denom = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.divide(np.sum(a * b, axis=1), denom, out=np.zeros(len(a), dtype=np.float32), where=denom > 0)
+
+
+def create_face_backend(name: str, model_name: str = 'VGG-Face', onnx_model_path: str = "",
+                        intra_op_threads: int = 1) -> FaceEmbeddingBackend:
+    """
+    Create the face embedding backend by name.
+
+    Args:
+        name: 'deepface' or 'onnx'
+        model_name: DeepFace model for the deepface backend
+        onnx_model_path: Model file for the onnx backend
+        intra_op_threads: ONNX Runtime intra-op threads
+
+    Returns:
+        Backend instance
+    """
+    if name == "onnx":
+        if not onnx_model_path:
+            print("FACE_ONNX_MODEL_PATH is not set, using the deepface backend")
+        else:
+            return OnnxFaceBackend(onnx_model_path, intra_op_threads=intra_op_threads)
+    return DeepFaceBackend(model_name=model_name)
@@ -2,26 +2,53 @@
 Face matching service using DeepFace.
 Compares selfie with CNIC photo to verify identity.
 """
-from deepface import DeepFace
+import base64
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import Tuple, Optional, Union
 import os
+from config import settings
+from security.encryption import encryption_service
+from services.cv.face_embedding import (
+    DeepFaceBackend,
+    FaceEmbeddingBackend,
+    ScoreCalibration,
+    cosine_similarity,
+    create_face_backend,
+)
+from services.image_context import ImageContext
+from services.model_registry import model_registry
 
 
 class FaceMatchService:
     """Service for matching faces using DeepFace."""
     
-    def __init__(self, threshold: float = 0.6):
+    MODEL_NAME = 'VGG-Face'  # Options: VGG-Face, Facenet, OpenFace, DeepFace, ArcFace
+    
+    def __init__(
+        self,
+        threshold: float = 0.6,
+        backend: Optional[FaceEmbeddingBackend] = None,
+        calibration: Optional[ScoreCalibration] = None
+    ):
         """
         Initialize face matching service.
         
         Args:
             threshold: Similarity threshold (0-1, higher is more similar)
+            backend: Face embedding backend (defaults to DeepFace VGG-Face)
+            calibration: Maps the backend's raw similarity onto the VGG-Face score scale
         """
         self.threshold = threshold
-        self.model_name = 'VGG-Face'  # Options: VGG-Face, Facenet, OpenFace, DeepFace, ArcFace
+        self.model_name = self.MODEL_NAME
         self.distance_metric = 'cosine'  # Options: cosine, euclidean, euclidean_l2
+        self.backend = backend or DeepFaceBackend(model_name=self.model_name)
+        self.calibration = calibration or ScoreCalibration()
+    
+    @property
+    def deepface(self):
+        """DeepFace module with the recognition model built (loaded on first use)."""
+        return model_registry.get("deepface")
     
     def extract_face(self, image_path: str) -> Optional[np.ndarray]:
         """
@@ -35,7 +62,7 @@ class FaceMatchService:
         """
         try:
             # Use DeepFace to extract face
-            face_objs = DeepFace.extract_faces(
+            face_objs = self.deepface.extract_faces(
                 img_path=image_path,
                 detector_backend='opencv',
                 enforce_detection=True
@@ -74,8 +101,16 @@ class FaceMatchService:
             if not os.path.exists(cnic_photo_path):
                 return False, 0.0, "CNIC photo not found"
             
+            if not isinstance(self.backend, DeepFaceBackend):
+                # Embed both faces in one batch and compare
+                selfie_embedding, cnic_embedding = self.backend.embed_batch([selfie_path, cnic_photo_path])
+                if selfie_embedding is None or cnic_embedding is None:
+                    return False, 0.0, "Face detection failed: no face found"
+                similarity = self.similarity_from_embeddings(selfie_embedding, cnic_embedding)
+                return similarity >= self.threshold, similarity, None
+            
             # Perform face verification
-            result = DeepFace.verify(
+            result = self.deepface.verify(
                 img1_path=selfie_path,
                 img2_path=cnic_photo_path,
                 model_name=self.model_name,
@@ -108,31 +143,147 @@ class FaceMatchService:
             # Other errors
             return False, 0.0, f"Face matching error: {str(e)}"
     
+    def compute_embedding(self, image: Union[str, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Compute the face embedding of the (first) face in an image.
+        
+        Args:
+            image: Path to image file or BGR array
+            
+        Returns:
+            Embedding as a float32 vector, or None if no face is found
+        """
+        return self.backend.embed(image)
+    
+    def embedding_path_for(self, face_path: str) -> str:
+        """Path of the encrypted embedding stored next to a face crop (per backend)."""
+        return f"{os.path.splitext(face_path)[0]}.{self.backend.name}.emb"
+    
+    def save_embedding(self, embedding: np.ndarray, path: str):
+        """
+        Store an embedding encrypted on disk (biometric template).
+        
+        Args:
+            embedding: Embedding vector
+            path: Output file path
+        """
+        payload = base64.b64encode(embedding.astype(np.float32).tobytes()).decode('ascii')
+        with open(path, 'w') as f:
+            f.write(encryption_service.encrypt(payload))
+    
+    def load_embedding(self, path: str) -> Optional[np.ndarray]:
+        """
+        Load an embedding stored by save_embedding.
+        
+        Args:
+            path: Embedding file path
+            
+        Returns:
+            Embedding vector, or None if missing or unreadable
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                payload = encryption_service.decrypt(f.read())
+            if not payload:
+                return None
+            return np.frombuffer(base64.b64decode(payload), dtype=np.float32)
+        except Exception as e:
+            # Corrupted or foreign file: callers fall back to matching the crop
+            print(f"Stored face embedding {path} unreadable: {e}")
+            return None
+    
+    def store_cnic_embedding(self, cnic_face_path: str) -> bool:
+        """
+        Embed the extracted CNIC face once so selfie attempts only embed the selfie.
+        
+        Args:
+            cnic_face_path: Path to the cropped CNIC face
+            
+        Returns:
+            True if the embedding was stored (failures are logged; the selfie
+            step then falls back to match_faces)
+        """
+        embedding_path = self.embedding_path_for(cnic_face_path)
+        try:
+            embedding = self.compute_embedding(cnic_face_path)
+            if embedding is not None:
+                self.save_embedding(embedding, embedding_path)
+                return True
+        except Exception as e:
+            print(f"CNIC face embedding error: {e}")
+        # Never leave an embedding from a previous upload next to a new crop
+        try:
+            if os.path.exists(embedding_path):
+                os.remove(embedding_path)
+        except OSError as e:
+            print(f"Could not remove stale face embedding {embedding_path}: {e}")
+        return False
+    
+    def similarity_from_embeddings(self, selfie_embedding: np.ndarray, cnic_embedding: np.ndarray) -> float:
+        """Similarity score (same scale as match_faces) between two embeddings."""
+        if self.distance_metric == 'cosine':
+            return self.calibration.apply(float(cosine_similarity(selfie_embedding, cnic_embedding)[0]))
+        distance = float(np.linalg.norm(selfie_embedding - cnic_embedding))
+        return 1 / (1 + distance)
+    
+    def match_selfie_embedding(
+        self,
+        selfie_path: str,
+        cnic_embedding: np.ndarray
+    ) -> Tuple[bool, float, Optional[str]]:
+        """
+        Match a selfie against a precomputed CNIC face embedding.
+        
+        Only the selfie is detected and embedded; the comparison is a vector operation.
+        
+        Args:
+            selfie_path: Path to selfie image
+            cnic_embedding: Embedding from store_cnic_embedding
+            
+        Returns:
+            Tuple of (is_match, similarity_score, error_message)
+        """
+        try:
+            if not os.path.exists(selfie_path):
+                return False, 0.0, "Selfie image not found"
+            
+            selfie_embedding = self.compute_embedding(selfie_path)
+            if selfie_embedding is None:
+                return False, 0.0, "Face detection failed: no face found in selfie"
+            
+            similarity = self.similarity_from_embeddings(selfie_embedding, cnic_embedding)
+            return similarity >= self.threshold, similarity, None
+        
+        except Exception as e:
+            return False, 0.0, f"Face matching error: {str(e)}"
+    
     def extract_face_from_cnic(
         self,
-        cnic_front_path: str,
+        cnic_front: Union[str, ImageContext],
         output_path: str
     ) -> bool:
         """
         Extract face region from CNIC front image and save it.
         
         Args:
-            cnic_front_path: Path to CNIC front image
+            cnic_front: Path to CNIC front image or its decoded image context
             output_path: Path to save extracted face
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Read CNIC image
-            img = cv2.imread(cnic_front_path)
+            # Decoded CNIC image (shared with OCR when a context is passed)
+            img = ImageContext.ensure(cnic_front).bgr
             
             if img is None:
                 return False
             
-            # Use DeepFace to detect face
-            face_objs = DeepFace.extract_faces(
-                img_path=cnic_front_path,
+            # Use DeepFace to detect face on the already decoded array
+            face_objs = self.deepface.extract_faces(
+                img_path=img,
                 detector_backend='opencv',
                 enforce_detection=True
             )
@@ -168,7 +319,7 @@ class FaceMatchService:
         """
         try:
             # Try to detect face
-            face_objs = DeepFace.extract_faces(
+            face_objs = self.deepface.extract_faces(
                 img_path=image_path,
                 detector_backend='opencv',
                 enforce_detection=True
@@ -193,4 +344,16 @@ class FaceMatchService:
 
 
 # Global face match service instance
-face_match_service = FaceMatchService()
+face_match_service = FaceMatchService(
+    threshold=settings.FACE_MATCH_THRESHOLD,
+    backend=create_face_backend(
+        settings.FACE_EMBEDDING_BACKEND,
+        model_name=FaceMatchService.MODEL_NAME,
+        onnx_model_path=settings.FACE_ONNX_MODEL_PATH,
+        intra_op_threads=settings.FACE_ONNX_THREADS
+    )
+)
+face_match_service.calibration = ScoreCalibration.load(
+    settings.FACE_SCORE_CALIBRATION_PATH,
+    face_match_service.backend.name
+)
@@ -0,0 +1,148 @@
+"""
+Bounded pool of MediaPipe FaceMesh graphs.
+A FaceMesh in video mode tracks faces across frames, so one instance must never
+be shared by overlapping liveness checks. Each video checks out its own graph,
+which is reset before it goes back to the pool.
+"""
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class FaceMeshPoolExhausted(Exception):
+    """Raised when no FaceMesh graph becomes free within the checkout timeout."""
+
+
+def create_face_mesh():
+    """Create a FaceMesh graph configured for liveness videos."""
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1,
+        refine_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5
+    )
+
+
+class FaceMeshPool:
+    """Thread-safe pool of FaceMesh graphs, created lazily up to max_size."""
+
+    def __init__(self, max_size: int, factory: Callable[[], Any] = create_face_mesh):
+        """
+        Initialize FaceMesh pool.
+
+        Args:
+            max_size: Maximum number of graphs in this process
+            factory: Zero-argument callable that builds one graph
+        """
+        self.max_size = max(1, max_size)
+        self.factory = factory
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._stats = {"checkouts": 0, "waits": 0, "timeouts": 0, "resets": 0, "recreated": 0}
+
+    def warm(self, count: int = 1):
+        """Create up to count graphs ahead of the first request."""
+        graphs = []
+        for _ in range(min(count, self.max_size)):
+            graph = self._try_create()
+            if graph is None:
+                break
+            graphs.append(graph)
+        for graph in graphs:
+            self._idle.put(graph)
+
+    def _try_create(self) -> Optional[Any]:
+        with self._lock:
+            if self._created >= self.max_size:
+                return None
+            self._created += 1
+        try:
+            return self.factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        graph = self._try_create()
+        if graph is not None:
+            return graph
+
+        with self._lock:
+            self._stats["waits"] += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._stats["timeouts"] += 1
+            raise FaceMeshPoolExhausted(f"No FaceMesh graph free within {timeout}s ({self.max_size} in use)")
+
+    def _release(self, graph: Any):
+        """Reset tracking state and return the graph; replace it if the reset fails."""
+        try:
+            graph.reset()
+            with self._lock:
+                self._stats["resets"] += 1
+        except Exception as e:
+            logger.warning(f"FaceMesh reset failed, recreating graph: {e}")
+            try:
+                graph.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+                self._stats["recreated"] += 1
+            # Replace it now so a caller waiting on the queue is not starved
+            try:
+                graph = self._try_create()
+            except Exception as create_error:
+                logger.error(f"Could not recreate FaceMesh graph: {create_error}")
+                return
+            if graph is None:
+                return
+        self._idle.put(graph)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Borrow a graph for one video.
+
+        Args:
+            timeout: Seconds to wait for a free graph (None waits indefinitely)
+
+        Raises:
+            FaceMeshPoolExhausted: If no graph is free in time
+        """
+        graph = self._acquire(timeout)
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+        try:
+            yield graph
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._release(graph)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool size, usage and counters."""
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "created": self._created,
+                "in_use": self._in_use,
+                **self._stats
+            }
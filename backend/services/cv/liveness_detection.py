@@ -3,23 +3,42 @@ Liveness detection service using MediaPipe for Pakistani eKYC.
 Detects blinks and head movements to ensure the user is real.
 """
 import cv2
-import mediapipe as mp
 import numpy as np
 from typing import Tuple, Dict, List
 import time
+from config import settings
+from services.cv.face_mesh_pool import FaceMeshPoolExhausted
+from services.model_registry import model_registry
 
 class LivenessDetectionService:
     """Service for detecting liveness in videos."""
     
-    def __init__(self):
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(
+        self,
+        sample_fps: float = 15.0,
+        max_side: int = 480,
+        max_frames: int = 120,
+        time_budget: float = 15.0,
+        early_exit: bool = True,
+        early_exit_score: float = 0.7
+    ):
+        """
+        Initialize liveness detection service.
+        
+        Args:
+            sample_fps: Frames per second of video analyzed with FaceMesh
+            max_side: Longest side frames are downscaled to before FaceMesh
+            max_frames: Maximum frames analyzed per video
+            time_budget: Maximum seconds spent analyzing one video
+            early_exit: Stop as soon as the result is settled
+            early_exit_score: Score at which a video with a blink is settled
+        """
+        self.sample_fps = sample_fps
+        self.max_side = max_side
+        self.max_frames = max_frames
+        self.time_budget = time_budget
+        self.early_exit = early_exit
+        self.early_exit_score = early_exit_score
         
         # Eyes landmarks (MediaPipe)
         self.LEFT_EYE = [362, 382, 381, 380, 374, 373, 390, 249, 263, 466, 388, 387, 386, 385, 384, 398]
@@ -29,64 +48,135 @@ class LivenessDetectionService:
         self.EYE_AR_THRESH = 0.2
         self.EYE_AR_CONSEC_FRAMES = 1
         
+        # EAR point indices per eye: top1, bottom1, top2, bottom2, inner, outer
+        self.EAR_POINTS = np.array([
+            [eye[12], eye[4], eye[14], eye[2], eye[8], eye[0]]
+            for eye in (self.LEFT_EYE, self.RIGHT_EYE)
+        ])
+        
+        self._camera_matrices: Dict[Tuple[int, int], np.ndarray] = {}
+    
+    # Landmarks analyzed together in one batched EAR / pose pass
+    BATCH_SIZE = 8
+    NUM_LANDMARKS = 478
+    
+    # 3D model points (arbitrary but representative) and matching MediaPipe landmarks:
+    # Nose tip 1, Chin 152, Left eye left corner 33, Right eye right corner 263,
+    # Left mouth corner 61, Right mouth corner 291
+    MODEL_POINTS = np.array([
+        (0.0, 0.0, 0.0),
+        (0.0, -330.0, -65.0),
+        (-225.0, 170.0, -135.0),
+        (225.0, 170.0, -135.0),
+        (-150.0, -150.0, -125.0),
+        (150.0, -150.0, -125.0)
+    ])
+    POSE_LANDMARKS = [1, 152, 33, 263, 61, 291]
+    DIST_COEFFS = np.zeros((4, 1))  # Assuming no lens distortion
+    
+    @property
+    def face_mesh_pool(self):
+        """Pool of MediaPipe FaceMesh graphs for this process (created on first use)."""
+        return model_registry.get("face_mesh")
+    
+    def compute_ear_batch(self, landmarks: np.ndarray) -> np.ndarray:
+        """
+        Eye Aspect Ratio for many frames at once (mean of both eyes).
+        
+        Args:
+            landmarks: (frames, 478, 3) normalized landmark array
+            
+        Returns:
+            (frames,) EAR values
+        """
+        # (frames, 2 eyes, 6 points, 3): top1, bottom1, top2, bottom2, inner, outer
+        points = landmarks[:, self.EAR_POINTS, :]
+        dist_v1 = np.linalg.norm(points[:, :, 0] - points[:, :, 1], axis=-1)
+        dist_v2 = np.linalg.norm(points[:, :, 2] - points[:, :, 3], axis=-1)
+        dist_h = np.linalg.norm(points[:, :, 4] - points[:, :, 5], axis=-1)
+        ear = (dist_v1 + dist_v2) / (2.0 * np.maximum(dist_h, 1e-6))
+        return ear.mean(axis=1)
+    
     def get_ear(self, landmarks, eye_indices):
-        """Calculate Eye Aspect Ratio (EAR)."""
-        # Vertical distances
-        p1 = landmarks[eye_indices[12]] # Top
-        p2 = landmarks[eye_indices[4]]  # Bottom
-        p3 = landmarks[eye_indices[14]] # Top
-        p4 = landmarks[eye_indices[2]]  # Bottom
-        
-        # Horizontal distance
-        p5 = landmarks[eye_indices[8]]  # Inner
-        p6 = landmarks[eye_indices[0]]  # Outer
-        
-        dist_v1 = np.linalg.norm(np.array(p1) - np.array(p2))
-        dist_v2 = np.linalg.norm(np.array(p3) - np.array(p4))
-        dist_h = np.linalg.norm(np.array(p5) - np.array(p6))
-        
-        ear = (dist_v1 + dist_v2) / (2.0 * dist_h)
-        return ear
+        """Calculate Eye Aspect Ratio (EAR) for one eye of one frame."""
+        points = np.asarray(landmarks, dtype=np.float32)[[
+            eye_indices[12], eye_indices[4],  # Top, Bottom
+            eye_indices[14], eye_indices[2],  # Top, Bottom
+            eye_indices[8], eye_indices[0]    # Inner, Outer
+        ]]
+        dist_v1 = np.linalg.norm(points[0] - points[1])
+        dist_v2 = np.linalg.norm(points[2] - points[3])
+        dist_h = np.linalg.norm(points[4] - points[5])
+        return (dist_v1 + dist_v2) / (2.0 * dist_h)
+    
+    def _camera_matrix(self, img_w: int, img_h: int) -> np.ndarray:
+        """Approximate pinhole camera matrix, cached per frame size."""
+        key = (img_w, img_h)
+        if key not in self._camera_matrices:
+            self._camera_matrices[key] = np.array([
+                [img_w, 0, img_w / 2],
+                [0, img_w, img_h / 2],
+                [0, 0, 1]
+            ], dtype="double")
+        return self._camera_matrices[key]
 
     def get_head_pose(self, landmarks, img_w, img_h):
-        """Estimate head pose using face landmarks."""
-        # 3D model points (arbitrary but representative)
-        model_points = np.array([
-            (0.0, 0.0, 0.0),             # Nose tip
-            (0.0, -330.0, -65.0),        # Chin
-            (-225.0, 170.0, -135.0),     # Left eye left corner
-            (225.0, 170.0, -135.0),      # Right eye right corner
-            (-150.0, -150.0, -125.0),    # Left Mouth corner
-            (150.0, -150.0, -125.0)      # Right mouth corner
-        ])
-
-        # 2D image points from MediaPipe
-        # Nose: 1, Chin: 152, Left Eye Left: 33, Right Eye Right: 263, Left Mouth: 61, Right Mouth: 291
-        image_points = np.array([
-            (landmarks[1][0] * img_w, landmarks[1][1] * img_h),
-            (landmarks[152][0] * img_w, landmarks[152][1] * img_h),
-            (landmarks[33][0] * img_w, landmarks[33][1] * img_h),
-            (landmarks[263][0] * img_w, landmarks[263][1] * img_h),
-            (landmarks[61][0] * img_w, landmarks[61][1] * img_h),
-            (landmarks[291][0] * img_w, landmarks[291][1] * img_h)
-        ], dtype="double")
-
-        camera_matrix = np.array([
-            [img_w, 0, img_w / 2],
-            [0, img_w, img_h / 2],
-            [0, 0, 1]
-        ], dtype="double")
+        """Estimate head pose (rotation vector) using face landmarks."""
+        # 2D image points from MediaPipe (Nose, Chin, Eye corners, Mouth corners)
+        image_points = np.asarray(landmarks, dtype="double")[self.POSE_LANDMARKS, :2] * (img_w, img_h)
 
-        dist_coeffs = np.zeros((4, 1)) # Assuming no lens distortion
         (success, rotation_vector, translation_vector) = cv2.solvePnP(
-            model_points, image_points, camera_matrix, dist_coeffs, flags=cv2.SOLVEPNP_ITERATIVE
+            self.MODEL_POINTS, image_points, self._camera_matrix(img_w, img_h), self.DIST_COEFFS,
+            flags=cv2.SOLVEPNP_ITERATIVE
         )
         
         return rotation_vector
 
+    def _decision(self, blink_count: int, poses: np.ndarray) -> Tuple[bool, float, float]:
+        """Liveness decision from the evidence collected so far: (is_live, score, pose_variance)."""
+        # Calculate movement variance in poses
+        pose_variance = 0.0
+        if len(poses) > 5:
+            pose_variance = float(np.var(poses, axis=0).sum())
+
+        # Robust Liveness logic: Require at least 1 blink OR significant head movement
+        is_live = blink_count >= 1 or pose_variance > 0.005
+        liveness_score = min(0.99, (blink_count * 0.3) + (pose_variance * 50))
+        
+        if not is_live: liveness_score = 0.1
+        
+        return is_live, liveness_score, pose_variance
+
     def check_liveness(self, video_path: str) -> Tuple[bool, float, Dict]:
         """
-        Improved liveness check (blinks + head movement pose).
+        Liveness check on a FaceMesh graph checked out for this video only.
+        
+        Args:
+            video_path: Path to liveness video file
+            
+        Returns:
+            Tuple of (is_live, liveness_score, details)
+        """
+        try:
+            with self.face_mesh_pool.checkout(timeout=self.time_budget) as face_mesh:
+                return self._analyze_video(video_path, face_mesh)
+        except FaceMeshPoolExhausted as e:
+            return False, 0.0, {"error": str(e)}
+    
+    def _analyze_video(self, video_path: str, face_mesh) -> Tuple[bool, float, Dict]:
+        """
+        Streaming liveness check (blinks + head movement pose).
+        
+        Frames are sampled at sample_fps (skipped frames are only grabbed, not
+        converted), downscaled to max_side before FaceMesh, and analysis stops as
+        soon as a blink has been seen and the score reaches early_exit_score, or
+        when the frame/time budget is used up.
+        
+        Args:
+            video_path: Path to liveness video file
+            
+        Returns:
+            Tuple of (is_live, liveness_score, details)
         """
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
@@ -94,61 +184,121 @@ class LivenessDetectionService:
             
         blink_count = 0
         eye_closed = False
-        poses = []
-        frames_processed = 0
+        frames_decoded = 0
+        frames_analyzed = 0
+        faces_detected = 0
+        stop_reason = "end_of_video"
         
-        img_w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        img_h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Browser .webm often has no seek index and reports bogus FPS, so sample by
+        # presentation timestamp and fall back to a frame stride when there is none
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_stride = max(1, int(round(fps / self.sample_fps))) if 0 < fps < 240 else 2
+        sample_interval_ms = 1000.0 / self.sample_fps
+        next_sample_ms = 0.0
+        start_time = time.perf_counter()
+        
+        # Landmarks of every frame with a face, filled in place; EAR and pose are
+        # computed per batch of BATCH_SIZE rows
+        landmarks = np.empty((self.max_frames, self.NUM_LANDMARKS, 3), dtype=np.float32)
+        poses = np.empty((self.max_frames, 3), dtype=np.float64)
+        processed = 0
+        
+        def process_batch(end: int, size: Tuple[int, int]) -> None:
+            nonlocal processed, blink_count, eye_closed
+            if end == processed:
+                return
+            batch = landmarks[processed:end]
+            
+            # Blinks: an eye that was closed (EAR below threshold) and opens again
+            closed = self.compute_ear_batch(batch) < self.EYE_AR_THRESH
+            previous = np.concatenate(([eye_closed], closed[:-1]))
+            blink_count += int(np.count_nonzero(previous & ~closed))
+            eye_closed = bool(closed[-1])
+            
+            # Head Pose
+            for i in range(processed, end):
+                poses[i] = self.get_head_pose(landmarks[i], *size).ravel()
+            processed = end
 
-        while cap.isOpened():
-            ret, frame = cap.read()
+        while True:
+            if not cap.grab():
+                break
+            frames_decoded += 1
+            
+            position_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            if position_ms > 0:
+                # 1ms tolerance for timestamp rounding; never fall behind the schedule
+                if position_ms + 1.0 < next_sample_ms:
+                    continue
+                next_sample_ms = max(next_sample_ms + sample_interval_ms, position_ms)
+            elif (frames_decoded - 1) % frame_stride != 0:
+                continue
+            
+            ret, frame = cap.retrieve()
             if not ret:
                 break
-                
-            frames_processed += 1
-            if frames_processed % 2 != 0: continue # Skip frames for speed
+            
+            # Downscale before FaceMesh; landmarks are normalized so pose uses the small size
+            img_h, img_w = frame.shape[:2]
+            scale = self.max_side / max(img_h, img_w)
+            if scale < 1.0:
+                img_w, img_h = int(img_w * scale), int(img_h * scale)
+                frame = cv2.resize(frame, (img_w, img_h), interpolation=cv2.INTER_AREA)
             
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.face_mesh.process(rgb_frame)
+            results = face_mesh.process(rgb_frame)
+            frames_analyzed += 1
             
             if results.multi_face_landmarks:
-                face_landmarks = results.multi_face_landmarks[0]
-                landmarks = [(lm.x, lm.y, lm.z) for lm in face_landmarks.landmark]
+                face_landmarks = results.multi_face_landmarks[0].landmark
+                # Fill the preallocated row column by column (no per-frame tuple list)
+                row = landmarks[faces_detected]
+                row[:, 0] = np.fromiter((lm.x for lm in face_landmarks), np.float32, count=self.NUM_LANDMARKS)
+                row[:, 1] = np.fromiter((lm.y for lm in face_landmarks), np.float32, count=self.NUM_LANDMARKS)
+                row[:, 2] = np.fromiter((lm.z for lm in face_landmarks), np.float32, count=self.NUM_LANDMARKS)
+                faces_detected += 1
                 
-                # Head Pose
-                rot_vec = self.get_head_pose(landmarks, img_w, img_h)
-                poses.append(rot_vec.flatten())
-                
-                # Blinks
-                ear = (self.get_ear(landmarks, self.LEFT_EYE) + self.get_ear(landmarks, self.RIGHT_EYE)) / 2.0
-                if ear < self.EYE_AR_THRESH:
-                    eye_closed = True
-                else:
-                    if eye_closed:
-                        blink_count += 1
-                        eye_closed = False
+                if faces_detected - processed >= self.BATCH_SIZE:
+                    process_batch(faces_detected, (img_w, img_h))
+                    
+                    # A blink can't be un-seen, so once the score is high enough the result is settled
+                    if self.early_exit and blink_count >= 1:
+                        if self._decision(blink_count, poses[:processed])[1] >= self.early_exit_score:
+                            stop_reason = "early_exit"
+                            break
+            
+            if frames_analyzed >= self.max_frames:
+                stop_reason = "frame_budget"
+                break
+            if time.perf_counter() - start_time > self.time_budget:
+                stop_reason = "time_budget"
+                break
             
         cap.release()
         
-        # Calculate movement variance in poses
-        pose_variance = 0.0
-        if len(poses) > 5:
-            poses_np = np.array(poses)
-            pose_variance = float(np.var(poses_np, axis=0).sum())
-
-        # Robust Liveness logic: Require at least 1 blink OR significant head movement
-        is_live = blink_count >= 1 or pose_variance > 0.005
-        liveness_score = min(0.99, (blink_count * 0.3) + (pose_variance * 50))
-        
-        if not is_live: liveness_score = 0.1
+        if faces_detected:
+            process_batch(faces_detected, (img_w, img_h))
+        is_live, liveness_score, pose_variance = self._decision(blink_count, poses[:processed])
 
         details = {
             "blinks": blink_count,
             "movement_variance": pose_variance,
-            "frames": frames_processed
+            "frames": frames_decoded,
+            "frames_decoded": frames_decoded,
+            "frames_analyzed": frames_analyzed,
+            "faces_detected": faces_detected,
+            "stop_reason": stop_reason,
+            "analysis_seconds": round(time.perf_counter() - start_time, 3)
         }
         
         return is_live, liveness_score, details
 
 # Global service instance
-liveness_service = LivenessDetectionService()
+liveness_service = LivenessDetectionService(
+    sample_fps=settings.LIVENESS_SAMPLE_FPS,
+    max_side=settings.LIVENESS_FRAME_MAX_SIDE,
+    max_frames=settings.LIVENESS_MAX_FRAMES,
+    time_budget=settings.LIVENESS_TIME_BUDGET_SECONDS,
+    early_exit=settings.LIVENESS_EARLY_EXIT,
+    early_exit_score=settings.LIVENESS_CONFIDENCE_THRESHOLD
+)
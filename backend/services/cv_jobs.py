@@ -0,0 +1,71 @@
+"""
+Module-level CV/OCR job functions executed by the CV worker pool.
+Each function runs inside a worker process against that process's service instances,
+so arguments and return values must stay picklable (paths, dicts, tuples).
+"""
+from typing import Dict, Optional, Tuple
+
+from services.cv import face_match_service, liveness_service
+from services.image_context import ImageContext
+from services.image_normalizer import image_normalizer, NormalizedImage
+from services.ocr_service import tesseract_ocr_service
+
+
+def normalize_image(image_path: str, purpose: str) -> NormalizedImage:
+    """EXIF-rotate, downscale and recompress an upload for the given purpose."""
+    return image_normalizer.normalize(image_path, purpose)
+
+
+def tesseract_process_front(image_path: str) -> Dict[str, Optional[str]]:
+    """Extract CNIC front fields with Tesseract."""
+    return tesseract_ocr_service.process_front_image(image_path)
+
+
+def tesseract_process_back(image_path: str) -> Dict[str, Optional[str]]:
+    """Extract CNIC back fields with Tesseract."""
+    return tesseract_ocr_service.process_back_image(image_path)
+
+
+def tesseract_process_front_with_face(image_path: str, face_output_path: str) -> Tuple[Dict[str, Optional[str]], bool]:
+    """Extract CNIC front fields and crop the portrait from a single decode of the image."""
+    image = ImageContext(image_path)
+    ocr_data = tesseract_ocr_service.process_front_image(image)
+    face_extracted = face_match_service.extract_face_from_cnic(image, face_output_path)
+    if face_extracted:
+        face_match_service.store_cnic_embedding(face_output_path)
+    return ocr_data, face_extracted
+
+
+def extract_cnic_face(front_path: str, output_path: str) -> bool:
+    """Crop the portrait from the CNIC front image and store its embedding."""
+    face_extracted = face_match_service.extract_face_from_cnic(front_path, output_path)
+    if face_extracted:
+        face_match_service.store_cnic_embedding(output_path)
+    return face_extracted
+
+
+def match_faces(selfie_path: str, cnic_face_path: str) -> Tuple[bool, float, Optional[str]]:
+    """Compare a selfie with the extracted CNIC face."""
+    return face_match_service.match_faces(selfie_path, cnic_face_path)
+
+
+def match_selfie(selfie_path: str, cnic_face_path: str) -> Tuple[bool, float, Optional[str]]:
+    """Compare a selfie with the CNIC face, using the embedding stored at CNIC upload."""
+    embedding_path = face_match_service.embedding_path_for(cnic_face_path)
+    cnic_embedding = face_match_service.load_embedding(embedding_path)
+    if cnic_embedding is None:
+        # Uploaded before embeddings were stored (or embedding failed): embed the crop now
+        if face_match_service.store_cnic_embedding(cnic_face_path):
+            cnic_embedding = face_match_service.load_embedding(embedding_path)
+        if cnic_embedding is None:
+            return face_match_service.match_faces(selfie_path, cnic_face_path)
+    return face_match_service.match_selfie_embedding(selfie_path, cnic_embedding)
+
+
+def check_liveness_local(video_path: str) -> Tuple[bool, float, Dict]:
+    """Run local (MediaPipe) liveness detection; DIDIT is called from the API process."""
+    try:
+        return liveness_service.check_liveness(video_path)
+    except Exception as e:
+        print(f"Local liveness check failed: {e}")
+        return False, 0.0, {'error': str(e), 'fallback_failed': True}
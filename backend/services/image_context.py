@@ -0,0 +1,108 @@
+"""
+Per-request decoded image context.
+Reads and decodes an uploaded image once and memoizes the derived views
+(grayscale, resized, CLAHE) so OCR and face extraction share the same arrays.
+"""
+from functools import cached_property
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+class ImageContext:
+    """Lazily computed, memoized views of a single image."""
+
+    def __init__(self, image_path: Optional[str] = None, image_bytes: Optional[bytes] = None):
+        """
+        Initialize image context.
+
+        Args:
+            image_path: Path to image file
+            image_bytes: Raw encoded image bytes (used instead of reading the path)
+        """
+        if image_path is None and image_bytes is None:
+            raise ValueError("image_path or image_bytes is required")
+        self.image_path = image_path
+        self._raw_bytes = image_bytes
+        self._variants: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def ensure(cls, image: Union[str, bytes, "ImageContext"]) -> "ImageContext":
+        """Wrap a path or raw bytes in a context (contexts pass through unchanged)."""
+        if isinstance(image, ImageContext):
+            return image
+        if isinstance(image, (bytes, bytearray)):
+            return cls(image_bytes=bytes(image))
+        return cls(image_path=image)
+
+    @property
+    def raw_bytes(self) -> bytes:
+        """Encoded file bytes, read at most once."""
+        if self._raw_bytes is None:
+            with open(self.image_path, "rb") as f:
+                self._raw_bytes = f.read()
+        return self._raw_bytes
+
+    @cached_property
+    def bgr(self) -> Optional[np.ndarray]:
+        """Decoded BGR image (None if the bytes are not a valid image)."""
+        try:
+            data = np.frombuffer(self.raw_bytes, dtype=np.uint8)
+        except OSError as e:
+            print(f"Error: Could not read image from {self.image_path}: {e}")
+            return None
+        img = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if img is None:
+            print(f"Error: Could not decode image {self.image_path or '<bytes>'}")
+        return img
+
+    @cached_property
+    def gray(self) -> Optional[np.ndarray]:
+        """Grayscale view of the decoded image."""
+        if self.bgr is None:
+            return None
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    def gray_min_width(self, min_width: int) -> Optional[np.ndarray]:
+        """Grayscale image upscaled (bicubic) so its width is at least min_width."""
+        key = ("gray_min_width", min_width)
+        if key not in self._variants:
+            gray = self.gray
+            if gray is None:
+                return None
+            height, width = gray.shape
+            if width < min_width:
+                scale_factor = min_width / width
+                gray = cv2.resize(
+                    gray,
+                    (int(width * scale_factor), int(height * scale_factor)),
+                    interpolation=cv2.INTER_CUBIC
+                )
+            self._variants[key] = gray
+        return self._variants[key]
+
+    def clahe(self, min_width: int = 1600, clip_limit: float = 2.0, tile_grid_size: int = 8) -> Optional[np.ndarray]:
+        """CLAHE-enhanced grayscale image at the given minimum width."""
+        key = ("clahe", min_width, clip_limit, tile_grid_size)
+        if key not in self._variants:
+            gray = self.gray_min_width(min_width)
+            if gray is None:
+                return None
+            clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(tile_grid_size, tile_grid_size))
+            self._variants[key] = clahe.apply(gray)
+        return self._variants[key]
+
+    def resized(self, max_side: int) -> Optional[np.ndarray]:
+        """BGR image downscaled (area interpolation) so its longest side is at most max_side."""
+        key = ("resized", max_side)
+        if key not in self._variants:
+            img = self.bgr
+            if img is None:
+                return None
+            height, width = img.shape[:2]
+            scale = max_side / max(height, width)
+            if scale < 1.0:
+                img = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+            self._variants[key] = img
+        return self._variants[key]
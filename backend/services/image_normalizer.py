@@ -0,0 +1,175 @@
+"""
+Ingest-time image normalization.
+Applies EXIF orientation, caps the long edge for the image's purpose and
+re-encodes the upload once, next to the original, so OCR, OCR.space and face
+matching decode a small upright image instead of a full-resolution phone photo.
+"""
+import hashlib
+import io
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, NamedTuple
+
+from PIL import Image, ImageOps
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# EXIF tag holding the camera orientation
+EXIF_ORIENTATION = 0x0112
+
+
+class NormalizedImage(NamedTuple):
+    """Result of normalizing one upload (path/sha256 refer to the normalized file)."""
+    path: str
+    size: int
+    sha256: str
+    content_type: str
+    original_size: int
+    width: int
+    height: int
+    seconds: float
+
+
+class ImageNormalizer:
+    """Downscales, EXIF-rotates and recompresses uploaded images."""
+
+    FORMATS = {
+        "jpeg": ("JPEG", "jpg", "image/jpeg"),
+        "webp": ("WEBP", "webp", "image/webp"),
+    }
+
+    def __init__(
+        self,
+        max_sides: Dict[str, int],
+        output_format: str = "jpeg",
+        quality: int = 90,
+        enabled: bool = True
+    ):
+        """
+        Initialize image normalizer.
+
+        Args:
+            max_sides: Long-edge cap in pixels per purpose (e.g. "cnic", "face")
+            output_format: "jpeg" or "webp"
+            quality: Encoder quality (1-100)
+            enabled: When False, uploads are used as-is
+        """
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Unsupported normalized image format: {output_format}")
+        self.max_sides = max_sides
+        self.output_format = output_format
+        self.quality = quality
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {"images": 0, "normalized": 0, "unchanged": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+
+    def output_path_for(self, image_path: str) -> str:
+        """Path of the normalized variant stored next to the original."""
+        base, _ = os.path.splitext(image_path)
+        return f"{base}.norm.{self.FORMATS[self.output_format][1]}"
+
+    def _passthrough(self, image_path: str, start_time: float) -> NormalizedImage:
+        """Describe the original file as its own normalized variant."""
+        with open(image_path, "rb") as f:
+            data = f.read()
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            content_type = Image.MIME.get(img.format, "application/octet-stream")
+        return NormalizedImage(
+            image_path, len(data), hashlib.sha256(data).hexdigest(), content_type,
+            len(data), width, height, time.perf_counter() - start_time
+        )
+
+    def normalize(self, image_path: str, purpose: str) -> NormalizedImage:
+        """
+        Write the normalized variant of an uploaded image.
+
+        Images that are already upright, small enough and in the output format
+        are not re-encoded (the original is returned) to avoid generation loss.
+
+        Args:
+            image_path: Path to the uploaded image
+            purpose: Key into max_sides
+
+        Returns:
+            NormalizedImage describing the file downstream stages should read
+        """
+        start_time = time.perf_counter()
+        max_side = self.max_sides[purpose]
+        pil_format, _, content_type = self.FORMATS[self.output_format]
+        original_size = os.path.getsize(image_path)
+
+        with Image.open(image_path) as img:
+            orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+            width, height = img.size
+            if orientation in (1, None) and max(width, height) <= max_side and img.format == pil_format:
+                return self._passthrough(image_path, start_time)
+
+            scale = max_side / max(width, height)
+            if scale < 1.0:
+                # Let the JPEG decoder downscale in the DCT domain (1/2, 1/4, 1/8)
+                # while staying at or above the target size
+                img.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+
+            normalized = ImageOps.exif_transpose(img)
+            if normalized.mode not in ("RGB", "L"):
+                normalized = normalized.convert("RGB")
+            normalized.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            normalized.save(buffer, pil_format, quality=self.quality)
+            width, height = normalized.size
+
+        data = buffer.getvalue()
+        output_path = self.output_path_for(image_path)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path) or ".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        return NormalizedImage(
+            output_path, len(data), hashlib.sha256(data).hexdigest(), content_type,
+            original_size, width, height, time.perf_counter() - start_time
+        )
+
+    def record(self, original_path: str, result: NormalizedImage):
+        """Add one normalization result to the running totals."""
+        with self._lock:
+            self._stats["images"] += 1
+            self._stats["unchanged" if result.path == original_path else "normalized"] += 1
+            self._stats["bytes_in"] += result.original_size
+            self._stats["bytes_out"] += result.size
+            self._stats["seconds"] += result.seconds
+
+    def stats(self) -> Dict[str, float]:
+        """Totals since startup, including bytes saved."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["bytes_saved"] = stats["bytes_in"] - stats["bytes_out"]
+        stats["seconds"] = round(stats["seconds"], 3)
+        return stats
+
+
+# Global image normalizer instance
+image_normalizer = ImageNormalizer(
+    max_sides={
+        "cnic": settings.IMAGE_MAX_SIDE_CNIC,
+        "face": settings.IMAGE_MAX_SIDE_FACE,
+    },
+    output_format=settings.IMAGE_NORMALIZE_FORMAT,
+    quality=settings.IMAGE_NORMALIZE_QUALITY,
+    enabled=settings.IMAGE_NORMALIZE_ENABLED
+)
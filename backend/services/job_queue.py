@@ -0,0 +1,459 @@
+"""
+Durable background job queue backed by the application database.
+Jobs are rows in the `jobs` table. Workers claim due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL and a compare-and-set UPDATE
+(which also makes the claim safe on SQLite), retry failures with exponential
+backoff and record per-step progress that the status endpoint reports.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.database import SessionLocal
+from database.models import Job, JobStatus
+from services.progress_bus import progress_bus
+
+logger = logging.getLogger(__name__)
+
+# Step states reported in job progress
+STEP_PENDING = "pending"
+STEP_RUNNING = "running"
+STEP_DONE = "done"
+STEP_SKIPPED = "skipped"
+STEP_FAILED = "failed"
+
+ProgressCallback = Callable[[str, str], Awaitable[None]]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for failures that retrying cannot fix."""
+
+
+class JobClaimLost(Exception):
+    """Raised by progress() when another worker has reclaimed the job."""
+
+
+class JobQueue:
+    """Enqueue, claim and run database-backed jobs."""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_seconds: float = 5.0,
+        backoff_max_seconds: float = 300.0,
+        lock_timeout_seconds: float = 300.0,
+        poll_interval: float = 1.0,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        """
+        Initialize job queue.
+
+        Args:
+            max_attempts: Attempts per job before it is marked failed
+            backoff_seconds: Delay before the first retry (doubles per attempt)
+            backoff_max_seconds: Upper bound for the retry delay
+            lock_timeout_seconds: Running jobs locked longer than this are reclaimed (crashed worker)
+            poll_interval: Idle worker sleep between claim attempts
+            session_factory: Creates database sessions for workers
+        """
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.poll_interval = poll_interval
+        self.session_factory = session_factory
+        self._handlers: Dict[str, JobHandler] = {}
+        self._steps: Dict[str, Sequence[str]] = {}
+
+    def handler(self, job_type: str, steps: Sequence[str] = ()):
+        """
+        Register an async handler for a job type.
+
+        The handler receives the job payload and a progress(step, state)
+        coroutine, and returns a JSON-serializable result. progress() raises
+        JobClaimLost once the job has been reclaimed by another worker, so a
+        stale attempt stops at its next step instead of saving its results.
+
+        Args:
+            job_type: Job type name
+            steps: Ordered step names reported in progress
+        """
+        def decorator(fn: JobHandler) -> JobHandler:
+            self._handlers[job_type] = fn
+            self._steps[job_type] = tuple(steps)
+            return fn
+        return decorator
+
+    # --- Producer side ---
+
+    def enqueue(
+        self,
+        db: Session,
+        job_type: str,
+        payload: Dict[str, Any],
+        session_id: Optional[str] = None,
+        user_id: Optional[int] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Job:
+        """
+        Add a job, or return the existing job with the same idempotency key.
+
+        A job that already failed for good is requeued instead of returned as-is.
+
+        Args:
+            db: Database session (committed by this call)
+            job_type: Registered job type
+            payload: JSON-serializable handler input
+            session_id: Verification/chat session the job belongs to
+            user_id: Owning user
+            idempotency_key: Client- or content-derived key; repeated submissions map to one job
+
+        Returns:
+            The queued (or existing) job
+        """
+        if idempotency_key:
+            existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+            if existing:
+                return self._requeue_if_failed(db, existing)
+
+        steps = self._steps.get(job_type, ())
+        job = Job(
+            job_type=job_type,
+            session_id=session_id,
+            user_id=user_id,
+            idempotency_key=idempotency_key,
+            status=JobStatus.QUEUED,
+            payload=json.dumps(payload),
+            progress=json.dumps({step: STEP_PENDING for step in steps}),
+            max_attempts=self.max_attempts,
+            run_after=datetime.utcnow()
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Same key submitted concurrently: the other request's job wins
+            db.rollback()
+            existing = db.query(Job).filter(Job.idempotency_key == idempotency_key).first()
+            if existing is None:
+                raise
+            return existing
+
+        db.refresh(job)
+        logger.info(f"Enqueued job {job.id} ({job_type}) for session {session_id}")
+        return job
+
+    def _requeue_if_failed(self, db: Session, job: Job) -> Job:
+        if job.status != JobStatus.FAILED:
+            return job
+        job.status = JobStatus.QUEUED
+        job.attempts = 0
+        job.error = None
+        job.run_after = datetime.utcnow()
+        job.finished_at = None
+        job.progress = json.dumps({step: STEP_PENDING for step in self._steps.get(job.job_type, ())})
+        db.commit()
+        db.refresh(job)
+        logger.info(f"Requeued failed job {job.id} ({job.job_type})")
+        return job
+
+    def jobs_for_session(self, db: Session, session_id: str, limit: int = 10) -> List[Job]:
+        """Most recent jobs for a session, newest first."""
+        return (
+            db.query(Job)
+            .filter(Job.session_id == session_id)
+            .order_by(Job.created_at.desc(), Job.id.desc())
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def describe(job: Job) -> Dict[str, Any]:
+        """Status view of a job for API responses."""
+        return {
+            "job_id": job.id,
+            "type": job.job_type,
+            "status": job.status.value,
+            "steps": json.loads(job.progress) if job.progress else {},
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "error": job.error,
+            "result": json.loads(job.result) if job.result else None,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None
+        }
+
+    # --- Worker side ---
+
+    def claim(self, db: Session, worker_id: str) -> Optional[Job]:
+        """
+        Claim the next due job for this worker.
+
+        PostgreSQL skips rows other workers hold locks on; SQLite ignores
+        FOR UPDATE, so the claim itself is a compare-and-set on (status,
+        attempts) and only one worker's UPDATE can match. A stale running job
+        that has used all its attempts is marked failed instead of re-run.
+
+        Args:
+            db: Database session
+            worker_id: Identifier stored in locked_by
+
+        Returns:
+            The claimed job (status running), or None if nothing is due
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.lock_timeout_seconds)
+        due = and_(
+            # Same predicate as the ix_jobs_unfinished partial index, so the planner can use it
+            Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            or_(
+                and_(Job.status == JobStatus.QUEUED, Job.run_after <= now),
+                and_(Job.status == JobStatus.RUNNING, Job.locked_at < stale_before)
+            )
+        )
+
+        for _ in range(5):
+            candidate = db.execute(
+                select(Job.id, Job.job_type, Job.status, Job.attempts, Job.max_attempts, Job.progress)
+                .where(due)
+                .order_by(Job.run_after, Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).first()
+            if candidate is None:
+                db.rollback()
+                return None
+
+            unchanged = and_(
+                Job.id == candidate.id, Job.status == candidate.status, Job.attempts == candidate.attempts
+            )
+            if candidate.status == JobStatus.RUNNING and candidate.attempts >= candidate.max_attempts:
+                # The worker died (or stalled) on the last attempt: give up on the job
+                progress = json.loads(candidate.progress) if candidate.progress else {}
+                db.execute(
+                    update(Job).where(unchanged).values(
+                        status=JobStatus.FAILED,
+                        error=f"Worker lock expired on attempt {candidate.attempts}/{candidate.max_attempts}",
+                        progress=json.dumps({
+                            step: STEP_FAILED if state == STEP_RUNNING else state for step, state in progress.items()
+                        }),
+                        locked_by=None,
+                        locked_at=None,
+                        finished_at=now,
+                        updated_at=now
+                    )
+                )
+                db.commit()
+                logger.error(f"Job {candidate.id} ({candidate.job_type}) failed: worker lock expired on its last attempt")
+                continue
+
+            if candidate.status == JobStatus.RUNNING:
+                logger.warning(f"Reclaiming job {candidate.id} from a stale worker lock")
+
+            claimed = db.execute(
+                update(Job)
+                .where(unchanged)
+                .values(
+                    status=JobStatus.RUNNING,
+                    attempts=candidate.attempts + 1,
+                    locked_by=worker_id,
+                    locked_at=now,
+                    updated_at=now
+                )
+            ).rowcount
+            db.commit()
+            if claimed == 1:
+                return db.get(Job, candidate.id)
+            # Another worker won the race for this row; look again
+
+        return None
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given number of attempts made."""
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * (2 ** max(0, attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    @staticmethod
+    def _claimed_by(job_id: int, worker_id: str, attempts: int):
+        """Match a job only while this worker's claim (attempt) still holds it."""
+        return and_(
+            Job.id == job_id, Job.status == JobStatus.RUNNING,
+            Job.locked_by == worker_id, Job.attempts == attempts
+        )
+
+    def _set_progress(self, db: Session, job_id: int, worker_id: str, attempts: int, step: str, state: str):
+        job = db.get(Job, job_id)
+        progress = json.loads(job.progress) if job.progress else {}
+        progress[step] = state
+        now = datetime.utcnow()
+        # Progress doubles as the lock heartbeat, so a long job is not reclaimed while it runs
+        updated = db.execute(
+            update(Job)
+            .where(self._claimed_by(job_id, worker_id, attempts))
+            .values(progress=json.dumps(progress), locked_at=now, updated_at=now)
+        ).rowcount
+        db.commit()
+        if not updated:
+            raise JobClaimLost(f"Job {job_id} is no longer held by {worker_id}")
+
+    def _finish(self, db: Session, job_id: int, worker_id: str, attempts: int, result: Dict[str, Any]):
+        now = datetime.utcnow()
+        updated = db.execute(
+            update(Job)
+            .where(self._claimed_by(job_id, worker_id, attempts))
+            .values(
+                status=JobStatus.SUCCEEDED,
+                result=json.dumps(result),
+                error=None,
+                locked_by=None,
+                locked_at=None,
+                finished_at=now,
+                updated_at=now
+            )
+        ).rowcount
+        db.commit()
+        if not updated:
+            logger.warning(f"Job {job_id} was reclaimed from {worker_id}; discarding its result")
+            return None
+        return JobStatus.SUCCEEDED
+
+    def _fail(self, db: Session, job_id: int, worker_id: str, attempts: int, error: str, permanent: bool = False):
+        job = db.get(Job, job_id)
+        now = datetime.utcnow()
+        values = {"error": error, "locked_by": None, "locked_at": None, "updated_at": now}
+
+        progress = json.loads(job.progress) if job.progress else {}
+        running = [step for step, state in progress.items() if state == STEP_RUNNING]
+
+        if permanent or attempts >= job.max_attempts:
+            values.update(status=JobStatus.FAILED, finished_at=now)
+            for step in running:
+                progress[step] = STEP_FAILED
+            message = f"Job {job.id} ({job.job_type}) failed after {attempts} attempt(s): {error}"
+        else:
+            delay = self.retry_delay(attempts)
+            values.update(status=JobStatus.QUEUED, run_after=now + timedelta(seconds=delay))
+            for step in running:
+                progress[step] = STEP_PENDING
+            message = (
+                f"Job {job.id} ({job.job_type}) attempt {attempts}/{job.max_attempts} failed, "
+                f"retrying in {delay:.1f}s: {error}"
+            )
+        values["progress"] = json.dumps(progress)
+
+        updated = db.execute(update(Job).where(self._claimed_by(job_id, worker_id, attempts)).values(**values)).rowcount
+        db.commit()
+        if not updated:
+            logger.warning(f"Job {job_id} was reclaimed from {worker_id}; not recording its failure: {error}")
+            return None
+        if values["status"] == JobStatus.FAILED:
+            logger.error(message)
+        else:
+            logger.warning(message)
+        return values["status"]
+
+    async def _in_session(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a synchronous database operation in its own session off the event loop."""
+        def call():
+            db = self.session_factory()
+            try:
+                return fn(db, *args)
+            finally:
+                db.close()
+        return await asyncio.to_thread(call)
+
+    async def run_one(self, worker_id: str) -> bool:
+        """
+        Claim and execute a single job.
+
+        Returns:
+            True if a job was processed, False if none was due
+        """
+        job = await self._in_session(self.claim, worker_id)
+        if job is None:
+            return False
+
+        job_id, job_type, session_id, attempts = job.id, job.job_type, job.session_id, job.attempts
+        payload = json.loads(job.payload) if job.payload else {}
+        handler = self._handlers.get(job_type)
+        if handler is None:
+            await self._in_session(
+                self._fail, job_id, worker_id, attempts, f"No handler registered for job type {job_type}", True
+            )
+            return True
+
+        async def progress(step: str, state: str):
+            await self._in_session(self._set_progress, job_id, worker_id, attempts, step, state)
+            await progress_bus.publish(session_id, {"type": "step", "job_id": job_id, "step": step, "state": state})
+
+        logger.info(f"Worker {worker_id} running job {job_id} ({job_type}), attempt {attempts}")
+        try:
+            result = await handler(payload, progress)
+        except JobClaimLost as e:
+            # Another worker reclaimed the job and owns its outcome now
+            logger.warning(f"{e}; dropping this attempt")
+            return True
+        except PermanentJobError as e:
+            status = await self._in_session(self._fail, job_id, worker_id, attempts, str(e), True)
+        except Exception as e:
+            status = await self._in_session(self._fail, job_id, worker_id, attempts, f"{type(e).__name__}: {e}")
+        else:
+            status = await self._in_session(self._finish, job_id, worker_id, attempts, result or {})
+            if status is not None:
+                logger.info(f"Job {job_id} ({job_type}) succeeded")
+        if status is None:
+            # Another worker reclaimed the job and owns its outcome now
+            return True
+        await progress_bus.publish(session_id, {"type": "job", "job_id": job_id, "job_type": job_type, "status": status.value})
+        return True
+
+    async def run_worker(self, concurrency: int = 1, stop_event: Optional[asyncio.Event] = None):
+        """
+        Process jobs until stop_event is set.
+
+        Args:
+            concurrency: Jobs processed in parallel by this worker
+            stop_event: Set to stop after the jobs in flight finish
+        """
+        stop_event = stop_event or asyncio.Event()
+        base_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        async def loop(slot: int):
+            worker_id = f"{base_id}:{slot}"
+            while not stop_event.is_set():
+                try:
+                    processed = await self.run_one(worker_id)
+                except Exception as e:
+                    logger.error(f"Job worker {worker_id} error: {e}")
+                    processed = False
+                if not processed:
+                    try:
+                        await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+        logger.info(f"Job worker {base_id} started ({concurrency} slot(s))")
+        await asyncio.gather(*(loop(slot) for slot in range(max(1, concurrency))))
+        logger.info(f"Job worker {base_id} stopped")
+
+
+# Global job queue instance
+job_queue = JobQueue(
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS,
+    backoff_max_seconds=settings.JOB_RETRY_BACKOFF_MAX_SECONDS,
+    lock_timeout_seconds=settings.JOB_LOCK_TIMEOUT_SECONDS,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS
+)
@@ -0,0 +1,129 @@
+"""
+Background job handlers for the KYC pipeline.
+Each handler runs in a job worker (worker.py, or embedded in the API process)
+and reports per-step progress through the job queue.
+"""
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from database.database import SessionLocal
+from database.models import CNICData, VerificationSession
+from security import audit_logger
+from services.job_queue import job_queue, ProgressCallback, STEP_DONE, STEP_RUNNING, STEP_SKIPPED
+from services.ocr_pipeline import ocr_pipeline
+from services.validation import cnic_validator
+from services.worker_pool import WorkerPoolError
+
+CNIC_JOB = "cnic_ocr"
+CNIC_JOB_STEPS = ("ocr", "face_extract", "validation", "save")
+
+
+def _get_val(val: Optional[str]) -> str:
+    return val if val else "Not Detected"
+
+
+def save_cnic_result(
+    user_id: int,
+    session_id: str,
+    front_path: str,
+    back_path: str,
+    extracted: Dict[str, Optional[str]],
+    is_valid: bool,
+    validation_errors: list
+):
+    """Store extracted CNIC fields and mark the verification session's CNIC steps."""
+    db = SessionLocal()
+    try:
+        cnic_data = db.query(CNICData).filter(CNICData.user_id == user_id).first()
+        fields = {
+            "encrypted_cnic_number": _get_val(extracted.get("cnic_number")),  # Storing plain text
+            "encrypted_name": _get_val(extracted.get("name")),  # Storing plain text
+            "encrypted_father_name": _get_val(extracted.get("father_name")),  # Storing plain text
+            "encrypted_dob": extracted.get("dob"),
+            "encrypted_gender": extracted.get("gender"),
+            "is_valid": is_valid,
+            "validation_errors": str(validation_errors) if validation_errors else None,
+            "encrypted_front_image_path": front_path,
+            "encrypted_back_image_path": back_path
+        }
+        if not cnic_data:
+            db.add(CNICData(user_id=user_id, **fields))
+        else:
+            for key, value in fields.items():
+                setattr(cnic_data, key, value)
+
+        session = db.query(VerificationSession).filter(
+            VerificationSession.session_id == session_id
+        ).first()
+        if session:
+            session.cnic_uploaded = True
+            session.ocr_completed = is_valid
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+@job_queue.handler(CNIC_JOB, steps=CNIC_JOB_STEPS)
+async def process_cnic(payload: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """
+    OCR, face crop, validation and storage for an uploaded CNIC.
+
+    Payload keys: user_id, session_id, front_path/back_path (originals),
+    front_ocr_path/back_ocr_path and front_digest/back_digest (normalized
+    images), face_output_path, engines.
+    """
+    user_id = payload["user_id"]
+    session_id = payload["session_id"]
+
+    await progress("ocr", STEP_RUNNING)
+    await progress("face_extract", STEP_RUNNING)
+    try:
+        extracted = await ocr_pipeline.extract_cnic_data(
+            payload["front_ocr_path"],
+            payload["back_ocr_path"],
+            engines=payload.get("engines"),
+            face_output_path=payload.get("face_output_path"),
+            image_digests={"front": payload.get("front_digest"), "back": payload.get("back_digest")}
+        )
+    except WorkerPoolError:
+        # Saturated/timed out: let the queue retry with backoff
+        raise
+    except Exception as e:
+        # Same as the former in-request behaviour: keep going without OCR data
+        print(f"OCR failed: {e}")
+        extracted = {}
+    await progress("ocr", STEP_DONE)
+
+    face_path = payload.get("face_output_path")
+    face_extracted = bool(face_path) and os.path.exists(face_path)
+    await progress("face_extract", STEP_DONE if face_extracted else STEP_SKIPPED)
+
+    await progress("validation", STEP_RUNNING)
+    is_valid, validation_errors = cnic_validator.validate_cnic_data(extracted)
+    audit_logger.log_ocr_completed(user_id, session_id, is_valid, extracted.get("cnic_number"))
+    await progress("validation", STEP_DONE)
+
+    await progress("save", STEP_RUNNING)
+    await asyncio.to_thread(
+        save_cnic_result,
+        user_id,
+        session_id,
+        payload["front_path"],
+        payload["back_path"],
+        extracted,
+        is_valid,
+        validation_errors
+    )
+    await progress("save", STEP_DONE)
+
+    return {
+        "is_valid": is_valid,
+        "validation_errors": validation_errors,
+        "face_extracted": face_extracted,
+        "fields_found": sorted(field for field, value in extracted.items() if value)
+    }
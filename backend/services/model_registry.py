@@ -0,0 +1,194 @@
+"""
+Lazy model registry for heavy CV/OCR models.
+Models are loaded on first use (or preloaded on request) instead of at import
+time, so the API process boots without TensorFlow, EasyOCR or MediaPipe.
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Thread-safe registry of named, lazily loaded models."""
+
+    NOT_LOADED = "not_loaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._applies: Dict[str, Callable[[], bool]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any], applies: Optional[Callable[[], bool]] = None):
+        """
+        Register a model loader.
+
+        Args:
+            name: Model name used by get() and PRELOAD_MODELS
+            loader: Zero-argument callable that builds the model
+            applies: Whether the current configuration uses the model (default: always)
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            self._applies[name] = applies or (lambda: True)
+            self._locks[name] = threading.Lock()
+            self._info[name] = {"state": self.NOT_LOADED, "load_seconds": None, "error": None}
+
+    def names(self) -> List[str]:
+        """Registered model names."""
+        return list(self._loaders)
+
+    def applicable_names(self) -> List[str]:
+        """Registered models the current configuration uses (what "all" preloads)."""
+        return [name for name in self._loaders if self._applies[name]()]
+
+    def get(self, name: str) -> Any:
+        """
+        Return a model, loading it on first use.
+
+        Args:
+            name: Registered model name
+
+        Returns:
+            The loaded model
+
+        Raises:
+            KeyError: If no loader is registered under the name
+            Exception: Whatever the loader raised (the next call retries)
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model '{name}'")
+
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._info[name].update(state=self.LOADING, error=None)
+            logger.info(f"Loading model '{name}'...")
+            start_time = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._info[name].update(state=self.FAILED, error=str(e))
+                logger.error(f"Failed to load model '{name}': {e}")
+                raise
+
+            elapsed = time.perf_counter() - start_time
+            self._models[name] = model
+            self._info[name].update(state=self.READY, load_seconds=round(elapsed, 3))
+            logger.info(f"Model '{name}' loaded in {elapsed:.2f}s")
+            return model
+
+    def preload(self, names: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the given models now, logging (not raising) failures.
+
+        Args:
+            names: Model names (unknown names are skipped)
+
+        Returns:
+            Status of all models after loading
+        """
+        for name in names:
+            if name not in self._loaders:
+                logger.warning(f"Cannot preload unknown model '{name}'")
+                continue
+            try:
+                self.get(name)
+            except Exception:
+                pass
+        return self.status()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load state, load time and last error."""
+        with self._lock:
+            return {name: dict(info) for name, info in self._info.items()}
+
+
+def parse_model_list(value: str, available: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Parse a comma-separated model list ("all" selects every available model).
+
+    Args:
+        value: e.g. "easyocr,deepface" or "all"
+        available: Models that may be listed; "all" expands to these and other
+            names are skipped with a warning (None: no filtering)
+
+    Returns:
+        List of model names
+    """
+    names = [name.strip() for name in (value or "").split(",") if name.strip()]
+    if available is None:
+        return [] if "all" in names else names
+    available = list(available)
+    if "all" in names:
+        return available
+    skipped = [name for name in names if name not in available]
+    if skipped:
+        logger.warning(f"Not preloading {', '.join(skipped)}: unknown or not used by the current configuration")
+    return [name for name in names if name in available]
+
+
+def _load_easyocr():
+    import easyocr
+    return easyocr.Reader(['en', 'ur'], gpu=False)
+
+
+def _load_deepface():
+    from deepface import DeepFace
+    from services.cv.face_matcher import FaceMatchService
+    # Build the recognition model so the first verify() does not pay for it
+    DeepFace.build_model(FaceMatchService.MODEL_NAME)
+    return DeepFace
+
+
+def _load_face_onnx():
+    from services.cv import face_match_service
+    backend = face_match_service.backend
+    if not hasattr(backend, "create_session"):
+        raise RuntimeError(f"Face embedding backend is '{backend.name}', not onnx")
+    return backend.create_session()
+
+
+def _face_onnx_applies() -> bool:
+    from config import settings
+    return settings.FACE_EMBEDDING_BACKEND == "onnx"
+
+
+def _load_face_mesh():
+    from config import settings
+    from services.cv.face_mesh_pool import FaceMeshPool
+    pool = FaceMeshPool(settings.LIVENESS_FACE_MESH_POOL_SIZE)
+    # Build one graph now so the first video does not pay for it
+    pool.warm(1)
+    return pool
+
+
+def _load_tesseract():
+    import numpy as np
+    from services.ocr_service import tesseract_ocr_service
+    # One tiny recognition loads the eng+urd traineddata into the backend
+    tesseract_ocr_service.backend.recognize(np.full((32, 32), 255, dtype=np.uint8), lang='eng+urd', psm=6)
+    return tesseract_ocr_service.backend
+
+
+# Global model registry instance
+model_registry = ModelRegistry()
+model_registry.register("easyocr", _load_easyocr)
+model_registry.register("deepface", _load_deepface)
+model_registry.register("face_onnx", _load_face_onnx, applies=_face_onnx_applies)
+model_registry.register("face_mesh", _load_face_mesh)
+model_registry.register("tesseract", _load_tesseract)
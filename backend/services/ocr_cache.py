@@ -0,0 +1,239 @@
+"""
+Content-addressed cache for CNIC OCR results.
+Entries are keyed by the SHA-256 of the image bytes plus engine, side and config
+version, and are stored AES-GCM encrypted in both tiers because they contain PII.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from config import settings
+from security.encryption import EncryptionService
+
+logger = logging.getLogger(__name__)
+
+
+class OCRResultCache:
+    """Two-tier (in-memory LRU + optional disk) encrypted OCR result cache."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: int = 86400,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+        config_version: str = "1",
+        cipher: Optional[EncryptionService] = None
+    ):
+        """
+        Initialize OCR cache.
+
+        Args:
+            max_entries: Maximum entries kept in the memory tier
+            ttl_seconds: Time-to-live for entries in both tiers
+            disk_dir: Directory for the disk tier (None disables it)
+            max_disk_bytes: Size cap for the disk tier before oldest entries are evicted
+            config_version: Bumped whenever OCR preprocessing/parsing changes
+            cipher: Encryption service used for payloads
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.config_version = config_version
+
+        if cipher is None:
+            if settings.ENCRYPTION_KEY:
+                cipher = EncryptionService()
+            else:
+                # No configured key: use a per-process key. Disk entries would be
+                # unreadable after a restart, so the disk tier is disabled.
+                cipher = EncryptionService(key=AESGCM.generate_key(bit_length=256))
+                if self.disk_dir:
+                    logger.warning("ENCRYPTION_KEY not set, OCR disk cache disabled")
+                    self.disk_dir = None
+        self.cipher = cipher
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(os.path.getsize(p) for p in self._disk_files())
+
+    @staticmethod
+    def image_digest(data: bytes) -> str:
+        """SHA-256 hex digest of raw image bytes."""
+        return hashlib.sha256(data).hexdigest()
+
+    def make_key(self, image_digest: str, engine: str, side: str, engine_config: str = "") -> str:
+        """Build the cache key for one (image, engine, side) OCR result."""
+        raw = f"{image_digest}:{engine}:{engine_config}:{side}:{self.config_version}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Decrypted result dictionary or None on miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return self._decode(payload)
+                del self._memory[key]
+
+        payload = self._disk_get(key, now)
+        if payload is not None:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+            self._memory_set(key, payload, now)
+            return self._decode(payload)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Dict):
+        """
+        Store a result (empty results are not cached).
+
+        Args:
+            key: Cache key from make_key
+            value: OCR result dictionary
+        """
+        if not value or not any(value.values()):
+            return
+        payload = self.cipher.encrypt(json.dumps(value))
+        now = time.time()
+        self._memory_set(key, payload, now)
+        self._disk_set(key, payload)
+
+    def _decode(self, payload: str) -> Optional[Dict]:
+        plaintext = self.cipher.decrypt(payload)
+        return json.loads(plaintext) if plaintext else None
+
+    def _memory_set(self, key: str, payload: str, now: float):
+        with self._lock:
+            self._memory[key] = (now + self.ttl_seconds, payload)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    # --- Disk tier ---
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.bin")
+
+    def _disk_files(self):
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith(".bin"):
+                    yield os.path.join(root, name)
+
+    def _disk_get(self, key: str, now: float) -> Optional[str]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                self._disk_remove(path)
+                return None
+            with open(path, "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"OCR disk cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, payload: str):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_bytes += len(payload)
+                over_limit = self._disk_bytes > self.max_disk_bytes
+            if over_limit:
+                self._evict_disk()
+        except OSError as e:
+            logger.warning(f"OCR disk cache write failed: {e}")
+
+    def _disk_remove(self, path: str):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                self._disk_bytes -= size
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        """Drop expired entries, then oldest entries until under the size cap."""
+        now = time.time()
+        entries = []
+        total = 0
+        for path in self._disk_files():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove_quietly(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        # Evict down to 90% of the cap so we do not rescan on every write
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            self._remove_quietly(path)
+            total -= size
+            self.stats["evictions"] += 1
+
+        with self._lock:
+            self._disk_bytes = total
+
+    @staticmethod
+    def _remove_quietly(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# Global OCR result cache instance
+ocr_cache = OCRResultCache(
+    max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.OCR_CACHE_TTL_SECONDS,
+    disk_dir=settings.OCR_CACHE_DIR or None,
+    max_disk_bytes=settings.OCR_CACHE_MAX_DISK_MB * 1024 * 1024,
+    config_version=settings.OCR_CACHE_VERSION
+)
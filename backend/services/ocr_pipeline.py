@@ -0,0 +1,259 @@
+"""
+Dual-engine CNIC OCR orchestration.
+Runs Tesseract (worker pool) and OCR.space (async HTTP) on the front and back images
+concurrently and merges the results, returning early once one engine alone already
+produced valid data. Results for previously seen images come from the OCR cache.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from config import settings
+from services import cv_jobs
+from services.image_context import ImageContext
+from services.ocr_cache import ocr_cache
+from services.ocr_service import tesseract_ocr_service
+from services.ocrspace_service import ocrspace_service, OCRSpaceService
+from services.validation import cnic_validator
+from services.worker_pool import cv_worker_pool, WorkerPoolSaturated
+
+logger = logging.getLogger(__name__)
+
+
+class CNICOCRPipeline:
+    """Concurrent (engine x side) OCR stage for CNIC uploads."""
+
+    TESSERACT = "tesseract"
+    OCRSPACE = "ocrspace"
+
+    # Tesseract worker-pool job per side
+    TESSERACT_JOBS = {
+        "front": cv_jobs.tesseract_process_front,
+        "back": cv_jobs.tesseract_process_back,
+    }
+
+    # Engine settings that affect results; changing them must invalidate cached results
+    ENGINE_CONFIGS = {
+        TESSERACT: "oem3-psm6-eng+urd",
+        OCRSPACE: "engine2-eng",
+    }
+
+    def __init__(self, early_exit: bool = True, cache_enabled: bool = True):
+        """
+        Initialize the OCR pipeline.
+
+        Args:
+            early_exit: Stop waiting for other engines once one engine's result validates
+            cache_enabled: Reuse OCR results for byte-identical images
+        """
+        self.early_exit = early_exit
+        self.cache_enabled = cache_enabled
+
+    def available_engines(self) -> Tuple[str, ...]:
+        """Engines that are configured and worth scheduling."""
+        engines = [self.TESSERACT]
+        if ocrspace_service.is_available():
+            engines.append(self.OCRSPACE)
+        return tuple(engines)
+
+    def _schedule(self, engine: str, side: str, image: ImageContext) -> asyncio.Future:
+        """Start one (engine, side) OCR job."""
+        if engine == self.OCRSPACE:
+            # Bytes were already read once for hashing; upload them as-is
+            if side == "front":
+                return asyncio.ensure_future(ocrspace_service.process_front_image_async(image.raw_bytes))
+            return asyncio.ensure_future(ocrspace_service.process_back_image_async(image.raw_bytes))
+        return asyncio.ensure_future(cv_worker_pool.run(self.TESSERACT_JOBS[side], image.image_path))
+
+    @staticmethod
+    async def _unpack_front_with_face(job: asyncio.Future, face_state: Dict) -> Dict[str, Optional[str]]:
+        """Split the combined Tesseract-front + face job result."""
+        ocr_data, face_state["extracted"] = await job
+        return ocr_data
+
+    @staticmethod
+    def is_confident(data: Dict[str, Optional[str]]) -> bool:
+        """
+        Check whether a single engine's result is good enough to skip the others.
+
+        The result must pass full CNIC validation, which implies every
+        validator-required field was found and is well-formed.
+        """
+        if not data:
+            return False
+        is_valid, _ = cnic_validator.validate_cnic_data(data)
+        return is_valid
+
+    def engine_config(self, engine: str) -> str:
+        """Describe the engine configuration that produced a result (part of the cache key)."""
+        if engine == self.TESSERACT:
+            # pytesseract and tesserocr can read the same image differently
+            return f"{self.ENGINE_CONFIGS[engine]}-{tesseract_ocr_service.mode}-{tesseract_ocr_service.backend.name}"
+        return self.ENGINE_CONFIGS[engine]
+
+    def _cache_keys(
+        self,
+        images: Dict[str, ImageContext],
+        engines: Sequence[str],
+        digests: Optional[Dict[str, str]] = None
+    ) -> Dict[Tuple[str, str], str]:
+        """Hash each image once (unless its digest is known) and build cache keys for every (engine, side)."""
+        keys = {}
+        for side, image in images.items():
+            digest = (digests or {}).get(side) or ocr_cache.image_digest(image.raw_bytes)
+            for engine in engines:
+                keys[(engine, side)] = ocr_cache.make_key(digest, engine, side, self.engine_config(engine))
+        return keys
+
+    async def extract_cnic_data(
+        self,
+        front_image_path: str,
+        back_image_path: str,
+        engines: Optional[Sequence[str]] = None,
+        face_output_path: Optional[str] = None,
+        image_digests: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Optional[str]]:
+        """
+        Extract CNIC data with all engines and sides in parallel.
+
+        When face_output_path is given, the CNIC portrait is cropped in the same
+        worker job as Tesseract's front pass so the front image is decoded once.
+
+        Args:
+            front_image_path: Path to front image
+            back_image_path: Path to back image
+            engines: Engines to run (defaults to all available)
+            face_output_path: Where to save the cropped CNIC face (optional)
+            image_digests: SHA-256 of the "front"/"back" files if already known (from the upload sink)
+
+        Returns:
+            Merged dictionary with the best available CNIC data
+        """
+        if not os.path.exists(front_image_path) or not os.path.exists(back_image_path):
+            print(f"Image files not found: {front_image_path} or {back_image_path}")
+            return {}
+
+        engines = tuple(engines or self.available_engines())
+        images = {
+            "front": ImageContext(front_image_path),
+            "back": ImageContext(back_image_path),
+        }
+        start_time = time.perf_counter()
+
+        results = {engine: {} for engine in engines}
+        sides_done = {engine: set() for engine in engines}
+        winner = None
+
+        def record(engine: str, side: str, data: Dict[str, Optional[str]]) -> bool:
+            """Store one job result; True when this engine alone is now sufficient."""
+            sides_done[engine].add(side)
+            results[engine].update(data or {})
+            return (self.early_exit and len(engines) > 1
+                    and len(sides_done[engine]) == len(images)
+                    and self.is_confident(results[engine]))
+
+        digests_known = bool(image_digests) and all(side in image_digests for side in images)
+        if (self.cache_enabled and not digests_known) or self.OCRSPACE in engines:
+            # Read each upload once; the bytes feed the cache key and OCR.space
+            for image in images.values():
+                await asyncio.to_thread(lambda img=image: img.raw_bytes)
+        cache_keys = self._cache_keys(images, engines, image_digests) if self.cache_enabled else {}
+        cache_hits = 0
+
+        cached_jobs = set()
+        for engine in engines:
+            for side in images:
+                cached = await asyncio.to_thread(ocr_cache.get, cache_keys[(engine, side)]) if cache_keys else None
+                if cached is not None:
+                    cache_hits += 1
+                    cached_jobs.add((engine, side))
+                    if record(engine, side, cached):
+                        winner = engine
+
+        tasks = {}
+        face_state = {"extracted": None}
+        face_tasks = set()
+        for engine in engines if winner is None else ():
+            for side, image in images.items():
+                if (engine, side) in cached_jobs:
+                    continue
+                if face_output_path and (engine, side) == (self.TESSERACT, "front"):
+                    job = cv_worker_pool.run(
+                        cv_jobs.tesseract_process_front_with_face, image.image_path, face_output_path
+                    )
+                    task = asyncio.ensure_future(self._unpack_front_with_face(job, face_state))
+                    face_tasks.add(task)
+                else:
+                    task = self._schedule(engine, side, image)
+                tasks[task] = (engine, side)
+
+        if face_output_path and not face_tasks:
+            # Tesseract front came from the cache (or is not running): crop the face on its own
+            face_tasks.add(asyncio.ensure_future(
+                cv_worker_pool.run(cv_jobs.extract_cnic_face, front_image_path, face_output_path)
+            ))
+
+        async def collect(task: asyncio.Future) -> bool:
+            """Consume a finished OCR task; True when its engine is now sufficient."""
+            engine, side = tasks[task]
+            try:
+                data = task.result() or {}
+            except WorkerPoolSaturated:
+                raise
+            except Exception as e:
+                logger.warning(f"OCR {engine}/{side} failed: {e}")
+                data = {}
+            else:
+                if cache_keys:
+                    await asyncio.to_thread(ocr_cache.set, cache_keys[(engine, side)], data)
+            return record(engine, side, data)
+
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if await collect(task):
+                        winner = tasks[task][0]
+
+            # The face crop is needed regardless of which engine won
+            for task in face_tasks & pending:
+                await asyncio.wait([task])
+                pending.discard(task)
+                await collect(task)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        for task in face_tasks - set(tasks):
+            try:
+                face_state["extracted"] = await task
+            except WorkerPoolSaturated:
+                raise
+            except Exception as e:
+                logger.warning(f"CNIC face extraction failed: {e}")
+
+        if winner:
+            logger.info(f"OCR early exit: {winner} produced valid data, skipped {len(pending)} job(s)")
+        if face_output_path:
+            logger.info(f"CNIC face extracted: {face_state['extracted']}")
+
+        merged = OCRSpaceService.merge_ocr_results(
+            results.get(self.TESSERACT, {}),
+            results.get(self.OCRSPACE, {})
+        )
+        logger.info(
+            f"OCR stage ({'+'.join(engines)}) completed in {time.perf_counter() - start_time:.2f}s "
+            f"({cache_hits} cache hit(s))"
+        )
+        return merged
+
+
+# Global OCR pipeline instance
+ocr_pipeline = CNICOCRPipeline(
+    early_exit=settings.OCR_EARLY_EXIT,
+    cache_enabled=settings.OCR_CACHE_ENABLED
+)
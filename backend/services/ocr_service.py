@@ -7,20 +7,180 @@ import cv2
 import re
 import numpy as np
 import os
-from typing import Dict, Optional, List, Tuple
+import threading
+from typing import Dict, Optional, List, Tuple, Union
 from PIL import Image
+from config import settings
+from services.image_context import ImageContext
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    tesserocr = None
+    TESSEROCR_AVAILABLE = False
 
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
+
+class PytesseractBackend:
+    """Runs the tesseract CLI once per image (reloads traineddata on every call)."""
+    
+    name = 'pytesseract'
+    
+    def recognize(self, image: np.ndarray, lang: str, psm: int, oem: int = 3,
+                  whitelist: Optional[str] = None) -> str:
+        """
+        Recognize text in an image.
+        
+        Args:
+            image: Grayscale or BGR image array
+            lang: Tesseract language(s), e.g. 'eng+urd'
+            psm: Page segmentation mode
+            oem: OCR engine mode
+            whitelist: Optional character whitelist
+            
+        Returns:
+            Recognized text
+        """
+        config = f'--oem {oem} --psm {psm}'
+        if whitelist:
+            config += f' -c tessedit_char_whitelist={whitelist}'
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+    
+    def close(self):
+        pass
+
+
+class TesserocrBackend:
+    """
+    Keeps Tesseract API handles alive in-process (one per thread and language/PSM set),
+    so traineddata is loaded once per worker instead of once per image.
+    """
+    
+    name = 'tesserocr'
+    
+    def __init__(self, tessdata_dir: Optional[str] = None):
+        """
+        Initialize tesserocr backend.
+        
+        Args:
+            tessdata_dir: Directory containing *.traineddata (None uses tesserocr's default)
+        """
+        if not TESSEROCR_AVAILABLE:
+            raise RuntimeError("tesserocr is not installed")
+        self.tessdata_dir = tessdata_dir
+        self._local = threading.local()
+        self._all_handles = []
+        self._lock = threading.Lock()
+    
+    def _get_api(self, lang: str, psm: int, oem: int):
+        """Return this thread's API handle for the settings, creating it on first use."""
+        handles = getattr(self._local, 'handles', None)
+        if handles is None:
+            handles = self._local.handles = {}
+        
+        key = (lang, psm, oem)
+        api = handles.get(key)
+        if api is None:
+            kwargs = {'lang': lang, 'psm': psm, 'oem': oem}
+            if self.tessdata_dir:
+                kwargs['path'] = self.tessdata_dir
+            api = tesserocr.PyTessBaseAPI(**kwargs)
+            handles[key] = api
+            with self._lock:
+                self._all_handles.append(api)
+        return api
+    
+    def recognize(self, image: np.ndarray, lang: str, psm: int, oem: int = 3,
+                  whitelist: Optional[str] = None) -> str:
+        """
+        Recognize text in an image (same contract as PytesseractBackend.recognize).
+        
+        The raw pixel buffer is handed to Tesseract directly, without PNG encoding
+        or temp files.
+        """
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape
+        
+        api = self._get_api(lang, psm, oem)
+        api.SetVariable('tessedit_char_whitelist', whitelist or '')
+        api.SetImageBytes(image.tobytes(), width, height, 1, image.strides[0])
+        text = api.GetUTF8Text()
+        api.Clear()
+        return text
+    
+    def close(self):
+        """Release all API handles created by this backend."""
+        with self._lock:
+            handles, self._all_handles = self._all_handles, []
+        for api in handles:
+            api.End()
+        self._local = threading.local()
+
+
+def create_ocr_backend(name: str = 'auto', tessdata_dir: Optional[str] = None):
+    """
+    Create the OCR backend by name.
+    
+    Args:
+        name: 'auto' (tesserocr if installed, else pytesseract), 'tesserocr' or 'pytesseract'
+        tessdata_dir: Optional traineddata directory for tesserocr
+        
+    Returns:
+        Backend instance with a recognize() method
+    """
+    if name in ('auto', 'tesserocr') and TESSEROCR_AVAILABLE:
+        try:
+            return TesserocrBackend(tessdata_dir=tessdata_dir)
+        except Exception as e:
+            print(f"tesserocr backend unavailable, falling back to pytesseract: {e}")
+    elif name == 'tesserocr':
+        print("tesserocr is not installed, falling back to pytesseract")
+    return PytesseractBackend()
+
 class TesseractOCRService:
     """Service for extracting data from Pakistani CNIC using Tesseract OCR."""
     
-    def __init__(self, tesseract_cmd: Optional[str] = None):
+    # Deskewed card size (ID-1 aspect ratio 85.6 x 54 mm)
+    CARD_SIZE = (1000, 630)
+    
+    # Field regions on a deskewed CNIC front, as (x0, y0, x1, y1) fractions of the card.
+    # Tune against real samples if the card layout changes.
+    FRONT_FIELD_TEMPLATE = {
+        'name': (0.26, 0.20, 0.74, 0.32),
+        'father_name': (0.26, 0.36, 0.74, 0.48),
+        'gender': (0.26, 0.52, 0.40, 0.61),
+        'cnic_number': (0.26, 0.64, 0.52, 0.75),
+        'dob': (0.52, 0.64, 0.76, 0.75),
+        'issue_date': (0.26, 0.77, 0.52, 0.88),
+        'expiry_date': (0.52, 0.77, 0.76, 0.88),
+    }
+    
+    # Per-field (lang, psm, character whitelist); PSM 7 = single text line, 10 = single character
+    FIELD_OCR_CONFIGS = {
+        'name': ('eng', 7, None),
+        'father_name': ('eng', 7, None),
+        'gender': ('eng', 10, 'MF'),
+        'cnic_number': ('eng', 7, '0123456789-'),
+        'dob': ('eng', 7, '0123456789./-'),
+        'issue_date': ('eng', 7, '0123456789./-'),
+        'expiry_date': ('eng', 7, '0123456789./-'),
+    }
+    
+    # ROI crops are scaled to this height before OCR (Tesseract likes ~30-40px glyphs)
+    FIELD_HEIGHT = 64
+    
+    def __init__(self, tesseract_cmd: Optional[str] = None, mode: str = 'full', backend=None):
         """
         Initialize Tesseract OCR service.
         
         Args:
             tesseract_cmd: Path to tesseract executable (optional, uses system default if None)
+            mode: 'full' (whole-card PSM 6 pass) or 'layout' (per-field ROI OCR on the front)
+            backend: OCR backend instance (defaults to pytesseract)
         """
         # Set Tesseract command path if provided (Windows typically: C:\\Program Files\\Tesseract-OCR\\tesseract.exe)
         if tesseract_cmd:
@@ -31,43 +191,43 @@ class TesseractOCRService:
         
         # Date pattern (DD.MM.YYYY or DD/MM/YYYY or DD-MM-YYYY)
         self.date_pattern = re.compile(r'\d{2}[./-]\d{2}[./-]\d{4}')
+        
+        self.mode = mode
+        self.backend = backend or PytesseractBackend()
+    
+    def _recognize(self, image: np.ndarray, lang: str, psm: int, oem: int = 3,
+                   whitelist: Optional[str] = None) -> str:
+        """Run the configured backend, falling back to pytesseract if an in-process handle fails."""
+        try:
+            return self.backend.recognize(image, lang=lang, psm=psm, oem=oem, whitelist=whitelist)
+        except pytesseract.TesseractNotFoundError:
+            raise
+        except Exception as e:
+            if isinstance(self.backend, PytesseractBackend):
+                raise
+            print(f"{self.backend.name} OCR failed, retrying with pytesseract: {e}")
+            return PytesseractBackend().recognize(image, lang=lang, psm=psm, oem=oem, whitelist=whitelist)
     
-    def preprocess_image(self, image_path: str) -> np.ndarray:
+    def preprocess_image(self, image: Union[str, ImageContext]) -> np.ndarray:
         """
         Preprocess image for better OCR results.
         
         Args:
-            image_path: Path to image file
+            image: Path to image file or a shared decoded image context
             
         Returns:
             Preprocessed image as numpy array
         """
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
-                print(f"Error: Could not read image from {image_path}")
+            # Decoding, grayscale and resizing are memoized on the context so
+            # other consumers of the same upload reuse them.
+            # Target width 1500-2000 is usually good for CNIC; smaller images are upscaled.
+            # Contrast is increased using CLAHE (Contrast Limited Adaptive Histogram Equalization),
+            # which is often better for Tesseract LSTM than simple thresholding across the whole image
+            enhanced = ImageContext.ensure(image).clahe(min_width=1600)
+            if enhanced is None:
                 return np.zeros((100, 100), dtype=np.uint8)
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Resize if image is too small (improves OCR accuracy)
-            # Target width 1500-2000 is usually good for CNIC
-            height, width = gray.shape
-            target_width = 1600
-            
-            if width < target_width:
-                scale_factor = target_width / width
-                new_width = int(width * scale_factor)
-                new_height = int(height * scale_factor)
-                gray = cv2.resize(gray, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            
-            # Increase contrast using CLAHE (Contrast Limited Adaptive Histogram Equalization)
-            # This is often better for Tesseract LSTM than simple thresholding across the whole image
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(gray)
-            
             # Optional: Slight denoising if needed, but Tesseract 4+ is distinctively robust to noise
             # denoised = cv2.fastNlMeansDenoising(enhanced, None, 10, 7, 21)
             
@@ -81,12 +241,12 @@ class TesseractOCRService:
             print(f"Error preprocessing image: {e}")
             return np.zeros((100, 100), dtype=np.uint8)
     
-    def extract_text(self, image_path: str, lang: str = 'eng+urd') -> str:
+    def extract_text(self, image: Union[str, ImageContext], lang: str = 'eng+urd') -> str:
         """
         Extract all text from image using Tesseract.
         
         Args:
-            image_path: Path to image file
+            image: Path to image file or decoded image context
             lang: Language(s) for OCR (default: 'eng+urd' for English and Urdu)
             
         Returns:
@@ -94,17 +254,10 @@ class TesseractOCRService:
         """
         try:
             # Preprocess image
-            processed_img = self.preprocess_image(image_path)
-            
-            # Configure Tesseract
-            custom_config = r'--oem 3 --psm 6'  # OEM 3 = LSTM, PSM 6 = Assume uniform block of text
+            processed_img = self.preprocess_image(image)
             
-            # Extract text
-            text = pytesseract.image_to_string(
-                processed_img,
-                lang=lang,
-                config=custom_config
-            )
+            # Extract text (OEM 3 = LSTM, PSM 6 = Assume uniform block of text)
+            text = self._recognize(processed_img, lang=lang, psm=6, oem=3)
             
             return text
             
@@ -118,6 +271,131 @@ class TesseractOCRService:
             print(traceback.format_exc())
             return ""
     
+    @staticmethod
+    def _order_corners(pts: np.ndarray) -> np.ndarray:
+        """Order 4 points as top-left, top-right, bottom-right, bottom-left."""
+        pts = pts.reshape(4, 2).astype(np.float32)
+        sums = pts.sum(axis=1)
+        diffs = np.diff(pts, axis=1).ravel()
+        return np.array([
+            pts[np.argmin(sums)],
+            pts[np.argmin(diffs)],
+            pts[np.argmax(sums)],
+            pts[np.argmax(diffs)]
+        ], dtype=np.float32)
+    
+    def detect_card(self, image: Union[str, ImageContext]) -> Optional[np.ndarray]:
+        """
+        Detect the CNIC in a photo and return it deskewed at CARD_SIZE.
+        
+        Looks for the largest 4-corner contour and warps it to the template.
+        If none is found the photo is assumed to be a tight crop of the card.
+        
+        Args:
+            image: Path to image file or decoded image context
+            
+        Returns:
+            Deskewed grayscale card image, or None if the image cannot be read
+        """
+        context = ImageContext.ensure(image)
+        gray = context.gray
+        if gray is None:
+            return None
+        
+        # Find the card outline on a small copy; scale the corners back afterwards
+        height, width = gray.shape
+        scale = min(1.0, 800 / max(height, width))
+        small = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+        
+        edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+        edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        corners = None
+        min_area = 0.2 * small.shape[0] * small.shape[1]
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+            if cv2.contourArea(contour) < min_area:
+                break
+            approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+            if len(approx) == 4:
+                corners = self._order_corners(approx) / scale
+                break
+        
+        card_w, card_h = self.CARD_SIZE
+        if corners is None:
+            return cv2.resize(gray, (card_w, card_h), interpolation=cv2.INTER_AREA)
+        
+        # Portrait-oriented quad: rotate corner order so the long edge is horizontal
+        if np.linalg.norm(corners[0] - corners[1]) < np.linalg.norm(corners[0] - corners[3]):
+            corners = np.roll(corners, -1, axis=0)
+        
+        target = np.array([[0, 0], [card_w - 1, 0], [card_w - 1, card_h - 1], [0, card_h - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        return cv2.warpPerspective(gray, matrix, (card_w, card_h), flags=cv2.INTER_CUBIC)
+    
+    def ocr_field(self, card: np.ndarray, field: str) -> str:
+        """
+        OCR a single field region of a deskewed card.
+        
+        Args:
+            card: Deskewed grayscale card (CARD_SIZE)
+            field: Key of FRONT_FIELD_TEMPLATE
+            
+        Returns:
+            Recognized text for the field
+        """
+        x0, y0, x1, y1 = self.FRONT_FIELD_TEMPLATE[field]
+        card_h, card_w = card.shape[:2]
+        roi = card[int(y0 * card_h):int(y1 * card_h), int(x0 * card_w):int(x1 * card_w)]
+        if roi.size == 0:
+            return ""
+        
+        scale = self.FIELD_HEIGHT / roi.shape[0]
+        roi = cv2.resize(roi, (max(1, int(roi.shape[1] * scale)), self.FIELD_HEIGHT), interpolation=cv2.INTER_CUBIC)
+        roi = cv2.threshold(roi, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+        
+        lang, psm, whitelist = self.FIELD_OCR_CONFIGS[field]
+        
+        try:
+            return self._recognize(roi, lang=lang, psm=psm, oem=1, whitelist=whitelist).strip()
+        except pytesseract.TesseractNotFoundError:
+            print("ERROR: Tesseract is not installed or not in PATH")
+            return ""
+        except Exception as e:
+            print(f"Error extracting field '{field}': {e}")
+            return ""
+    
+    def extract_front_fields(self, image: Union[str, ImageContext]) -> Dict[str, Optional[str]]:
+        """
+        Layout-aware front extraction: OCR each template field region separately.
+        
+        Args:
+            image: Path to front image or decoded image context
+            
+        Returns:
+            Dictionary with the fields that were recognized and well-formed
+        """
+        card = self.detect_card(image)
+        if card is None:
+            return {}
+        
+        fields = {}
+        for field in self.FRONT_FIELD_TEMPLATE:
+            text = self.ocr_field(card, field)
+            if field == 'cnic_number':
+                value = self.extract_cnic_number(text)
+            elif field in ('dob', 'issue_date', 'expiry_date'):
+                dates = self.extract_dates(text)
+                value = dates[0] if dates else None
+            elif field == 'gender':
+                value = text[:1].upper() if text[:1].upper() in ('M', 'F') else None
+            else:
+                cleaned = re.sub(r'[^A-Za-z .]', '', text).strip()
+                value = cleaned if len(cleaned) > 2 else None
+            fields[field] = value
+        
+        return fields
+    
     def extract_cnic_number(self, text: str) -> Optional[str]:
         """
         Extract CNIC number from text.
@@ -268,19 +546,40 @@ class TesseractOCRService:
         
         return None
     
-    def process_front_image(self, image_path: str) -> Dict[str, Optional[str]]:
+    def process_front_image(self, image: Union[str, ImageContext]) -> Dict[str, Optional[str]]:
         """
         Extract data from CNIC front image.
         
+        In 'layout' mode the template field regions are OCR'd first; the full-card
+        pass only runs if a required field could not be read from its region.
+        
         Args:
-            image_path: Path to front image
+            image: Path to front image or decoded image context
             
         Returns:
             Dictionary with extracted data
         """
+        if self.mode != 'layout':
+            return self._process_front_full(image)
+        
+        image = ImageContext.ensure(image)
+        try:
+            fields = self.extract_front_fields(image)
+        except Exception as e:
+            print(f"Layout OCR failed, using full-card pass: {e}")
+            fields = {}
+        
+        if all(fields.get(field) for field in ('cnic_number', 'name', 'dob')):
+            return fields
+        
+        full_data = self._process_front_full(image)
+        return {**full_data, **{key: value for key, value in fields.items() if value}}
+    
+    def _process_front_full(self, image: Union[str, ImageContext]) -> Dict[str, Optional[str]]:
+        """Extract front fields from a single whole-card PSM 6 pass."""
         try:
             # Extract text
-            text = self.extract_text(image_path)
+            text = self.extract_text(image)
             
             if not text:
                 print("Warning: No text extracted from front image")
@@ -310,19 +609,19 @@ class TesseractOCRService:
             print(traceback.format_exc())
             return {}
     
-    def process_back_image(self, image_path: str) -> Dict[str, Optional[str]]:
+    def process_back_image(self, image: Union[str, ImageContext]) -> Dict[str, Optional[str]]:
         """
         Extract data from CNIC back image.
         
         Args:
-            image_path: Path to back image
+            image: Path to back image or decoded image context
             
         Returns:
             Dictionary with extracted data
         """
         try:
             # Extract text
-            text = self.extract_text(image_path)
+            text = self.extract_text(image)
             
             if not text:
                 print("Warning: No text extracted from back image")
@@ -412,4 +711,7 @@ class TesseractOCRService:
 # Global Tesseract OCR service instance
 # Note: If Tesseract is not in PATH, set the path explicitly:
 # tesseract_ocr_service = TesseractOCRService(tesseract_cmd=r'C:\Program Files\Tesseract-OCR\tesseract.exe')
-tesseract_ocr_service = TesseractOCRService()
+tesseract_ocr_service = TesseractOCRService(
+    mode=settings.TESSERACT_OCR_MODE,
+    backend=create_ocr_backend(settings.TESSERACT_BACKEND, settings.TESSDATA_DIR or None)
+)
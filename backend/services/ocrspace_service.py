@@ -2,11 +2,19 @@
 OCR.space API service for enhanced CNIC text extraction.
 Provides cloud-based OCR with high accuracy for Pakistani CNIC documents.
 """
+import asyncio
+import random
 import requests
+import httpx
 import os
 import re
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple, Union
 from config import settings
+from services.circuit_breaker import CircuitBreaker
+
+
+class OCRSpaceProcessingError(Exception):
+    """OCR.space accepted the request but could not process the image."""
 
 
 class OCRSpaceService:
@@ -23,6 +31,20 @@ class OCRSpaceService:
         self.api_url = os.getenv('OCRSPACE_API_BASE_URL', 'https://api.ocr.space/parse/image')
         self.enabled = os.getenv('OCRSPACE_ENABLED', 'true').lower() == 'true'
         
+        # Async client settings (shared connection pool, retries, circuit breaker)
+        self.timeout = float(os.getenv('OCRSPACE_TIMEOUT_SECONDS', '15'))
+        self.max_retries = int(os.getenv('OCRSPACE_MAX_RETRIES', '2'))
+        self.retry_base_delay = float(os.getenv('OCRSPACE_RETRY_BASE_DELAY', '0.5'))
+        self.retry_budget = float(os.getenv('OCRSPACE_RETRY_BUDGET_SECONDS', '30'))
+        self.max_connections = int(os.getenv('OCRSPACE_MAX_CONNECTIONS', '20'))
+        self.breaker = CircuitBreaker(
+            'ocrspace',
+            failure_threshold=int(os.getenv('OCRSPACE_BREAKER_FAILURES', '3')),
+            recovery_timeout=float(os.getenv('OCRSPACE_BREAKER_RECOVERY_SECONDS', '60'))
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        
         # CNIC patterns (same as Tesseract)
         self.cnic_pattern = re.compile(r'\d{5}-\d{7}-\d')
         self.date_pattern = re.compile(r'\d{2}[./-]\d{2}[./-]\d{4}')
@@ -87,6 +109,155 @@ class OCRSpaceService:
             print(traceback.format_exc())
             return ""
     
+    def is_available(self) -> bool:
+        """Whether the engine is configured and its circuit is not open."""
+        return self.enabled and bool(self.api_key) and self.breaker.state != CircuitBreaker.OPEN
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared async client, creating it for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self):
+        """Close the shared async client."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    @staticmethod
+    def _parse_response(result: Dict) -> str:
+        """Extract parsed text from an OCR.space JSON response."""
+        if result.get('IsErroredOnProcessing'):
+            error_msg = (result.get('ErrorMessage') or ['Unknown error'])[0]
+            raise OCRSpaceProcessingError(f"OCR.space API error: {error_msg}")
+        
+        parsed_results = result.get('ParsedResults') or []
+        if parsed_results:
+            return parsed_results[0].get('ParsedText', '')
+        return ""
+    
+    async def extract_text_async(
+        self,
+        image: Union[str, bytes],
+        language: str = 'eng',
+        filename: str = 'cnic.jpg'
+    ) -> str:
+        """
+        Extract text from image using the pooled async client.
+        
+        Transient failures (timeouts, connection errors, 429/5xx) are retried
+        with jittered exponential backoff; attempts and backoff together stay
+        within OCRSPACE_RETRY_BUDGET_SECONDS. Only transient failures count
+        against the circuit breaker; 4xx and per-image processing errors do
+        not. While the circuit breaker is open the call is skipped immediately.
+        
+        Args:
+            image: Path to image file or raw image bytes
+            language: OCR language (eng, ara for Urdu script)
+            filename: File name sent with raw bytes
+            
+        Returns:
+            Extracted text as string
+        """
+        if not self.enabled or not self.api_key:
+            print("OCR.space API is disabled or API key not configured")
+            return ""
+        
+        if not self.breaker.allow_request():
+            print("OCR.space circuit is open, skipping engine")
+            return ""
+        
+        try:
+            return await self._post_with_retries(image, language, filename)
+        except BaseException:
+            # Cancelled (early exit, hedging) or failed before any response:
+            # no verdict on the service, but the probe slot must be returned
+            self.breaker.release()
+            raise
+    
+    async def _post_with_retries(self, image: Union[str, bytes], language: str, filename: str) -> str:
+        """Send the request with retries and record the outcome on the circuit breaker."""
+        if isinstance(image, str):
+            filename = os.path.basename(image)
+            image = await asyncio.to_thread(self._read_file, image)
+        
+        payload = {
+            'apikey': self.api_key,
+            'language': language,
+            'isOverlayRequired': 'false',
+            'detectOrientation': 'true',
+            'scale': 'true',
+            'OCREngine': '2'  # Engine 2 for better accuracy
+        }
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.retry_budget
+        client = self._get_client()
+        
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                # No attempt may run past the retry budget
+                response = await client.post(
+                    self.api_url,
+                    data=payload,
+                    files={'file': (filename, image, 'image/jpeg')},
+                    timeout=httpx.Timeout(min(self.timeout, remaining), connect=min(5.0, remaining))
+                )
+                
+                if response.status_code == 200:
+                    text = self._parse_response(response.json())
+                    self.breaker.record_success()
+                    return text
+                
+                if response.status_code != 429 and response.status_code < 500:
+                    # Client errors will not succeed on retry. They describe this
+                    # request (bad image, size limit, bad key) rather than service
+                    # health, so they count as the service answering: opening the
+                    # circuit on them would skip OCR.space for every other upload.
+                    print(f"OCR.space API request failed with status {response.status_code}")
+                    self.breaker.record_success()
+                    return ""
+                
+                print(f"OCR.space API returned {response.status_code} (attempt {attempt + 1})")
+            
+            except OCRSpaceProcessingError as e:
+                # Processing error reported for this image: the service itself answered
+                # normally, so like a 4xx it is not a breaker failure
+                print(e)
+                self.breaker.record_success()
+                return ""
+            except (httpx.HTTPError, ValueError) as e:
+                print(f"OCR.space request error (attempt {attempt + 1}): {e!r}")
+            
+            if attempt == self.max_retries:
+                break
+            
+            # Full jitter backoff, never past the retry budget
+            delay = random.uniform(0, self.retry_base_delay * (2 ** attempt))
+            if loop.time() + delay >= deadline:
+                break
+            await asyncio.sleep(delay)
+        
+        self.breaker.record_failure()
+        return ""
+    
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+    
     def extract_cnic_number(self, text: str) -> Optional[str]:
         """Extract CNIC number from text."""
         cleaned_text = text.replace(' ', '').replace('\n', ' ')
@@ -181,11 +352,9 @@ class OCRSpaceService:
         
         return None
     
-    def process_front_image(self, image_path: str) -> Dict[str, Optional[str]]:
-        """Extract data from CNIC front image."""
+    def parse_front_text(self, text: str) -> Dict[str, Optional[str]]:
+        """Extract front-side fields from OCR text."""
         try:
-            text = self.extract_text(image_path)
-            
             if not text:
                 return {}
             
@@ -209,11 +378,9 @@ class OCRSpaceService:
             print(f"Error processing front image with OCR.space: {e}")
             return {}
     
-    def process_back_image(self, image_path: str) -> Dict[str, Optional[str]]:
-        """Extract data from CNIC back image."""
+    def parse_back_text(self, text: str) -> Dict[str, Optional[str]]:
+        """Extract back-side fields from OCR text."""
         try:
-            text = self.extract_text(image_path)
-            
             if not text:
                 return {}
             
@@ -246,6 +413,22 @@ class OCRSpaceService:
             print(f"Error processing back image with OCR.space: {e}")
             return {}
     
+    def process_front_image(self, image_path: str) -> Dict[str, Optional[str]]:
+        """Extract data from CNIC front image."""
+        return self.parse_front_text(self.extract_text(image_path))
+    
+    def process_back_image(self, image_path: str) -> Dict[str, Optional[str]]:
+        """Extract data from CNIC back image."""
+        return self.parse_back_text(self.extract_text(image_path))
+    
+    async def process_front_image_async(self, image: Union[str, bytes]) -> Dict[str, Optional[str]]:
+        """Extract data from CNIC front image via the async client."""
+        return self.parse_front_text(await self.extract_text_async(image))
+    
+    async def process_back_image_async(self, image: Union[str, bytes]) -> Dict[str, Optional[str]]:
+        """Extract data from CNIC back image via the async client."""
+        return self.parse_back_text(await self.extract_text_async(image))
+    
     def extract_cnic_data(
         self,
         front_image_path: str,
@@ -0,0 +1,256 @@
+"""
+Verification progress pub/sub.
+Step transitions (OCR done, face match done, liveness done, ...) are published
+per session and pushed to SSE/WebSocket subscribers instead of being polled.
+Delivery across processes (API workers, worker.py) goes through a pluggable
+backend: PostgreSQL LISTEN/NOTIFY, or an in-process stand-in for SQLite and
+single-process development. Other services can claim an event type to receive
+those events themselves (e.g. cache invalidations) instead of subscribers.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from config import settings
+from database.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only."""
+
+    name = "local"
+
+    def __init__(self):
+        self._deliver: Optional[Callable[[str], None]] = None
+
+    def start(self, deliver: Callable[[str], None], listen: bool = True):
+        self._deliver = deliver if listen else None
+
+    def stop(self):
+        self._deliver = None
+
+    def publish(self, message: str):
+        if self._deliver:
+            self._deliver(message)
+
+
+class PostgresNotifyBackend:
+    """Publishes with pg_notify and receives on a dedicated LISTEN connection."""
+
+    name = "postgres"
+
+    def __init__(self, engine, channel: str = "kyc_progress"):
+        """
+        Initialize the LISTEN/NOTIFY backend.
+
+        Args:
+            engine: SQLAlchemy engine (publishing uses its pool)
+            channel: Notification channel name
+        """
+        self.engine = engine
+        self.channel = channel
+        self._deliver: Optional[Callable[[str], None]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, deliver: Callable[[str], None], listen: bool = True):
+        if not listen:
+            return
+        self._deliver = deliver
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen_loop, name="progress-bus-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def publish(self, message: str):
+        with self.engine.begin() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": message})
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        url = make_url(self.engine.url).set(drivername="postgresql")
+        conn = psycopg2.connect(url.render_as_string(hide_password=False))
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _listen_loop(self):
+        """Receive notifications until stopped, reconnecting with backoff."""
+        delay = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self._connect()
+                delay = 1.0
+                logger.info(f"Progress bus listening on channel {self.channel}")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._deliver(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"Progress bus listener error, reconnecting in {delay:.0f}s: {e}")
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+
+class ProgressBus:
+    """Per-session fan-out of progress events to async subscribers."""
+
+    def __init__(self, backend, queue_size: int = 64):
+        """
+        Initialize progress bus.
+
+        Args:
+            backend: LocalBackend or PostgresNotifyBackend
+            queue_size: Buffered events per subscriber (oldest dropped when full)
+        """
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self, listen: bool = True):
+        """
+        Start delivering events to this process's subscribers.
+
+        Args:
+            listen: False for publish-only processes (e.g. worker.py)
+        """
+        self._loop = asyncio.get_running_loop()
+        self.backend.start(self._deliver_threadsafe, listen=listen)
+        logger.info(f"Progress bus started ({self.backend.name} backend{'' if listen else ', publish only'})")
+
+    async def stop(self):
+        await asyncio.to_thread(self.backend.stop)
+
+    def _deliver_threadsafe(self, message: str):
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(message)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message: str):
+        try:
+            event = json.loads(message)
+        except ValueError:
+            logger.warning(f"Dropping malformed progress event: {message[:200]}")
+            return
+        handler = self._handlers.get(event.get("type"))
+        if handler is not None:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.warning(f"Handler for {event.get('type')} events failed: {e}")
+            return
+        for queue in list(self._subscribers.get(event.get("session_id"), ())):
+            if queue.full():
+                # Slow consumer: keep the newest transitions
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, session_id: Optional[str], event: Dict[str, Any]):
+        """
+        Publish a progress event for a session.
+
+        Failures are logged, never raised: progress streaming must not break
+        the verification step that reports it.
+
+        Args:
+            session_id: Session the event belongs to (ignored if None)
+            event: JSON-serializable event fields (e.g. step, state)
+        """
+        if not session_id:
+            return
+        message = json.dumps({**event, "session_id": session_id, "ts": time.time()})
+        try:
+            if isinstance(self.backend, LocalBackend):
+                self.backend.publish(message)
+            else:
+                await asyncio.to_thread(self.backend.publish, message)
+        except Exception as e:
+            logger.warning(f"Could not publish progress event for {session_id}: {e}")
+
+    def on_event(self, event_type: str, handler: Callable[[Dict[str, Any]], None]):
+        """
+        Handle every event of a type, from any process, in place of subscribers.
+
+        Args:
+            event_type: Value of the event's "type" field
+            handler: Called on the event loop with the event dictionary
+        """
+        self._handlers[event_type] = handler
+
+    @asynccontextmanager
+    async def subscribe(self, session_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive a session's events on a queue for the duration of the block."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[session_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(session_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[session_id]
+
+    def subscriber_count(self) -> int:
+        """Open subscriptions in this process."""
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+def create_progress_backend(name: str):
+    """
+    Build the cross-process backend.
+
+    Args:
+        name: "postgres", "local", or "auto" (postgres when DATABASE_URL is PostgreSQL)
+    """
+    if name == "auto":
+        name = "postgres" if engine.dialect.name == "postgresql" else "local"
+    if name == "postgres":
+        return PostgresNotifyBackend(engine, channel=settings.PROGRESS_BUS_CHANNEL)
+    if name == "local":
+        return LocalBackend()
+    raise ValueError(f"Unknown progress bus backend: {name}")
+
+
+# Global progress bus instance
+progress_bus = ProgressBus(
+    backend=create_progress_backend(settings.PROGRESS_BUS_BACKEND),
+    queue_size=settings.PROGRESS_BUS_QUEUE_SIZE
+)
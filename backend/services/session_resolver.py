@@ -0,0 +1,178 @@
+"""
+Session -> user resolution for the chat verification flow.
+Every upload step needs the user behind a chat session. Lookups go through an
+in-process TTL cache in front of the chat_session_links table (primary-key
+lookup) instead of scanning chat_messages. When a session's user changes the
+other API processes are told over the progress bus to drop their cached
+entry, and upload steps read the link from the database regardless.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.models import ChatMessage, ChatSessionLink, VerificationSession
+from services.progress_bus import progress_bus
+
+logger = logging.getLogger(__name__)
+
+# Progress bus event announcing that a session's user changed
+SESSION_CHANGED_EVENT = "session_link_changed"
+
+
+class SessionResolver:
+    """Cached session_id -> user_id mapping."""
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        """
+        Initialize session resolver.
+
+        Args:
+            ttl_seconds: How long a resolved mapping is served from memory
+            max_entries: Maximum cached sessions (least recently used evicted)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "legacy_scans": 0}
+
+    def _cache_get(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            entry = self._cache.get(session_id)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._cache[session_id]
+                return None
+            self._cache.move_to_end(session_id)
+            return user_id
+
+    def _cache_set(self, session_id: str, user_id: int):
+        with self._lock:
+            self._cache[session_id] = (user_id, time.monotonic() + self.ttl_seconds)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, session_id: str):
+        """Drop a session from this process's cache."""
+        with self._lock:
+            self._cache.pop(session_id, None)
+
+    async def announce_change(self, session_id: str):
+        """Make every process drop a session whose link was moved or removed (call after the commit)."""
+        self.invalidate(session_id)
+        await progress_bus.publish(session_id, {"type": SESSION_CHANGED_EVENT})
+
+    def link(self, db: Session, session_id: str, user_id: int, commit: bool = True) -> bool:
+        """
+        Record (or move) a chat session to a user and cache it.
+
+        Args:
+            db: Database session
+            session_id: Chat session id
+            user_id: User the session belongs to
+            commit: False to leave the write in the caller's transaction
+                (the caller invalidates the session if its commit fails)
+
+        Returns:
+            True if a row was written, False if the mapping was already cached
+        """
+        if self._cache_get(session_id) == user_id:
+            return False
+        now = datetime.utcnow()
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            # Upsert: concurrent requests linking the same session cannot conflict
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(ChatSessionLink).values(session_id=session_id, user_id=user_id, created_at=now, updated_at=now)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[ChatSessionLink.session_id],
+                set_={"user_id": stmt.excluded.user_id, "updated_at": stmt.excluded.updated_at}
+            ))
+        else:
+            link = db.get(ChatSessionLink, session_id)
+            if link is None:
+                db.add(ChatSessionLink(session_id=session_id, user_id=user_id, created_at=now, updated_at=now))
+            elif link.user_id != user_id:
+                link.user_id = user_id
+            db.flush()
+        if commit:
+            db.commit()
+        self._cache_set(session_id, user_id)
+        return True
+
+    def unlink(self, db: Session, session_id: str, commit: bool = True):
+        """Forget a session's user (chat reset); commit=False leaves the delete in the caller's transaction."""
+        db.execute(delete(ChatSessionLink).where(ChatSessionLink.session_id == session_id))
+        if commit:
+            db.commit()
+        self.invalidate(session_id)
+
+    def resolve(self, db: Session, session_id: str, use_cache: bool = True) -> Optional[int]:
+        """
+        Find the user behind a session.
+
+        Checks the cache, then chat_session_links and verification_sessions
+        (both unique-key lookups). Sessions created before links existed fall
+        back to the newest chat message with a user, which is then linked so
+        the scan happens once per session.
+
+        Args:
+            db: Database session
+            session_id: Chat or verification session id
+            use_cache: False to read the link from the database (steps that
+                store data for the user must not act on a stale mapping)
+
+        Returns:
+            User id, or None if the session is unknown
+        """
+        if not session_id:
+            return None
+
+        user_id = self._cache_get(session_id) if use_cache else None
+        if user_id is not None:
+            self.stats["hits"] += 1
+            return user_id
+        self.stats["misses"] += 1
+
+        link = db.get(ChatSessionLink, session_id)
+        if link is not None:
+            self._cache_set(session_id, link.user_id)
+            return link.user_id
+
+        verification_session = db.query(VerificationSession.user_id).filter(
+            VerificationSession.session_id == session_id
+        ).first()
+        if verification_session is not None:
+            self._cache_set(session_id, verification_session.user_id)
+            return verification_session.user_id
+
+        last_msg = db.query(ChatMessage.user_id).filter(
+            ChatMessage.session_id == session_id,
+            ChatMessage.user_id != None
+        ).order_by(ChatMessage.timestamp.desc()).first()
+        if last_msg is None:
+            return None
+
+        self.stats["legacy_scans"] += 1
+        logger.info(f"Backfilling session link for {session_id} from chat history")
+        self.link(db, session_id, last_msg.user_id)
+        return last_msg.user_id
+
+
+# Global session resolver instance
+session_resolver = SessionResolver(
+    ttl_seconds=settings.SESSION_CACHE_TTL_SECONDS,
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES
+)
+progress_bus.on_event(SESSION_CHANGED_EVENT, lambda event: session_resolver.invalidate(event["session_id"]))
@@ -0,0 +1,214 @@
+"""
+Dashboard statistics from incrementally maintained daily counters.
+Registration, account creation and every verification-session status
+transition add to a (day, metric) rollup row in the same transaction as the
+change itself, so /stats is one small GROUP BY instead of full-table COUNTs.
+"""
+import logging
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.models import Account, DailyStat, User, VerificationSession, VerificationStatus
+
+logger = logging.getLogger(__name__)
+
+USERS_REGISTERED = "users_registered"
+ACCOUNTS_CREATED = "accounts_created"
+
+
+def enter_metric(status: VerificationStatus) -> str:
+    """Metric counting sessions that entered a status."""
+    return f"session_enter:{status.value}"
+
+
+def exit_metric(status: VerificationStatus) -> str:
+    """Metric counting sessions that left a status."""
+    return f"session_exit:{status.value}"
+
+
+def _as_date(value) -> date:
+    # SQLite returns DATE() as a string, PostgreSQL as a date
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class StatsService:
+    """Records daily counters and answers dashboard queries from them."""
+
+    def __init__(self, cache_ttl_seconds: float = 10.0):
+        """
+        Initialize stats service.
+
+        Args:
+            cache_ttl_seconds: How long a /stats result is served from memory
+        """
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self._cache: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    # --- Writes (caller commits) ---
+
+    def increment(self, db: Session, metric: str, amount: int = 1, day: Optional[date] = None):
+        """
+        Add to a daily counter inside the caller's transaction.
+
+        Args:
+            db: Database session (not committed here)
+            metric: Counter name
+            amount: Value to add (may be negative)
+            day: UTC day to book it on (defaults to today)
+        """
+        day = day or datetime.utcnow().date()
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+            stmt = insert(DailyStat).values(day=day, metric=metric, count=amount)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[DailyStat.day, DailyStat.metric],
+                set_={"count": DailyStat.count + stmt.excluded.count}
+            ))
+            return
+
+        updated = db.execute(
+            update(DailyStat)
+            .where(DailyStat.day == day, DailyStat.metric == metric)
+            .values(count=DailyStat.count + amount)
+        ).rowcount
+        if not updated:
+            db.add(DailyStat(day=day, metric=metric, count=amount))
+            db.flush()
+
+    def record_transition(
+        self,
+        db: Session,
+        old_status: Optional[VerificationStatus],
+        new_status: VerificationStatus
+    ):
+        """Count a verification session moving between statuses (old_status None = created)."""
+        if old_status == new_status:
+            return
+        if old_status is not None:
+            self.increment(db, exit_metric(old_status))
+        self.increment(db, enter_metric(new_status))
+
+    # --- Reads ---
+
+    def dashboard(self, db: Session) -> Dict[str, int]:
+        """
+        Totals and today's numbers for the admin dashboard (one query, TTL-cached).
+
+        Returns:
+            Dictionary matching the SystemStats response fields
+        """
+        with self._lock:
+            if self._cache and self._cache[1] > time.monotonic():
+                return dict(self._cache[0])
+
+        today = datetime.utcnow().date()
+        rows = db.execute(
+            select(
+                DailyStat.metric,
+                func.sum(DailyStat.count).label("total"),
+                func.sum(case((DailyStat.day == today, DailyStat.count), else_=0)).label("today")
+            ).group_by(DailyStat.metric)
+        ).all()
+        totals = {row.metric: int(row.total or 0) for row in rows}
+        todays = {row.metric: int(row.today or 0) for row in rows}
+
+        def current(status: VerificationStatus) -> int:
+            return totals.get(enter_metric(status), 0) - totals.get(exit_metric(status), 0)
+
+        stats = {
+            "total_users": totals.get(USERS_REGISTERED, 0),
+            "total_accounts": totals.get(ACCOUNTS_CREATED, 0),
+            "pending_verifications": current(VerificationStatus.PENDING) + current(VerificationStatus.IN_PROGRESS),
+            "completed_verifications": current(VerificationStatus.COMPLETED),
+            "failed_verifications": current(VerificationStatus.FAILED),
+            "today_registrations": todays.get(USERS_REGISTERED, 0),
+            "today_completions": todays.get(enter_metric(VerificationStatus.COMPLETED), 0)
+        }
+        with self._lock:
+            self._cache = (stats, time.monotonic() + self.cache_ttl_seconds)
+        return dict(stats)
+
+    def invalidate(self):
+        """Drop the cached dashboard numbers."""
+        with self._lock:
+            self._cache = None
+
+    def is_empty(self, db: Session) -> bool:
+        """True if no counters have been recorded (rollups need a backfill)."""
+        return db.execute(select(DailyStat.day).limit(1)).first() is None
+
+    # --- Backfill ---
+
+    def rebuild(self, db: Session) -> int:
+        """
+        Recompute all counters from users, accounts and verification_sessions.
+
+        Session history only keeps created_at and completed_at, so every
+        transition except completion is booked on the creation day; current
+        per-status totals are exact.
+
+        Args:
+            db: Database session (committed by this call)
+
+        Returns:
+            Number of counter rows written
+        """
+        counters: Dict[tuple, int] = {}
+
+        def add(day, metric: str, amount: int):
+            key = (_as_date(day), metric)
+            counters[key] = counters.get(key, 0) + amount
+
+        for day, count in db.execute(
+            select(func.date(User.created_at), func.count()).group_by(func.date(User.created_at))
+        ):
+            add(day, USERS_REGISTERED, count)
+
+        for day, count in db.execute(
+            select(func.date(Account.created_at), func.count()).group_by(func.date(Account.created_at))
+        ):
+            add(day, ACCOUNTS_CREATED, count)
+
+        completed_day = func.date(func.coalesce(VerificationSession.completed_at, VerificationSession.created_at))
+        for created, completed, status, count in db.execute(
+            select(
+                func.date(VerificationSession.created_at),
+                completed_day,
+                VerificationSession.status,
+                func.count()
+            ).group_by(func.date(VerificationSession.created_at), completed_day, VerificationSession.status)
+        ):
+            status = status or VerificationStatus.PENDING
+            add(created, enter_metric(VerificationStatus.PENDING), count)
+            if status in (VerificationStatus.IN_PROGRESS, VerificationStatus.COMPLETED):
+                add(created, exit_metric(VerificationStatus.PENDING), count)
+                add(created, enter_metric(VerificationStatus.IN_PROGRESS), count)
+            if status == VerificationStatus.COMPLETED:
+                add(completed, exit_metric(VerificationStatus.IN_PROGRESS), count)
+                add(completed, enter_metric(VerificationStatus.COMPLETED), count)
+            if status in (VerificationStatus.FAILED, VerificationStatus.EXPIRED):
+                add(created, exit_metric(VerificationStatus.PENDING), count)
+                add(created, enter_metric(status), count)
+
+        db.execute(delete(DailyStat))
+        db.add_all(
+            DailyStat(day=day, metric=metric, count=count)
+            for (day, metric), count in counters.items() if day is not None
+        )
+        db.commit()
+        self.invalidate()
+        logger.info(f"Rebuilt {len(counters)} daily stat counters")
+        return len(counters)
+
+
+# Global stats service instance
+stats_service = StatsService(cache_ttl_seconds=settings.STATS_CACHE_TTL_SECONDS)
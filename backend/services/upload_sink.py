@@ -0,0 +1,199 @@
+"""
+Streaming upload sink shared by all multipart endpoints.
+Copies an UploadFile to disk in chunks off the event loop, enforcing the size
+cap and allowed file types while streaming, hashing the content on the fly and
+publishing the file atomically (temp file + rename).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+
+from config import settings
+from services import cv_jobs
+from services.image_normalizer import image_normalizer, NormalizedImage
+from services.worker_pool import cv_worker_pool, WorkerPoolError
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """Base class for rejected uploads that map to an HTTP status."""
+
+
+class UploadTooLarge(UploadError):
+    """Raised when an upload exceeds the size limit."""
+
+
+class UnsupportedUploadType(UploadError):
+    """Raised when an upload is not one of the allowed file types."""
+
+
+class StoredUpload(NamedTuple):
+    """A file written by the upload sink."""
+    path: str
+    size: int
+    sha256: str
+    content_type: str
+
+
+# Magic-byte signatures: (offset, bytes) -> detected MIME type
+_SIGNATURES = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (8, b"WEBP", "image/webp"),
+    (0, b"\x1a\x45\xdf\xa3", "video/webm"),
+    (4, b"ftyp", "video/mp4"),
+)
+
+ALLOWED_TYPES: Dict[str, Tuple[str, ...]] = {
+    "image": ("image/jpeg", "image/png", "image/webp"),
+    "video": ("video/webm", "video/mp4"),
+}
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Detect the file type from its first bytes (None if unknown)."""
+    for offset, signature, content_type in _SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return content_type
+    return None
+
+
+class UploadSink:
+    """Writes uploads to a directory with size/type limits and content hashing."""
+
+    def __init__(self, upload_dir: str, max_bytes: int, chunk_size: int = 1024 * 1024):
+        """
+        Initialize upload sink.
+
+        Args:
+            upload_dir: Directory uploads are written to
+            max_bytes: Maximum accepted upload size
+            chunk_size: Bytes read and written per step
+        """
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        os.makedirs(upload_dir, exist_ok=True)
+
+    async def save(self, upload_file: UploadFile, filename: str, kind: str = "image") -> StoredUpload:
+        """
+        Stream an upload to upload_dir/filename.
+
+        The file only appears under its final name once it has been fully
+        written and accepted; a rejected or failed upload leaves nothing behind.
+
+        Args:
+            upload_file: Incoming multipart file
+            filename: Target file name inside upload_dir
+            kind: Allowed type group ("image" or "video")
+
+        Returns:
+            StoredUpload with path, size, SHA-256 hex digest and detected type
+
+        Raises:
+            UploadTooLarge: If the upload exceeds max_bytes
+            UnsupportedUploadType: If the content is not an allowed type
+        """
+        label = upload_file.filename or filename
+        declared_size = getattr(upload_file, "size", None)
+        if declared_size is not None and declared_size > self.max_bytes:
+            raise UploadTooLarge(f"{label} is {declared_size} bytes; the limit is {self.max_bytes} bytes")
+
+        final_path = os.path.join(self.upload_dir, filename)
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, prefix=".upload-", suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        content_type = None
+
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = await upload_file.read(self.chunk_size)
+                    if not chunk:
+                        break
+
+                    if content_type is None:
+                        content_type = sniff_content_type(chunk[:16])
+                        if content_type not in ALLOWED_TYPES[kind]:
+                            raise UnsupportedUploadType(
+                                f"{label} is not an accepted {kind} "
+                                f"({', '.join(ALLOWED_TYPES[kind])})"
+                            )
+
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f"{label} exceeds the {self.max_bytes} byte limit")
+
+                    digest.update(chunk)
+                    await asyncio.to_thread(out.write, chunk)
+
+                if size == 0:
+                    raise UnsupportedUploadType(f"{label} is empty")
+
+            os.replace(tmp_path, final_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        logger.debug(f"Stored upload {final_path} ({size} bytes, {content_type})")
+        return StoredUpload(final_path, size, digest.hexdigest(), content_type)
+
+    async def save_image(
+        self,
+        upload_file: UploadFile,
+        filename: str,
+        purpose: str
+    ) -> Tuple[StoredUpload, NormalizedImage]:
+        """
+        Store an image upload and its normalized variant.
+
+        The original is kept as submitted; OCR and face matching should read
+        the normalized file (upright, long edge capped for the purpose).
+
+        Args:
+            upload_file: Incoming multipart file
+            filename: Target file name inside upload_dir
+            purpose: Normalization profile ("cnic" or "face")
+
+        Returns:
+            (original upload, normalized image)
+        """
+        stored = await self.save(upload_file, filename, kind="image")
+        if not image_normalizer.enabled:
+            return stored, NormalizedImage(
+                stored.path, stored.size, stored.sha256, stored.content_type, stored.size, 0, 0, 0.0
+            )
+
+        try:
+            normalized = await cv_worker_pool.run(cv_jobs.normalize_image, stored.path, purpose)
+        except WorkerPoolError:
+            raise
+        except Exception as e:
+            logger.warning(f"Image normalization failed for {stored.path}, using original: {e}")
+            return stored, NormalizedImage(
+                stored.path, stored.size, stored.sha256, stored.content_type, stored.size, 0, 0, 0.0
+            )
+
+        image_normalizer.record(stored.path, normalized)
+        logger.info(
+            f"Normalized {stored.path} ({purpose}): {normalized.width}x{normalized.height}, "
+            f"{stored.size} -> {normalized.size} bytes in {normalized.seconds * 1000:.0f}ms"
+        )
+        return stored, normalized
+
+
+# Global upload sink instance
+upload_sink = UploadSink(
+    upload_dir="uploads",
+    max_bytes=settings.MAX_FILE_SIZE_MB * 1024 * 1024,
+    chunk_size=settings.UPLOAD_CHUNK_KB * 1024
+)
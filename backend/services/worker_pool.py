@@ -0,0 +1,266 @@
+"""
+Process-pool execution layer for CPU-bound CV/OCR work.
+Keeps OCR, face extraction and liveness analysis off the event loop, with a
+bounded queue (backpressure) and a per-job time budget; a job still running
+at its deadline has its pool recycled so the hung worker is killed.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from config import settings
+from services.model_registry import model_registry, parse_model_list
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolError(Exception):
+    """Base class for worker pool failures that map to an HTTP status."""
+
+
+class WorkerPoolSaturated(WorkerPoolError):
+    """Raised when the pool already holds the maximum number of queued jobs."""
+
+
+class WorkerJobTimeout(WorkerPoolError):
+    """Raised when a job does not finish within its time budget."""
+
+
+def _init_worker(preload_models: Sequence[str]):
+    """Worker process initializer: load the requested models before taking jobs."""
+    if preload_models:
+        model_registry.preload(preload_models)
+
+
+def _worker_model_status() -> Tuple[int, Dict[str, Dict[str, Any]]]:
+    """Report this worker's process id and model load states."""
+    return os.getpid(), model_registry.status()
+
+
+class CVWorkerPool:
+    """Bounded process pool for CPU-heavy computer vision jobs."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_queue_depth: int = 8,
+        job_timeout: float = 90.0,
+        preload_models: Sequence[str] = ()
+    ):
+        """
+        Initialize the worker pool (processes are started lazily).
+
+        Args:
+            max_workers: Number of worker processes
+            max_queue_depth: Maximum jobs running or waiting before new jobs are rejected
+            job_timeout: Default per-job timeout in seconds
+            preload_models: Model registry names each worker loads when it starts
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_queue_depth = max(self.max_workers, max_queue_depth)
+        self.job_timeout = job_timeout
+        self.preload_models = tuple(preload_models)
+        self.warm_up_state = "not_started"
+        self._worker_models: Dict[int, Dict[str, Dict[str, Any]]] = {}
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use."""
+        with self._lock:
+            if self._executor is None:
+                # spawn avoids forking a process that already holds threads / TF state
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.preload_models,)
+                )
+                logger.info(f"CV worker pool started with {self.max_workers} processes")
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor, terminate: bool = False):
+        """
+        Drop a pool so the next job starts a fresh one.
+
+        Args:
+            executor: Pool to drop (a pool that was already replaced is only shut down)
+            terminate: Kill its worker processes too; a job that is already
+                running cannot be cancelled and would otherwise keep its worker
+                (and its queue slot) until it returns
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._worker_models = {}
+                self.warm_up_state = "not_started"
+        # shutdown() forgets the processes, so take them first
+        processes = list((executor._processes or {}).values()) if terminate else []
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def _acquire_slot(self):
+        with self._lock:
+            if self._pending >= self.max_queue_depth:
+                self._stats["rejected"] += 1
+                raise WorkerPoolSaturated(
+                    f"CV worker pool saturated ({self._pending}/{self.max_queue_depth} jobs queued)"
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+    def _release_slot(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run a picklable function in a worker process.
+
+        Args:
+            fn: Module-level function to execute
+            *args: Picklable positional arguments
+            timeout: Job timeout in seconds (defaults to the pool timeout)
+
+        Returns:
+            The function's return value
+
+        Raises:
+            WorkerPoolSaturated: If the queue is full
+            WorkerJobTimeout: If the job exceeds its time budget
+        """
+        self._acquire_slot()
+        start_time = time.perf_counter()
+
+        try:
+            executor = self._get_executor()
+            job = executor.submit(fn, *args)
+        except Exception:
+            self._release_slot()
+            raise
+
+        # The slot stays taken until the worker is actually done, even if the
+        # caller gives up, so the queue depth reflects real pool load.
+        job.add_done_callback(self._release_slot)
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(job), timeout or self.job_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats["timed_out"] += 1
+            if not job.cancel():
+                # Already running: recycle the pool so the hung worker is killed
+                # and its slot freed (other jobs in this pool fail with BrokenProcessPool)
+                logger.warning(f"CV job {getattr(fn, '__name__', 'job')} timed out while running; recycling worker pool")
+                self._reset_executor(executor, terminate=True)
+            raise WorkerJobTimeout(
+                f"{getattr(fn, '__name__', 'job')} exceeded {timeout or self.job_timeout:.0f}s"
+            )
+        except BrokenProcessPool:
+            with self._lock:
+                self._stats["failed"] += 1
+            self._reset_executor(executor)
+            raise
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+
+        with self._lock:
+            self._stats["completed"] += 1
+        logger.debug(f"CV job {getattr(fn, '__name__', 'job')} finished in {time.perf_counter() - start_time:.3f}s")
+        return result
+
+    async def warm_up(self, timeout: Optional[float] = None) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """
+        Start the worker processes now and wait for their model preloads.
+
+        Submits one status probe per worker. A probe only runs after its worker's
+        initializer has loaded the preload models; a fast worker may answer more
+        than one probe, so only the workers that answered are reported.
+
+        Args:
+            timeout: Time budget for the warm-up (defaults to the pool timeout)
+
+        Returns:
+            Model status reported by each worker, keyed by process id
+        """
+        self.warm_up_state = "running"
+        start_time = time.perf_counter()
+        probes = [
+            self.run(_worker_model_status, timeout=timeout or self.job_timeout)
+            for _ in range(self.max_workers)
+        ]
+        results = await asyncio.gather(*probes, return_exceptions=True)
+
+        with self._lock:
+            for result in results:
+                if isinstance(result, tuple):
+                    pid, status = result
+                    self._worker_models[pid] = status
+            failed = [result for result in results if isinstance(result, BaseException)]
+        self.warm_up_state = "failed" if failed else "done"
+
+        if failed:
+            logger.error(f"CV worker warm-up failed: {failed[0]}")
+        else:
+            logger.info(f"CV worker pool warmed up in {time.perf_counter() - start_time:.2f}s")
+        return self.worker_models()
+
+    def worker_models(self) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """Model status last reported by each worker process."""
+        with self._lock:
+            return {pid: dict(status) for pid, status in self._worker_models.items()}
+
+    def is_ready(self) -> bool:
+        """True when no preload is configured, or every reporting worker has its preload models ready."""
+        if not self.preload_models:
+            return True
+        workers = self.worker_models()
+        if self.warm_up_state != "done" or not workers:
+            return False
+        return all(
+            status.get(name, {}).get("state") == model_registry.READY
+            for status in workers.values()
+            for name in self.preload_models
+            if name in status
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current queue depth and job counters."""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "max_queue_depth": self.max_queue_depth,
+                "pending": self._pending,
+                **self._stats
+            }
+
+    def shutdown(self):
+        """Stop worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._worker_models = {}
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("CV worker pool stopped")
+
+
+# Global CV worker pool instance
+cv_worker_pool = CVWorkerPool(
+    max_workers=settings.CV_WORKER_PROCESSES,
+    max_queue_depth=settings.CV_MAX_QUEUE_DEPTH,
+    job_timeout=settings.CV_JOB_TIMEOUT_SECONDS,
+    preload_models=parse_model_list(settings.PRELOAD_MODELS, model_registry.applicable_names())
+)
@@ -0,0 +1,110 @@
+"""
+Tests for the chat conversation memory (services/conversation_memory.py).
+
+Usage:
+    python test_conversation_memory.py
+    pytest test_conversation_memory.py
+"""
+import sys
+
+from services.conversation_memory import SYSTEM_PROMPT, ConversationMemory
+
+
+def turn(role, content):
+    return {"role": role, "content": content}
+
+
+ONBOARDING = [
+    turn("assistant", "Hello! To get started, please tell me your full name."),
+    turn("user", "Ali Khan"),
+    turn("assistant", "Thanks Ali! What is your email address?"),
+    turn("user", "sure, it's ali.khan@example.com"),
+    turn("assistant", "And your phone number?"),
+    turn("user", "0300-1234567"),
+    turn("assistant", "Which account type would you like: Savings, Current, or Credit?"),
+    turn("user", "savings please"),
+]
+
+
+def test_short_history_is_sent_verbatim():
+    memory = ConversationMemory(max_history_tokens=1000)
+    messages = memory.build_messages("hello again", ONBOARDING)
+    assert messages[0] == {"role": "system", "content": SYSTEM_PROMPT}
+    assert messages[1:-1] == ONBOARDING
+    assert messages[-1] == turn("user", "hello again")
+
+
+def test_old_turns_replaced_by_slots():
+    filler = [turn("assistant" if n % 2 else "user", "Some chatter about branch timings " * 5) for n in range(30)]
+    memory = ConversationMemory(max_history_tokens=200)
+    messages = memory.build_messages("what's next?", ONBOARDING + filler)
+
+    history = messages[2:-1]
+    assert history == filler[-len(history):]
+    assert sum(memory.message_tokens(m) for m in history) <= 200
+    note = messages[1]["content"]
+    assert messages[1]["role"] == "system"
+    for detail in ("Name: Ali Khan", "Email: ali.khan@example.com", "Phone: +923001234567", "Account Type: Savings"):
+        assert detail in note, note
+
+
+def test_unfetched_turns_still_give_slots():
+    memory = ConversationMemory(max_history_tokens=1000)
+    recent = [turn("user", "ok"), turn("assistant", "Anything else?")]
+    messages = memory.build_messages("continue", recent, slots=memory.extract_slots(ONBOARDING))
+
+    assert messages[2:-1] == recent
+    assert "Name: Ali Khan" in messages[1]["content"]
+    assert "Account Type: Savings" in messages[1]["content"]
+
+
+def test_slots_updated_turn_by_turn():
+    memory = ConversationMemory()
+    slots = {}
+    for n in range(1, len(ONBOARDING), 2):
+        # The stored slots plus the previous reply and the new user message
+        slots = memory.extract_slots(ONBOARDING[n - 1:n + 1], slots)
+    assert slots == memory.extract_slots(ONBOARDING)
+    assert slots["name"] == "Ali Khan" and slots["phone"] == "+923001234567"
+
+
+def test_slot_extraction():
+    memory = ConversationMemory()
+    slots = memory.extract_slots([
+        turn("user", "Hi, my name is Sara Ahmed and I want a current account"),
+        turn("assistant", "Great, what's your email?"),
+        turn("user", "sara@example.com, +92 321 7654321"),
+        turn("user", "sorry, my email is sara.ahmed@example.com"),
+    ])
+    assert slots == {
+        "name": "Sara Ahmed",
+        "account_type": "Current",
+        "email": "sara.ahmed@example.com",
+        "phone": "+923217654321",
+    }
+
+
+def test_no_name_from_unrelated_replies():
+    memory = ConversationMemory()
+    slots = memory.extract_slots([
+        turn("assistant", "How can I help you today?"),
+        turn("user", "I am interested"),
+        turn("assistant", "Please tell me your full name."),
+        turn("user", "why do you need it?"),
+    ])
+    assert "name" not in slots
+
+
+if __name__ == "__main__":
+    tests = [test_short_history_is_sent_verbatim, test_old_turns_replaced_by_slots,
+             test_unfetched_turns_still_give_slots, test_slots_updated_turn_by_turn, test_slot_extraction,
+             test_no_name_from_unrelated_replies]
+    failures = 0
+    for test in tests:
+        try:
+            test()
+            print(f"PASS  {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"FAIL  {test.__name__}: {e}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,161 @@
+"""
+Test script for the async DIDIT liveness client and hedged local fallback.
+Runs against the local stub server, so no API key or network access is needed.
+"""
+import sys
+import os
+import asyncio
+import tempfile
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.cv.didit_liveness_service import DiditLivenessService
+from scripts.didit_stub_server import start_stub_server
+
+VIDEO_BYTES = os.urandom(3 * 1024 * 1024)
+
+
+def make_video() -> str:
+    """Write a fake video file and return its path."""
+    handle, path = tempfile.mkstemp(suffix=".webm")
+    with os.fdopen(handle, "wb") as f:
+        f.write(VIDEO_BYTES)
+    return path
+
+
+def make_service(base_url: str, hedge_delay: float = 0.1) -> DiditLivenessService:
+    """Create a service pointed at the stub."""
+    service = DiditLivenessService(api_key="stub-key")
+    service.enabled = True
+    service.endpoints['liveness'] = f"{base_url}/v1/liveness"
+    service.hedge_enabled = True
+    service.hedge_delay = hedge_delay
+    return service
+
+
+def local_result(is_live: bool, confidence: float, delay: float = 0.0):
+    """Build a fake local check returning a fixed result."""
+    calls = []
+
+    async def check():
+        calls.append(time.perf_counter())
+        await asyncio.sleep(delay)
+        return is_live, confidence, {"blinks": 1 if is_live else 0}
+
+    return check, calls
+
+
+def run_check(service, video_path, local_check):
+    async def run():
+        result = await service.check_liveness_async(video_path, local_check)
+        await service.aclose()
+        return result
+    return asyncio.run(run())
+
+
+def test_streaming_upload():
+    """A fast DIDIT answer wins and the whole video reaches the server."""
+    print("\n" + "=" * 60)
+    print("Testing streaming upload")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server()
+    video_path = make_video()
+    try:
+        service = make_service(base_url, hedge_delay=5)
+        check, calls = local_result(True, 0.9)
+        is_live, score, details = run_check(service, video_path, check)
+        print(f"Result: {is_live}, {score}, {details}, bytes={state.bytes_received}")
+        return (is_live and details['liveness_source'] == 'didit' and not calls
+                and state.bytes_received > len(VIDEO_BYTES)
+                and state.last_content_type.startswith('multipart/form-data'))
+    finally:
+        server.shutdown()
+        os.remove(video_path)
+
+
+def test_hedged_local_wins():
+    """A confident local result beats a slow DIDIT call."""
+    print("\n" + "=" * 60)
+    print("Testing hedged local win")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(delay=3)
+    video_path = make_video()
+    try:
+        service = make_service(base_url)
+        check, calls = local_result(True, 0.9, delay=0.1)
+        start = time.perf_counter()
+        is_live, score, details = run_check(service, video_path, check)
+        elapsed = time.perf_counter() - start
+        print(f"Result: {is_live}, {score}, {details} in {elapsed:.2f}s")
+        return is_live and details['liveness_source'] == 'local' and elapsed < 1.5
+    finally:
+        server.shutdown()
+        os.remove(video_path)
+
+
+def test_local_negative_waits_for_didit():
+    """A local 'not live' does not win while DIDIT may still say live."""
+    print("\n" + "=" * 60)
+    print("Testing hedge policy")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(delay=0.5)
+    video_path = make_video()
+    try:
+        service = make_service(base_url)
+        check, calls = local_result(False, 0.1)
+        is_live, score, details = run_check(service, video_path, check)
+        print(f"Result: {is_live}, {score}, {details}")
+        return is_live and details['liveness_source'] == 'didit' and len(calls) == 1
+    finally:
+        server.shutdown()
+        os.remove(video_path)
+
+
+def test_didit_failure_falls_back():
+    """A DIDIT server error falls back to the local result."""
+    print("\n" + "=" * 60)
+    print("Testing fallback")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(fail_first=100)
+    video_path = make_video()
+    try:
+        service = make_service(base_url, hedge_delay=5)
+        check, calls = local_result(False, 0.1)
+        is_live, score, details = run_check(service, video_path, check)
+        print(f"Result: {is_live}, {score}, {details}, breaker: {service.breaker.metrics()}")
+        return (not is_live and details['liveness_source'] == 'local'
+                and details['fallback_method'] == 'MediaPipe'
+                and service.breaker.metrics()['failures'] == 1)
+    finally:
+        server.shutdown()
+        os.remove(video_path)
+
+
+def main():
+    """Run all tests."""
+    results = [
+        ("Streaming upload", test_streaming_upload()),
+        ("Hedged local win", test_hedged_local_wins()),
+        ("Hedge policy", test_local_negative_waits_for_didit()),
+        ("DIDIT failure fallback", test_didit_failure_falls_back()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for test_name, result in results:
+        status = "✓ PASS" if result else "✗ FAIL"
+        print(f"{status}: {test_name}")
+
+    return all(result for _, result in results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
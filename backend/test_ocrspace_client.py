@@ -0,0 +1,181 @@
+"""
+Test script for the async OCR.space client.
+Runs against the local stub server, so no API key or network access is needed.
+"""
+import sys
+import os
+import asyncio
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.ocrspace_service import OCRSpaceService
+from services.circuit_breaker import CircuitBreaker
+from scripts.ocrspace_stub_server import start_stub_server
+
+
+def make_service(base_url: str) -> OCRSpaceService:
+    """Create a service pointed at the stub with fast retries."""
+    service = OCRSpaceService(api_key="stub-key")
+    service.api_url = base_url
+    service.enabled = True
+    service.retry_base_delay = 0.01
+    return service
+
+
+def test_extract_text():
+    """Parsed text comes back from a healthy server."""
+    print("\n" + "=" * 60)
+    print("Testing async extraction")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server()
+    try:
+        service = make_service(base_url)
+
+        async def run():
+            data = await service.process_front_image_async(b"fake-image")
+            await service.aclose()
+            return data
+
+        data = asyncio.run(run())
+        print(f"Extracted: {data}")
+        return data.get('cnic_number') == "35202-1234567-1"
+    finally:
+        server.shutdown()
+
+
+def test_retries_transient_errors():
+    """5xx responses are retried and the call eventually succeeds."""
+    print("\n" + "=" * 60)
+    print("Testing retries")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(fail_first=2)
+    try:
+        service = make_service(base_url)
+        service.max_retries = 2
+
+        async def run():
+            text = await service.extract_text_async(b"fake-image")
+            await service.aclose()
+            return text
+
+        text = asyncio.run(run())
+        print(f"Requests made: {state.requests}, breaker: {service.breaker.metrics()}")
+        return bool(text) and state.requests == 3 and service.breaker.state == CircuitBreaker.CLOSED
+    finally:
+        server.shutdown()
+
+
+def test_circuit_opens_and_skips():
+    """After repeated failures the engine is skipped without network calls."""
+    print("\n" + "=" * 60)
+    print("Testing circuit breaker")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(fail_first=100)
+    try:
+        service = make_service(base_url)
+        service.max_retries = 0
+        service.breaker = CircuitBreaker('ocrspace', failure_threshold=2, recovery_timeout=60)
+
+        async def run():
+            for _ in range(4):
+                await service.extract_text_async(b"fake-image")
+            await service.aclose()
+
+        asyncio.run(run())
+        metrics = service.breaker.metrics()
+        print(f"Requests made: {state.requests}, breaker: {metrics}")
+        return (state.requests == 2 and metrics['state'] == CircuitBreaker.OPEN
+                and metrics['rejected'] == 2 and not service.is_available())
+    finally:
+        server.shutdown()
+
+
+def test_retry_budget_bounds_total_time():
+    """Slow attempts are cut off at the retry budget, not per-attempt timeout x attempts."""
+    print("\n" + "=" * 60)
+    print("Testing retry budget")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(delay=1.0)
+    try:
+        service = make_service(base_url)
+        service.max_retries = 2
+        service.timeout = 0.6
+        service.retry_budget = 1.0
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            text = await service.extract_text_async(b"fake-image")
+            elapsed = loop.time() - start
+            await service.aclose()
+            return text, elapsed
+
+        text, elapsed = asyncio.run(run())
+        print(f"Requests made: {state.requests}, elapsed: {elapsed:.2f}s")
+        return not text and elapsed < 1.3
+    finally:
+        server.shutdown()
+
+
+def test_cancelled_probe_releases_slot():
+    """A half-open probe that is cancelled lets the next call probe again."""
+    print("\n" + "=" * 60)
+    print("Testing cancelled half-open probe")
+    print("=" * 60)
+
+    server, state, base_url = start_stub_server(fail_first=1, delay=0.2)
+    try:
+        service = make_service(base_url)
+        service.max_retries = 0
+        service.breaker = CircuitBreaker('ocrspace', failure_threshold=1, recovery_timeout=0.1)
+
+        async def run():
+            await service.extract_text_async(b"fake-image")
+            await asyncio.sleep(0.15)
+            probe = asyncio.create_task(service.extract_text_async(b"fake-image"))
+            await asyncio.sleep(0.05)
+            probe.cancel()
+            try:
+                await probe
+            except asyncio.CancelledError:
+                pass
+            text = await service.extract_text_async(b"fake-image")
+            await service.aclose()
+            return text
+
+        text = asyncio.run(run())
+        metrics = service.breaker.metrics()
+        print(f"Requests made: {state.requests}, breaker: {metrics}")
+        return bool(text) and metrics['state'] == CircuitBreaker.CLOSED and metrics['rejected'] == 0
+    finally:
+        server.shutdown()
+
+
+def main():
+    """Run all tests."""
+    results = [
+        ("Async extraction", test_extract_text()),
+        ("Retries", test_retries_transient_errors()),
+        ("Circuit breaker", test_circuit_opens_and_skips()),
+        ("Retry budget", test_retry_budget_bounds_total_time()),
+        ("Cancelled probe", test_cancelled_probe_releases_slot()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for test_name, result in results:
+        status = "✓ PASS" if result else "✗ FAIL"
+        print(f"{status}: {test_name}")
+
+    return all(result for _, result in results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
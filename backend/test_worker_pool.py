@@ -0,0 +1,66 @@
+"""
+Test script for the CV worker pool (services/worker_pool.py).
+Uses builtins as jobs, so no models are loaded.
+"""
+import sys
+import os
+import asyncio
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.worker_pool import CVWorkerPool, WorkerJobTimeout
+
+
+def test_hung_job_frees_worker_and_slot():
+    """A job still running at its deadline is killed, and the pool keeps taking jobs."""
+    print("\n" + "=" * 60)
+    print("Testing hung job timeout")
+    print("=" * 60)
+
+    pool = CVWorkerPool(max_workers=1, max_queue_depth=1, job_timeout=30)
+
+    async def run():
+        first_pid = await pool.run(os.getpid)
+        try:
+            await pool.run(time.sleep, 60, timeout=1)
+            return False
+        except WorkerJobTimeout as e:
+            print(f"Timed out: {e}")
+
+        # The killed job's future resolves and its slot is released
+        for _ in range(50):
+            if pool.stats()["pending"] == 0:
+                break
+            await asyncio.sleep(0.1)
+        stats = pool.stats()
+        second_pid = await pool.run(os.getpid, timeout=30)
+        print(f"Workers: {first_pid} -> {second_pid}, stats: {stats}")
+        return stats["pending"] == 0 and stats["timed_out"] == 1 and second_pid != first_pid
+
+    try:
+        return asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+
+def main():
+    """Run all tests."""
+    results = [
+        ("Hung job timeout", test_hung_job_frees_worker_and_slot()),
+    ]
+
+    print("\n" + "=" * 60)
+    print("TEST SUMMARY")
+    print("=" * 60)
+    for test_name, result in results:
+        status = "✓ PASS" if result else "✗ FAIL"
+        print(f"{status}: {test_name}")
+
+    return all(result for _, result in results)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,58 @@
+"""
+Background job worker for the KYC pipeline.
+Run one or more of these next to the API (with JOB_EMBEDDED_WORKER=false):
+
+    python worker.py [--concurrency N]
+"""
+import argparse
+import asyncio
+import logging
+import signal
+
+from config import settings
+from database import init_db
+from services import kyc_jobs  # noqa: F401  (registers job handlers)
+from services.job_queue import job_queue
+from services.progress_bus import progress_bus
+from services.worker_pool import cv_worker_pool
+
+logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+logger = logging.getLogger(__name__)
+
+
+async def run(concurrency: int):
+    """Process jobs until SIGINT/SIGTERM, then finish the jobs in flight."""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    # Publish step transitions to API processes; nothing subscribes here
+    await progress_bus.start(listen=False)
+    try:
+        await job_queue.run_worker(concurrency=concurrency, stop_event=stop_event)
+    finally:
+        await progress_bus.stop()
+        cv_worker_pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="eKYC background job worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.JOB_WORKER_CONCURRENCY,
+        help="Jobs processed in parallel (default: JOB_WORKER_CONCURRENCY)"
+    )
+    args = parser.parse_args()
+
+    init_db()
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,7 @@ export async function POST(request) {
             success: true,
             message: 'CNIC uploaded successfully',
             confirmation_message: data.confirmation_message || null,
+            job_id: data.job_id || null,
             data: data.data
         });
 